@@ -1,31 +1,41 @@
 import os
+import shutil
 import weakref
 import html
-from PyQt5.QtCore import QThread, pyqtSignal, QTimer, QMutex, Qt, QElapsedTimer
-from PyQt5.QtWidgets import QMessageBox, QApplication
+import tempfile
+from collections import deque
+from contextlib import nullcontext
+from PyQt5.QtCore import QThread, pyqtSignal, QTimer, QMutex, Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QMessageBox, QApplication, QFileDialog
 from PyQt5.QtCore import QMutexLocker
-import hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 import logging
 from datetime import timedelta
-
-# 日志配置
-logging.basicConfig(
-    filename='error.log',
-    level=logging.ERROR,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-def check_log_size():
-    """检查日志文件大小，超过1MB则删除并重建"""
-    log_file = 'error.log'
-    try:
-        if os.path.exists(log_file) and os.path.getsize(log_file) > 1 * 1024 * 1024:  # 1MB
-            os.remove(log_file)
-            logging.info("Log file exceeded 1MB and was deleted.")
-    except Exception as e:
-        logging.error(f"检查日志大小时出错: {str(e)}")
+from crack_core import ThroughputMeter, parse_hash_list, progress_snapshot
+from engine import RegexJob, create_crack_job, valid_hashes
+from error_log import LOG_FILE, setup_logging
+from hash_kernels import DEFAULT_KERNEL, get_kernel
+from instrumentation import RunProfiler, RunStats, format_stats, profile_path
+from mask import Mask, MaskError
+from ordering import DEFAULT_PRIORITY_WORDS, HitStats, record_scans
+from potfile import DEFAULT_MAX_ENTRIES, Potfile
+from rules import RuleError, compile_rules, rule_lines
+from dict_index import (DictionaryIndex, IndexBuildCancelled, build_index,
+                        index_path_for, index_status)
+
+# 界面轮询任务进度的间隔(毫秒)
+PROGRESS_INTERVAL_MS = 100
+# 每轮询多少次刷新一次运行统计面板
+STATS_REFRESH_TICKS = 10
+# 正则匹配结果列表默认最多显示的条数，全部匹配仍可导出
+REGEX_MAX_RESULTS = 100_000
+# 攻击模式
+DICT_MODE = "字典"
+ALL_DICTS_MODE = "全部字典"
+MASK_MODE = "掩码"
+
+# 日志配置：专用线程写文件，按大小轮转，重复日志限流
+setup_logging(LOG_FILE)
 
 class StyleManager:
     def __init__(self, design_config):
@@ -192,220 +202,281 @@ class StyleManager:
         """
         return style
 
-class OptimizedCrackThread(QThread):
-    progress_updated = pyqtSignal(int, str)
-    result_found = pyqtSignal(str)
-    crack_completed = pyqtSignal()
-    error_occurred = pyqtSignal(str)
-    time_updated = pyqtSignal(str)
+class InstrumentedThread(QThread):
+    """任务线程的公共部分：统计各信号的发送次数，settings.profile 开启时在剖析器下运行任务"""
 
-    def __init__(self, target_hash, wordlist):
+    def __init__(self, job, profile=None):
         super().__init__()
-        self.target_hash = target_hash.strip().lower()
-        self.wordlist = wordlist
-        self.total_words = len(wordlist)
-        self.mutex = QMutex()
-        self._is_active = True
-        self.executor = ThreadPoolExecutor(max_workers=4)
-        self.found = False
-        self.start_time = QElapsedTimer()
-        self.processed_words = 0
+        self.job = job
+        # profile 为剖析结果的保存路径，为空时不剖析
+        self.profile = profile
+        self.stats = getattr(job, 'stats', None) or RunStats()
 
-    def run(self):
+    def _emit(self, name, *args):
+        self.stats.count(f"signal.{name}")
+        getattr(self, name).emit(*args)
+
+    def _run_job(self, on_result):
+        """运行任务并返回其结果，结束时记录总耗时"""
         try:
-            check_log_size()
-            self.start_time.start()
-            if not self._validate_hash():
-                self.error_occurred.emit("无效的MD5哈希值")
-                return
+            with RunProfiler(self.profile) if self.profile else nullcontext():
+                return self.job.run(None, on_result)
+        finally:
+            self.stats.finish()
 
-            futures = []
-            batch_size = min(1000, max(1, self.total_words // 100))
-            for i in range(0, self.total_words, batch_size):
-                if not self._safe_check() or self.found:
-                    break
-                batch = self.wordlist[i:i + batch_size]
-                future = self.executor.submit(self._process_batch, batch, i)
-                futures.append(future)
-
-            total_processed = 0
-            for future in as_completed(futures):
-                if self.found or not self._safe_check():
-                    break
-                result, count = future.result()
-                total_processed += count
-                self.processed_words = total_processed
-                self._update_progress(total_processed)
-                if result:
-                    self.result_found.emit(result)
-                    self._safe_stop()
-                    return
+class OptimizedCrackThread(InstrumentedThread):
+    """破解任务的Qt包装，具体引擎由 settings.engine 决定；进度由界面定时读取 job 计数器
 
-            if self._safe_check():
-                self.crack_completed.emit()
+    on_hit(target, word) 与 on_finish(job) 在本线程中调用，写potfile、保存命中统计等
+    磁盘操作因此不占用界面线程；线程被放弃后仍会在结束前执行 on_finish。
+    """
+    result_found = pyqtSignal(str, str)
+    crack_completed = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, target_hashes=None, file_path=None, settings=None, job=None, profile=None,
+                 on_hit=None, on_finish=None):
+        if isinstance(target_hashes, str):
+            target_hashes = [target_hashes]
+        # job 为准备线程中已创建好的任务
+        super().__init__(job or create_crack_job(file_path, target_hashes, settings), profile)
+        self.on_hit = on_hit
+        self.on_finish = on_finish
 
+    def run(self):
+        try:
+            if not valid_hashes(self.job.target_hashes):
+                self._emit('error_occurred', "无效的MD5哈希值")
+                return
+            if self._run_job(self._found):
+                self._emit('crack_completed')
         except Exception as e:
             logging.error(f"运行时错误: {str(e)}")
-            self.error_occurred.emit(f"运行时错误: {str(e)}")
+            self._emit('error_occurred', f"运行时错误: {str(e)}")
         finally:
-            self._safe_cleanup()
+            if self.on_finish is not None:
+                self.on_finish(self.job)
 
-    def _process_batch(self, batch, start_index):
-        count = 0
-        for idx, word in enumerate(batch):
-            if not self._safe_check() or self.found:
-                break
-            try:
-                word = word.strip()
-                current_hash = hashlib.md5(word.encode('utf-8', 'ignore')).hexdigest()
-                if current_hash == self.target_hash:
-                    return word, len(batch) - idx
-            except Exception as e:
-                logging.error(f"批处理错误: {str(e)}")
-            finally:
-                count += 1
-        return None, count
-
-    def _validate_hash(self):
-        return re.match(r'^[a-f0-9]{32}$', self.target_hash) is not None
-
-    def _safe_check(self):
-        with QMutexLocker(self.mutex):
-            return self._is_active
-
-    def _update_progress(self, processed):
-        progress = min(100, int(processed / self.total_words * 100))
-        current_word = self.wordlist[min(processed, self.total_words - 1)][:20]
-        self.progress_updated.emit(progress, current_word)
-        self._update_time_estimate()
-
-    def _update_time_estimate(self):
-        elapsed = self.start_time.elapsed() / 1000
-        if elapsed > 0 and self.processed_words > 0:
-            words_per_sec = self.processed_words / elapsed
-            remaining = (self.total_words - self.processed_words) / words_per_sec
-            time_str = str(timedelta(seconds=int(remaining))).split('.')[0]
-            self.time_updated.emit(f"预计剩余时间: {time_str}")
+    def _found(self, target, word):
+        if self.on_hit is not None:
+            self.on_hit(target, word)
+        self._emit('result_found', target, word)
 
     def _safe_stop(self):
-        with QMutexLocker(self.mutex):
-            self._is_active = False
-            self.found = True
+        self.job.stop()
 
-    def _safe_cleanup(self):
-        self.executor.shutdown(wait=False)
-        if self.isRunning():
-            self.wait(1000)
+class RegexCrackThread(InstrumentedThread):
+    """正则匹配的Qt包装：宽泛的正则可能匹配字典的很大一部分，匹配结果不逐个发信号
 
-class RegexCrackThread(QThread):
-    progress_updated = pyqtSignal(int, str)
-    result_found = pyqtSignal(str)
+    全部匹配写入 spool_path 文件供导出；其中前 max_results 个(为0时不限)放入缓冲区，
+    由界面定时用 take_results 成批取走。同时匹配多个正则时每条结果为 "明文<TAB>正则"。
+    """
     crack_completed = pyqtSignal()
     error_occurred = pyqtSignal(str)
 
-    def __init__(self, pattern, wordlist):
-        super().__init__()
-        self.pattern = pattern
-        self.wordlist = wordlist
-        self.total_words = len(wordlist)
-        self.mutex = QMutex()
-        self._is_active = True
-        self.executor = ThreadPoolExecutor(max_workers=4)
-        self.start_time = QElapsedTimer()
+    def __init__(self, patterns=None, file_path=None, settings=None, job=None, profile=None,
+                 spool_path=None, max_results=REGEX_MAX_RESULTS):
+        self.patterns = job.patterns if job else [patterns] if isinstance(patterns, str) else list(patterns)
+        if job is None and self._validate_pattern():
+            job = RegexJob(file_path, self.patterns, settings)
+        super().__init__(job, profile)
+        self.spool_path = spool_path
+        self.max_results = max_results
+        self.pending = deque()
+        self.buffered = 0
+        self._spool = None
 
     def run(self):
         try:
-            check_log_size()
-            self.start_time.start()
-            if not self._validate_pattern():
-                self.error_occurred.emit("无效的正则表达式")
+            if self.job is None:
+                self._emit('error_occurred', "无效的正则表达式")
                 return
-
-            futures = []
-            batch_size = min(1000, max(1, self.total_words // 100))
-            for i in range(0, self.total_words, batch_size):
-                if not self._safe_check():
-                    break
-                batch = self.wordlist[i:i + batch_size]
-                future = self.executor.submit(self._process_batch, batch, i)
-                futures.append(future)
-
-            total_processed = 0
-            matches = []
-            for future in as_completed(futures):
-                if not self._safe_check():
-                    break
-                batch_matches, count = future.result()
-                total_processed += count
-                matches.extend(batch_matches)
-                self._update_progress(total_processed)
-                for match in batch_matches:
-                    self.result_found.emit(match)
-
-            if self._safe_check():
-                self.crack_completed.emit() if matches else self.error_occurred.emit("未找到匹配的密码")
-
+            if self.spool_path:
+                self._spool = open(self.spool_path, 'w', encoding='utf-8', errors='surrogateescape')
+            try:
+                completed = self._run_job(self._collect)
+            finally:
+                if self._spool is not None:
+                    self._spool.close()
+            if completed:
+                if self.job.match_count:
+                    self._emit('crack_completed')
+                else:
+                    self._emit('error_occurred', "未找到匹配的密码")
         except Exception as e:
             logging.error(f"正则匹配运行时错误: {str(e)}")
-            self.error_occurred.emit(f"运行时错误: {str(e)}")
-        finally:
-            self._safe_cleanup()
-
-    def _process_batch(self, batch, start_index):
-        count = 0
-        matches = []
-        try:
-            regex = re.compile(self.pattern)
-            for word in batch:
-                if not self._safe_check():
-                    break
-                try:
-                    word = word.strip()
-                    md5_hash = hashlib.md5(word.encode('utf-8', 'ignore')).hexdigest()
-                    if regex.match(md5_hash):
-                        matches.append(word)
-                except Exception as e:
-                    logging.error(f"正则批处理错误: {str(e)}")
-                finally:
-                    count += 1
-            return matches, count
-        except re.error as e:
-            logging.error(f"正则表达式编译错误: {str(e)}")
-            return [], count
+            self._emit('error_occurred', f"运行时错误: {str(e)}")
+
+    def _collect(self, word, pattern):
+        if len(self.patterns) > 1:
+            word = f"{word}\t{pattern}"
+        if self._spool is not None:
+            self._spool.write(word + '\n')
+        # 超出显示上限的匹配只写入文件，缓冲区占用不随匹配数增长
+        if not self.max_results or self.buffered < self.max_results:
+            self.pending.append(word)
+            self.buffered += 1
+
+    def take_results(self):
+        """取走目前缓冲的全部匹配，界面线程调用"""
+        pending = self.pending
+        return [pending.popleft() for _ in range(len(pending))]
 
     def _validate_pattern(self):
         try:
-            re.compile(self.pattern)
+            for pattern in self.patterns:
+                re.compile(pattern)
             return True
         except re.error as e:
             logging.error(f"正则表达式验证失败: {str(e)}")
             return False
 
-    def _safe_check(self):
+    def _safe_stop(self):
+        if self.job:
+            self.job.stop()
+
+class PrepareWarning(Exception):
+    """准备阶段发现的输入问题(如字典不存在)，以提示框告知而不是作为错误记录"""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+class PrepareThread(QThread):
+    """在后台完成任务启动前的准备工作(检查与读取文件、查询potfile与索引、创建任务)
+
+    work(report, should_stop) 在本线程中执行，report(已完成字节, 总字节, 说明) 上报进度；
+    被停止后不再发出任何信号，界面线程无需等待本线程结束。
+    """
+    progress_updated = pyqtSignal(object, object, str)
+    prepared = pyqtSignal(object)
+    warning_occurred = pyqtSignal(str, str)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, work):
+        super().__init__()
+        self.work = work
+        self.mutex = QMutex()
+        self._is_active = True
+
+    def run(self):
+        try:
+            result = self.work(self._report, self._should_stop)
+            if not self._should_stop():
+                self.prepared.emit(result)
+        except PrepareWarning as e:
+            if not self._should_stop():
+                self.warning_occurred.emit(e.title, e.message)
+        except Exception as e:
+            logging.error(f"准备任务失败: {str(e)}")
+            if not self._should_stop():
+                self.error_occurred.emit(f"准备任务失败: {str(e)}")
+
+    def _report(self, done, total, label):
+        if not self._should_stop():
+            self.progress_updated.emit(done, total, label)
+
+    def _should_stop(self):
         with QMutexLocker(self.mutex):
-            return self._is_active
+            return not self._is_active
+
+    def _safe_stop(self):
+        with QMutexLocker(self.mutex):
+            self._is_active = False
+
+class IndexBuildThread(QThread):
+    """在后台为字典构建MD5索引"""
+    progress_updated = pyqtSignal(int, str)
+    build_completed = pyqtSignal(str, int)
+    error_occurred = pyqtSignal(str)
 
-    def _update_progress(self, processed):
-        progress = min(100, int(processed / self.total_words * 100))
-        current_word = self.wordlist[min(processed - 1, self.total_words - 1)][:20]
-        self.progress_updated.emit(progress, current_word)
+    def __init__(self, file_path, index_path):
+        super().__init__()
+        self.file_path = file_path
+        self.index_path = index_path
+        self.mutex = QMutex()
+        self._is_active = True
+
+    def run(self):
+        try:
+            count = build_index(self.file_path, self.index_path, self._update_progress, self._should_stop)
+            self.build_completed.emit(self.index_path, count)
+        except IndexBuildCancelled:
+            pass
+        except Exception as e:
+            logging.error(f"索引构建失败: {str(e)}")
+            self.error_occurred.emit(f"索引构建失败: {str(e)}")
+
+    def _update_progress(self, processed, total):
+        progress = min(100, int(processed / total * 100)) if total else 100
+        self.progress_updated.emit(progress, "建立索引")
+
+    def _should_stop(self):
+        with QMutexLocker(self.mutex):
+            return not self._is_active
 
     def _safe_stop(self):
         with QMutexLocker(self.mutex):
             self._is_active = False
 
-    def _safe_cleanup(self):
-        self.executor.shutdown(wait=False)
-        if self.isRunning():
-            self.wait(1000)
+class RegexResultModel(QAbstractListModel):
+    """正则匹配结果的列表模型：视图只绘制可见的行，成批追加时每批只通知一次"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.words = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.words)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.words[index.row()]
+        return None
+
+    def append_batch(self, words):
+        if not words:
+            return
+        first = len(self.words)
+        self.beginInsertRows(QModelIndex(), first, first + len(words) - 1)
+        self.words.extend(words)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.words = []
+        self.endResetModel()
 
 class Function:
     def __init__(self, ui):
         self.ui = ui
         self.active_thread = None
         self.regex_thread = None
+        self.prepare_thread = None
+        # 已放弃但尚未结束的线程(准备、破解、正则与索引线程)
+        self.retired_threads = set()
+        self.index_threads = {}
+        self.potfile = None
+        self.hit_stats = None
+        # 当前破解任务使用的哈希算法，potfile只记录MD5结果
+        self.hash_type = DEFAULT_KERNEL
+        # 当前任务的字典(路径、路径列表或掩码模式下的None)，以及不计入命中统计的已知结果
+        self.scan_path = None
+        self.known_targets = set()
         self.last_progress = 0
+        self.target_total = 0
+        self.cracked_count = 0
         self.mutex = QMutex()
+        # 保护potfile与命中统计的延迟打开
+        self.store_mutex = QMutex()
+        # 最近一次运行的统计与剖析结果路径，运行结束后仍保留以便查看和导出
+        self.run_stats = None
+        self.profile_file = None
+        self.stats_ticks = 0
+        # 正则匹配结果：列表视图的模型，以及保存全部匹配的临时文件
+        self.regex_model = RegexResultModel()
+        self.regex_spool = None
 
     def init_progress_bar(self):
         self.ui.progress_bar.setRange(0, 100)
@@ -414,77 +485,451 @@ class Function:
 
     def start_cracking(self):
         try:
-            check_log_size()
             if self.active_thread:
                 self._cleanup_thread()
             if self.regex_thread:
                 self._cleanup_regex_thread()
+            self._cancel_preparation()
 
-            target_hash = self.ui.hash_input.toPlainText().strip()
-            if not self._validate_hash(target_hash):
-                QMessageBox.warning(self.ui, "输入错误", "MD5哈希格式无效")
+            target_hashes = self._collect_target_hashes()
+            if not target_hashes:
                 return
 
-            select_dict = self.ui.dict_combo.currentText()
-            file_path = self.ui.current_files.get(select_dict)
-            if not self._validate_wordlist(select_dict, file_path):
-                return
+            hash_type = self._selected_hash_type()
+            mode = self.ui.mode_combo.currentText()
+            if mode == MASK_MODE:
+                mask_text = self._collect_mask()
+                if mask_text is None:
+                    return
+                file_path = None
+                settings = dict(getattr(self.ui, 'settings', {}), mask=mask_text, hash_type=hash_type)
+            else:
+                if mode == ALL_DICTS_MODE:
+                    # 传入字典列表时引擎依次扫描全部字典并跳过重复单词，文件是否存在在准备线程中检查
+                    if not self.ui.current_files:
+                        QMessageBox.warning(self.ui, "选择错误", "请先添加字典文件")
+                        return
+                    file_path = dict(self.ui.current_files)
+                else:
+                    select_dict = self.ui.dict_combo.currentText()
+                    if not select_dict:
+                        QMessageBox.warning(self.ui, "选择错误", "请先选择字典文件")
+                        return
+                    file_path = self.ui.current_files.get(select_dict)
+
+                rules = self._collect_rules()
+                if rules is None:
+                    return
 
-            wordlist = self._load_wordlist(file_path)
-            if not wordlist:
-                return
+                settings = dict(getattr(self.ui, 'settings', {}), rules=rules, hash_type=hash_type)
 
-            self.active_thread = OptimizedCrackThread(target_hash, wordlist)
-            self._connect_thread_signals()
+            self.hash_type = hash_type
+            self.target_total = len(target_hashes)
+            self.cracked_count = 0
             self._reset_ui_state()
-            self._start_watchdog()
-            self.active_thread.start()
+            building = set(self.index_threads)
+            self._start_preparation(
+                lambda report, should_stop: self._prepare_crack(
+                    mode, target_hashes, file_path, settings, building, report, should_stop),
+                self._launch_crack)
 
         except Exception as e:
             logging.error(f"启动爆破失败: {str(e)}")
             self._handle_critical_error("启动失败", str(e))
 
+    def _start_preparation(self, work, on_prepared):
+        """在准备线程中执行 work，完成后在界面线程调用 on_prepared(结果)；期间可随时停止"""
+        self.prepare_thread = PrepareThread(work)
+        weak_self = weakref.ref(self)
+        connections = [
+            (self.prepare_thread.progress_updated, lambda d, t, l: weak_self()._update_prepare_progress(d, t, l)),
+            (self.prepare_thread.prepared, lambda result: weak_self()._handle_prepared(result, on_prepared)),
+            (self.prepare_thread.warning_occurred, lambda t, m: weak_self()._handle_prepare_warning(t, m)),
+            (self.prepare_thread.error_occurred, lambda m: weak_self()._handle_prepare_error(m))
+        ]
+        for signal, slot in connections:
+            signal.connect(slot, Qt.QueuedConnection)
+        self.prepare_thread.start()
+
+    def _handle_prepared(self, result, on_prepared):
+        self._release_prepare_thread()
+        try:
+            on_prepared(result)
+        except Exception as e:
+            logging.error(f"启动任务失败: {str(e)}")
+            self._handle_critical_error("启动失败", str(e))
+
+    def _handle_prepare_warning(self, title, message):
+        # 输入问题(如字典不存在)只提示，不记入错误日志
+        self._release_prepare_thread()
+        QMessageBox.warning(self.ui, title, message)
+        self._finalize_process("准备就绪", 0)
+
+    def _handle_prepare_error(self, message):
+        self._release_prepare_thread()
+        self._handle_error(message)
+
+    def _update_prepare_progress(self, done, total, label):
+        if self.prepare_thread is None:
+            return
+        progress = min(100, int(done / total * 100)) if total else 0
+        self.ui.progress_bar.setValue(progress)
+        self.ui.progress_bar.setFormat(
+            f"准备中: {label} {done / 1048576:,.1f}/{total / 1048576:,.1f} MB")
+
+    def _release_prepare_thread(self):
+        thread, self.prepare_thread = self.prepare_thread, None
+        if thread is not None:
+            self._retire_thread(thread)
+
+    def _cancel_preparation(self):
+        """放弃正在进行的准备工作：断开信号后不等待线程结束，避免在慢速文件系统上卡住界面"""
+        thread, self.prepare_thread = self.prepare_thread, None
+        if thread is None:
+            return
+        self._disconnect_signals(
+            thread.progress_updated, thread.prepared, thread.warning_occurred, thread.error_occurred)
+        self._retire_thread(thread)
+
+    @staticmethod
+    def _disconnect_signals(*signals):
+        for signal in signals:
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass
+
+    def _retire_thread(self, thread):
+        """请求线程停止，不在界面线程中等待：线程结束前必须保持引用，结束后由Qt回收"""
+        self.retired_threads.add(thread)
+        thread.finished.connect(lambda: self.retired_threads.discard(thread))
+        thread.finished.connect(thread.deleteLater)
+        thread._safe_stop()
+        # 连接信号前已经结束的线程不会再发出 finished
+        if not thread.isRunning():
+            self.retired_threads.discard(thread)
+            thread.deleteLater()
+
+    def _prepare_crack(self, mode, target_hashes, file_path, settings, building, report, should_stop):
+        """准备线程中执行：检查字典、查询potfile与索引、读取检查点并创建任务
+
+        不访问任何界面控件，结果交给 _launch_crack 在界面线程中处理。
+        """
+        result = {'file_path': file_path, 'missing': [], 'cached': {}, 'index_hits': None,
+                  'stale_index': None, 'job': None}
+        if mode == ALL_DICTS_MODE:
+            names = file_path
+            file_path = [path for path in names.values() if os.path.isfile(path)]
+            result['missing'] = [name for name, path in names.items() if not os.path.isfile(path)]
+            if not file_path:
+                raise PrepareWarning("选择错误", "字典文件均不存在")
+            result['file_path'] = file_path
+        elif mode != MASK_MODE and not (file_path and os.path.isfile(file_path)):
+            raise PrepareWarning("路径错误", f"文件不存在: {file_path}")
+        paths = [] if file_path is None else [file_path] if isinstance(file_path, str) else file_path
+        sizes = [os.path.getsize(path) for path in paths]
+        # potfile在第一次使用时整个读入内存，计入准备进度
+        potfile_path = self._potfile_path()
+        potfile_size = os.path.getsize(potfile_path) if self.potfile is None and os.path.isfile(potfile_path) and \
+            settings.get('potfile', True) and self.hash_type == DEFAULT_KERNEL else 0
+        total = sum(sizes) + potfile_size
+        report(0, total, "读取potfile")
+        # 先查potfile，全部命中时无需创建任务
+        cached = result['cached'] = self._lookup_potfile(target_hashes)
+        report(potfile_size, total, "检查字典")
+        if len(cached) == len(target_hashes) or should_stop():
+            return result
+        # 索引只包含字典原词的MD5，使用规则或其他算法时走全量扫描
+        if isinstance(file_path, str) and not settings.get('rules') and self.hash_type == DEFAULT_KERNEL and \
+                settings.get('use_index', True):
+            index_path = self._index_path(file_path)
+            status = index_status(file_path, index_path)
+            if status == 'stale':
+                result['stale_index'] = index_path
+            elif status == 'valid' and file_path not in building:
+                with DictionaryIndex(file_path, index_path) as index:
+                    result['index_hits'] = {target: cached.get(target) or index.lookup(target)
+                                            for target in target_hashes}
+                report(total, total, "查询索引")
+                return result
+        settings['cracked'] = cached
+        if settings.get('checkpoint', True):
+            settings['checkpoint_dir'] = self._checkpoint_dir()
+        self._apply_hit_stats(settings, mode)
+        report(total, total, "创建任务")
+        result['job'] = create_crack_job(file_path, target_hashes, settings)
+        return result
+
+    def _launch_crack(self, result):
+        """准备完成后在界面线程中启动破解线程，或直接给出potfile与索引的结果"""
+        if result['missing']:
+            self.ui.result_display.append(
+                f'<div style="color:#FF5722;">⚠️ 跳过不存在的字典: {html.escape(", ".join(result["missing"]))}</div>')
+        self.scan_path = result['file_path']
+        cached = result['cached']
+        self.known_targets = set(cached)
+        if result['stale_index']:
+            # 索引过期时后台重建，本次回退到全量扫描
+            self._start_index_build(self.scan_path, result['stale_index'], show_progress=False)
+        job = result['job']
+        if job is None:
+            hits = result['index_hits'] if result['index_hits'] is not None else cached
+            for target, word in hits.items():
+                if word is not None:
+                    self._store_hit(target, word, self.hash_type, self.known_targets, self.scan_path)
+                    self._handle_match_found(target, word)
+            if result['index_hits'] is not None:
+                self._save_hit_stats()
+            self._handle_complete()
+            return
+        # 检查点中恢复的结果在上次运行时已计入统计
+        self.known_targets.update(job.found)
+        self.active_thread = OptimizedCrackThread(job=job, profile=self._profile_path(), **self._hit_callbacks(job))
+        self._track_stats(self.active_thread)
+        self._connect_thread_signals()
+        self._show_resume_notice(job)
+        self._start_watchdog()
+        self._start_progress_timer()
+        self.active_thread.start()
+
+    def _index_path(self, file_path):
+        index_dir = os.path.join(os.path.dirname(os.path.abspath(self.ui.config_file)), "md5_index")
+        return index_path_for(file_path, index_dir)
+
+    def _checkpoint_dir(self):
+        return os.path.join(os.path.dirname(os.path.abspath(self.ui.config_file)), "md5_checkpoints")
+
+    def _show_resume_notice(self, job):
+        if not getattr(job, 'resumed', False):
+            return
+        progress = int(job.processed_bytes / job.total_bytes * 100) if job.total_bytes else 0
+        self.ui.result_display.append(
+            f'<div style="color:#00BFA5;">⏩ 从上次中断处继续 (已完成 {progress}%)</div>')
+
+    def _profile_path(self):
+        """settings.profile 开启时返回本次运行剖析结果的保存路径(日志文件所在目录)"""
+        if not getattr(self.ui, 'settings', {}).get('profile'):
+            return None
+        return profile_path(os.path.dirname(os.path.abspath(LOG_FILE)))
+
+    def _track_stats(self, thread):
+        self.run_stats = thread.stats
+        self.profile_file = thread.profile
+        self.stats_ticks = 0
+        self.ui.stats_output.clear()
+
+    def _refresh_stats(self):
+        if self.run_stats is not None:
+            self.ui.stats_output.setPlainText(format_stats(self.run_stats.snapshot()))
+
+    def _show_profile_notice(self):
+        """线程结束后剖析结果才写入文件，此时提示保存位置"""
+        path, self.profile_file = self.profile_file, None
+        if path and os.path.exists(path):
+            self.ui.result_display.append(
+                f'<div style="color:#00BFA5;">性能剖析已保存: {html.escape(path)}</div>')
+
+    def _potfile_path(self):
+        return os.path.join(os.path.dirname(os.path.abspath(self.ui.config_file)), "md5_cracker.pot")
+
+    def _get_potfile(self):
+        """按需打开配置目录下的potfile，settings.potfile 为false时禁用
+
+        准备线程和界面线程都可能第一次打开，加锁保证只打开一次。
+        """
+        if not getattr(self.ui, 'settings', {}).get('potfile', True):
+            return None
+        with QMutexLocker(self.store_mutex):
+            if self.potfile is None:
+                self.potfile = Potfile(self._potfile_path(), getattr(self.ui, 'settings', {}).get(
+                    'potfile_max_entries', DEFAULT_MAX_ENTRIES))
+        return self.potfile
+
+    def _get_hit_stats(self):
+        """按需打开配置目录下的命中统计，settings.hit_stats 为false时禁用"""
+        if not getattr(self.ui, 'settings', {}).get('hit_stats', True):
+            return None
+        with QMutexLocker(self.store_mutex):
+            if self.hit_stats is None:
+                path = os.path.join(os.path.dirname(os.path.abspath(self.ui.config_file)), "md5_hit_stats.json")
+                self.hit_stats = HitStats(path)
+        return self.hit_stats
+
+    def _apply_hit_stats(self, settings, mode):
+        """字典模式下先算历史高频命中口令，全部字典模式下命中率高的字典先扫"""
+        if mode == MASK_MODE:
+            return
+        try:
+            stats = self._get_hit_stats()
+            if stats is None:
+                return
+            settings['priority'] = stats.priority_words(settings.get('priority_words', DEFAULT_PRIORITY_WORDS))
+            if settings.get('order_dictionaries', True):
+                settings['dictionary_rates'] = stats.hit_rates()
+        except Exception as e:
+            logging.error(f"读取命中统计失败: {str(e)}")
+
+    def _hit_callbacks(self, job):
+        """破解线程中保存结果的回调，使用启动时的任务状态，新任务开始后旧线程才结束也不会记错"""
+        hash_type, known_targets, scan_path = self.hash_type, set(self.known_targets), self.scan_path
+
+        def on_hit(target_hash, result):
+            # 全部字典模式下取正在扫描的字典
+            current = getattr(job, 'current', None)
+            self._store_hit(target_hash, result, hash_type, known_targets,
+                            current['path'] if current else scan_path)
+
+        return {'on_hit': on_hit, 'on_finish': lambda job: self._save_hit_stats(job, scan_path)}
+
+    def _store_hit(self, target_hash, result, hash_type, known_targets, source):
+        """写入potfile并计入命中统计，potfile只记录MD5结果，已知结果不重复计数；可在破解线程中调用"""
+        try:
+            potfile = self._get_potfile() if hash_type == DEFAULT_KERNEL else None
+            if potfile is not None:
+                potfile.add(target_hash, result)
+        except Exception as e:
+            logging.error(f"写入potfile失败: {str(e)}")
+        if target_hash in known_targets:
+            return
+        try:
+            stats = self._get_hit_stats()
+            if stats is not None:
+                stats.record(result, source if isinstance(source, str) else None)
+        except Exception as e:
+            logging.error(f"记录命中统计失败: {str(e)}")
+
+    def _save_hit_stats(self, job=None, scan_path=None):
+        """任务结束时计入已扫描的字节数并写盘"""
+        try:
+            stats = self._get_hit_stats()
+            if stats is None:
+                return
+            if job is not None:
+                record_scans(stats, job, scan_path)
+            stats.save()
+        except Exception as e:
+            logging.error(f"保存命中统计失败: {str(e)}")
+
+    def _lookup_potfile(self, target_hashes):
+        if self.hash_type != DEFAULT_KERNEL:
+            return {}
+        try:
+            potfile = self._get_potfile()
+            return potfile.lookup_many(target_hashes) if potfile is not None else {}
+        except Exception as e:
+            logging.error(f"读取potfile失败: {str(e)}")
+            return {}
+
+    def build_index(self):
+        """为当前选中的字典构建索引"""
+        select_dict = self.ui.dict_combo.currentText()
+        file_path = self.ui.current_files.get(select_dict)
+        if not self._validate_wordlist(select_dict, file_path):
+            return
+        if file_path in self.index_threads:
+            QMessageBox.information(self.ui, "提示", "该字典的索引正在构建中")
+            return
+        self._start_index_build(file_path, self._index_path(file_path), show_progress=True)
+
+    def _start_index_build(self, file_path, index_path, show_progress):
+        if file_path in self.index_threads:
+            return
+        thread = IndexBuildThread(file_path, index_path)
+        weak_self = weakref.ref(self)
+        if show_progress:
+            thread.progress_updated.connect(
+                lambda p, w: weak_self()._update_index_progress(p, w), Qt.QueuedConnection)
+        thread.build_completed.connect(
+            lambda path, count: weak_self()._handle_index_built(file_path, count, show_progress), Qt.QueuedConnection)
+        thread.error_occurred.connect(
+            lambda m: weak_self()._handle_index_error(file_path, m), Qt.QueuedConnection)
+        self.index_threads[file_path] = thread
+        thread.start()
+
+    def _update_index_progress(self, progress, label):
+        if self.active_thread or self.regex_thread:
+            return
+        self.ui.progress_bar.setValue(progress)
+        self.ui.progress_bar.setFormat(f"{label}: {progress}%")
+
+    def _release_index_thread(self, file_path):
+        thread = self.index_threads.pop(file_path, None)
+        if thread:
+            self._retire_thread(thread)
+
+    def _handle_index_built(self, file_path, count, show_progress):
+        self._release_index_thread(file_path)
+        logging.info(f"索引构建完成: {file_path} ({count} 条)")
+        if show_progress and not (self.active_thread or self.regex_thread):
+            self.ui.progress_bar.setValue(100)
+            self.ui.progress_bar.setFormat(f"索引完成: {count} 条")
+
+    def _handle_index_error(self, file_path, message):
+        self._release_index_thread(file_path)
+        QMessageBox.critical(self.ui, "索引错误", message)
+
     def test_regex(self):
         try:
-            check_log_size()
             if self.active_thread:
                 self._cleanup_thread()
             if self.regex_thread:
                 self._cleanup_regex_thread()
+            self._cancel_preparation()
 
-            pattern = self.ui.regex_input.toPlainText().strip()
-            if not pattern:
+            # 每行一个正则，一遍扫描同时匹配
+            patterns = [line.strip() for line in self.ui.regex_input.toPlainText().splitlines() if line.strip()]
+            if not patterns:
                 QMessageBox.warning(self.ui, "输入错误", "请输入正则表达式")
                 return
 
-            if not self._validate_regex_pattern(pattern):
+            if not all(self._validate_regex_pattern(pattern) for pattern in patterns):
                 return
 
             select_dict = self.ui.dict_combo.currentText()
-            file_path = self.ui.current_files.get(select_dict)
-            if not self._validate_wordlist(select_dict, file_path):
-                return
-
-            wordlist = self._load_wordlist(file_path)
-            if not wordlist:
+            if not select_dict:
+                QMessageBox.warning(self.ui, "选择错误", "请先选择字典文件")
                 return
+            file_path = self.ui.current_files.get(select_dict)
 
-            self.regex_thread = RegexCrackThread(pattern, wordlist)
-            self._connect_regex_thread_signals()
+            settings = dict(getattr(self.ui, 'settings', {}), hash_type=self._selected_hash_type())
             self._reset_ui_state()
-            self._start_watchdog()
-            self.regex_thread.start()
+            self._start_preparation(
+                lambda report, should_stop: self._prepare_regex(patterns, file_path, settings, report),
+                self._launch_regex)
 
         except Exception as e:
             logging.error(f"正则测试失败: {str(e)}")
             QMessageBox.critical(self.ui, "运行错误", f"正则测试失败: {str(e)}")
 
+    def _prepare_regex(self, patterns, file_path, settings, report):
+        """准备线程中执行：检查字典并创建正则任务"""
+        if not (file_path and os.path.isfile(file_path)):
+            raise PrepareWarning("路径错误", f"文件不存在: {file_path}")
+        total = os.path.getsize(file_path)
+        report(0, total, "检查字典")
+        job = RegexJob(file_path, patterns, settings)
+        report(total, total, "创建任务")
+        return job
+
+    def _launch_regex(self, job):
+        self._discard_regex_spool()
+        fd, self.regex_spool = tempfile.mkstemp(prefix='md5_regex_', suffix='.txt')
+        os.close(fd)
+        max_results = getattr(self.ui, 'settings', {}).get('regex_max_results', REGEX_MAX_RESULTS)
+        self.regex_thread = RegexCrackThread(job=job, profile=self._profile_path(), spool_path=self.regex_spool,
+                                             max_results=max_results)
+        self._track_stats(self.regex_thread)
+        self._connect_regex_thread_signals()
+        self._start_watchdog()
+        self._start_progress_timer()
+        self.regex_thread.start()
+
     def _validate_regex_pattern(self, pattern):
         try:
             re.compile(pattern)
             return True
         except re.error as e:
-            self.ui.regex_output.setPlainText(f"正则表达式错误:\n位置: {e.pos}\n原因: {e.msg}")
+            self.ui.regex_status.setText(f"正则表达式错误: {pattern} 位置 {e.pos}，{e.msg}")
             logging.error(f"正则表达式无效: {str(e)}")
             return False
 
@@ -493,17 +938,91 @@ class Function:
             self.last_progress = 0
             self.ui.progress_bar.reset()
             self.ui.result_display.clear()
-            self.ui.regex_output.clear()
+            self.regex_model.clear()
+            self.ui.regex_status.clear()
             self.ui.progress_bar.setFormat("启动中...")
             self.ui.start_btn.setEnabled(False)
             self.ui.stop_btn.setEnabled(True)
 
-    def _validate_hash(self, hash_str):
-        if not re.match(r'^[a-fA-F0-9]{32}$', hash_str):
+    def _selected_hash_type(self):
+        return self.ui.hash_type_combo.currentData() or DEFAULT_KERNEL
+
+    def _collect_target_hashes(self):
+        """解析哈希输入框中的全部目标哈希，存在无效行时提示并返回None"""
+        kernel = get_kernel(self._selected_hash_type())
+        hashes, invalid = parse_hash_list(self.ui.hash_input.toPlainText(), kernel.salted)
+        if invalid or not hashes:
             self.ui.hash_input.setStyleSheet("border: 2px solid #ff0000;")
-            return False
+            detail = f"\n无法识别: {invalid[0][:40]}" if invalid else ""
+            expected = " (每行 hash:salt)" if kernel.salted else ""
+            QMessageBox.warning(self.ui, "输入错误", f"{kernel.label}哈希格式无效{expected}{detail}")
+            return None
         self.ui.hash_input.setStyleSheet("")
-        return True
+        return hashes
+
+    def _collect_rules(self):
+        """读取并校验变形规则，语法错误时提示并返回None"""
+        lines = rule_lines(self.ui.rules_input.toPlainText())
+        try:
+            compile_rules(lines)
+        except RuleError as e:
+            self.ui.rules_input.setStyleSheet("border: 2px solid #ff0000;")
+            QMessageBox.warning(self.ui, "规则错误", str(e))
+            return None
+        self.ui.rules_input.setStyleSheet("")
+        return lines
+
+    def _collect_mask(self):
+        """读取并校验掩码，错误时提示并返回None"""
+        mask_text = self.ui.mask_input.text().strip()
+        try:
+            Mask(mask_text, getattr(self.ui, 'settings', {}).get('charsets'))
+        except MaskError as e:
+            self.ui.mask_input.setStyleSheet("border: 2px solid #ff0000;")
+            QMessageBox.warning(self.ui, "掩码错误", str(e))
+            return None
+        self.ui.mask_input.setStyleSheet("")
+        return mask_text
+
+    def import_rule_file(self):
+        """从hashcat规则文件导入变形规则"""
+        try:
+            path, _ = QFileDialog.getOpenFileName(
+                self.ui, "导入规则文件", "", "规则文件 (*.rule *.txt);;所有文件 (*)")
+            if not path:
+                return
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                lines = rule_lines(f.read())
+            compile_rules(lines)
+            self.ui.rules_input.setPlainText('\n'.join(lines))
+            self.ui.rules_input.setStyleSheet("")
+        except RuleError as e:
+            QMessageBox.warning(self.ui, "导入失败", f"规则文件无效: {str(e)}")
+        except Exception as e:
+            logging.error(f"导入规则文件失败: {str(e)}")
+            QMessageBox.critical(self.ui, "导入失败", f"导入规则文件失败: {str(e)}")
+
+    def import_hash_file(self):
+        """从文件导入待破解的哈希列表"""
+        try:
+            path, _ = QFileDialog.getOpenFileName(
+                self.ui, "导入哈希文件", "", "文本文件 (*.txt);;所有文件 (*)")
+            if not path:
+                return
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                hashes, invalid = parse_hash_list(f.read(), get_kernel(self._selected_hash_type()).salted)
+            if not hashes:
+                QMessageBox.warning(self.ui, "导入失败", "文件中没有找到有效的哈希")
+                return
+            self.ui.hash_input.setPlainText('\n'.join(hashes))
+            self.ui.hash_input.setStyleSheet("")
+            message = f"已导入 {len(hashes)} 个哈希"
+            if invalid:
+                message += f"，忽略 {len(invalid)} 行无法识别的内容"
+            QMessageBox.information(self.ui, "导入成功", message)
+        except Exception as e:
+            logging.error(f"导入哈希文件失败: {str(e)}")
+            QMessageBox.critical(self.ui, "导入失败", f"导入哈希文件失败: {str(e)}")
 
     def _validate_wordlist(self, select_dict, file_path):
         if not select_dict:
@@ -514,23 +1033,12 @@ class Function:
             return False
         return True
 
-    def _load_wordlist(self, file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return [line.strip() for line in f if line.strip()]
-        except Exception as e:
-            logging.error(f"字典读取失败: {str(e)}")
-            self._handle_error(f"字典读取失败: {str(e)}")
-            return None
-
     def _connect_thread_signals(self):
         weak_self = weakref.ref(self)
         connections = [
-            (self.active_thread.progress_updated, lambda p, w: weak_self()._update_progress_safe(p, w)),
-            (self.active_thread.result_found, lambda r: weak_self()._handle_match_found(r)),
+            (self.active_thread.result_found, lambda h, r: weak_self()._handle_match_found(h, r)),
             (self.active_thread.crack_completed, lambda: weak_self()._handle_complete()),
-            (self.active_thread.error_occurred, lambda m: weak_self()._handle_error(m)),
-            (self.active_thread.time_updated, lambda t: weak_self()._update_time_remaining(t))
+            (self.active_thread.error_occurred, lambda m: weak_self()._handle_error(m))
         ]
         for signal, slot in connections:
             signal.connect(slot, Qt.QueuedConnection)
@@ -538,26 +1046,69 @@ class Function:
     def _connect_regex_thread_signals(self):
         weak_self = weakref.ref(self)
         connections = [
-            (self.regex_thread.progress_updated, lambda p, w: weak_self()._update_progress_safe(p, w)),
-            (self.regex_thread.result_found, lambda r: weak_self()._handle_regex_match_found(r)),
             (self.regex_thread.crack_completed, lambda: weak_self()._handle_regex_complete()),
             (self.regex_thread.error_occurred, lambda m: weak_self()._handle_error(m))
         ]
         for signal, slot in connections:
             signal.connect(slot, Qt.QueuedConnection)
 
-    def _update_progress_safe(self, progress, current_word):
+    def _start_progress_timer(self):
+        """以固定频率轮询任务计数器刷新进度，工作线程不再逐批发信号"""
+        self._stop_progress_timer()
+        thread = self.active_thread or self.regex_thread
+        checkpoint = getattr(getattr(thread, 'job', None), 'checkpoint', None)
+        # 从检查点恢复时沿用上次的速度，剩余时间一开始就接近真实值
+        self.throughput = ThroughputMeter(rate=checkpoint.meter.rate if checkpoint else None)
+        self.progress_timer = QTimer()
+        self.progress_timer.timeout.connect(self._poll_progress)
+        self.progress_timer.start(PROGRESS_INTERVAL_MS)
+
+    def _stop_progress_timer(self):
+        if getattr(self, 'progress_timer', None):
+            self.progress_timer.stop()
+            self.progress_timer = None
+
+    def _poll_progress(self):
+        thread = self.active_thread or self.regex_thread
+        job = getattr(thread, 'job', None)
+        if job is None:
+            return
+        if thread is self.regex_thread:
+            self._drain_regex_results()
+        self.stats_ticks += 1
+        if self.stats_ticks % STATS_REFRESH_TICKS == 0:
+            self._refresh_stats()
+        processed_bytes, total_bytes, processed_words, current_word = progress_snapshot(job)
+        progress = min(100, int(processed_bytes / total_bytes * 100)) if total_bytes else 100
+        label = ""
+        current, sub_job = getattr(job, 'current', None), getattr(job, 'job', None)
+        if current is not None:
+            # 全部字典模式下显示当前字典及其自身进度
+            done = int(sub_job.processed_bytes / current['total_bytes'] * 100) \
+                if sub_job is not None and current['total_bytes'] else 0
+            label = f" [{job.index + 1}/{len(job.dictionaries)} {current['name'][:16]} {done}%]"
+        self._update_progress_safe(progress, current_word, label)
+        self.throughput.update(processed_bytes)
+        eta = self.throughput.eta(total_bytes - processed_bytes)
+        if eta is not None:
+            time_str = str(timedelta(seconds=int(eta)))
+            if getattr(job, 'mask', None) is not None:
+                time_str += f"  候选空间: {job.keyspace():,}"
+            elif getattr(job, 'rule_count', 1) > 1:
+                time_str += f"  候选空间≈{job.keyspace():,}"
+            if getattr(job, 'dedup', None) is not None and processed_words:
+                time_str += f"  去重跳过 {job.skipped_words / processed_words:.1%}"
+            self._update_time_remaining(f"预计剩余时间: {time_str}")
+
+    def _update_progress_safe(self, progress, current_word, label=""):
         try:
             if not self.ui:
                 return
-            with QMutexLocker(self.mutex):
-                progress = max(self.last_progress, min(progress, 100))
-                if progress - self.last_progress < 1 and progress < 99:
-                    return
-                self.ui.progress_bar.setValue(progress)
-                self.ui.progress_bar.setFormat(f"处理中: {current_word[:20]}" if progress < 100 else "最终校验")
-                self.ui.progress_label.setText(f"{progress}%")
-                self.last_progress = progress
+            progress = max(self.last_progress, min(progress, 100))
+            self.ui.progress_bar.setValue(progress)
+            self.ui.progress_bar.setFormat(f"处理中{label}: {current_word[:20]}" if progress < 100 else "最终校验")
+            self.ui.progress_label.setText(f"{progress}%")
+            self.last_progress = progress
         except RuntimeError as e:
             if "wrapped C/C++ object" not in str(e):
                 logging.error(f"更新进度错误: {str(e)}")
@@ -565,30 +1116,106 @@ class Function:
     def _update_time_remaining(self, time_str):
         self.ui.time_remaining.setText(time_str)
 
-    def _handle_match_found(self, result):
-        self.ui.result_display.setHtml(f'<div style="color:#4CAF50; font-weight:600;">✅ 成功匹配: <code>{html.escape(result)}</code></div>')
-        self._finalize_process("破解成功", 100)
+    def _handle_match_found(self, target_hash, result):
+        """显示一条结果，potfile与命中统计已由 _store_hit 写入"""
+        self.cracked_count += 1
+        self.ui.result_display.append(
+            f'<div style="color:#4CAF50; font-weight:600;">✅ 成功匹配: '
+            f'<code>{html.escape(target_hash)}</code> → <code>{html.escape(result)}</code></div>')
 
     def _handle_complete(self):
-        if not self.ui.result_display.toPlainText():
+        if not self.cracked_count:
             self.ui.result_display.setHtml('<div style="color:#FF5722;">⚠️ 未找到匹配结果</div>')
-        self._finalize_process("扫描完成", 100)
-
-    def _handle_regex_match_found(self, result):
-        current_text = self.ui.regex_output.toPlainText()
-        self.ui.regex_output.setPlainText(current_text + '\n' + result if current_text else result)
+            self._show_dictionary_summary()
+            self._finalize_process("扫描完成", 100)
+            return
+        self._show_dictionary_summary()
+        if self.target_total > 1:
+            self.ui.result_display.append(
+                f'<div style="color:#00BFA5;">已破解 {self.cracked_count}/{self.target_total}</div>')
+        status = "破解成功" if self.cracked_count == self.target_total else "扫描完成"
+        self._finalize_process(status, 100)
+
+    def _show_dictionary_summary(self):
+        """全部字典模式结束后列出各字典的扫描量以及去重省下的工作量"""
+        job = getattr(self.active_thread, 'job', None)
+        if not hasattr(job, 'dictionary_progress'):
+            return
+        lines = []
+        for name, processed, total, words, skipped in job.dictionary_progress():
+            percent = int(processed / total * 100) if total else 100
+            detail = f"，跳过重复 {skipped:,}" if job.dedup is not None else ""
+            lines.append(f"{html.escape(name)}: {percent}% {words:,} 个单词{detail}")
+        if job.dedup is not None and job.processed_words:
+            lines.append(f"去重共跳过 {job.skipped_words:,} 个单词 "
+                         f"({job.skipped_words / job.processed_words:.1%})，"
+                         f"省去约 {job.skipped_words * job.rule_count:,} 次哈希计算")
+        self.ui.result_display.append(
+            '<div style="color:#00BFA5;">' + '<br>'.join(lines) + '</div>')
+
+    def _drain_regex_results(self):
+        """把正则线程缓冲的匹配成批加入列表，并刷新匹配计数"""
+        thread = self.regex_thread
+        if thread is None or thread.job is None:
+            return
+        self.regex_model.append_batch(thread.take_results())
+        count = thread.job.match_count
+        status = f"匹配 {count:,} 个"
+        if count > len(self.regex_model.words):
+            status += f"，列表显示前 {len(self.regex_model.words):,} 个，导出可得全部"
+        self.ui.regex_status.setText(status)
 
     def _handle_regex_complete(self):
-        if not self.ui.regex_output.toPlainText():
-            self.ui.regex_output.setPlainText("未找到匹配的密码")
+        self._drain_regex_results()
         self._finalize_process("正则匹配完成", 100)
 
+    def _discard_regex_spool(self):
+        path, self.regex_spool = self.regex_spool, None
+        if not path:
+            return
+        # 已放弃的正则线程可能仍在写这个文件，等它结束后再删除
+        writer = next((thread for thread in self.retired_threads
+                       if getattr(thread, 'spool_path', None) == path and thread.isRunning()), None)
+        if writer is not None:
+            writer.finished.connect(lambda: self._remove_spool(path))
+        else:
+            self._remove_spool(path)
+
+    @staticmethod
+    def _remove_spool(path):
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.error(f"删除正则匹配临时文件失败: {str(e)}")
+
+    def export_regex_results(self):
+        """把最近一次正则匹配的全部结果逐块复制到用户选择的文件"""
+        try:
+            if self.regex_thread is not None:
+                QMessageBox.information(self.ui, "提示", "正则匹配进行中，请结束后再导出")
+                return
+            if not (self.regex_spool and os.path.exists(self.regex_spool)):
+                QMessageBox.information(self.ui, "提示", "尚无正则匹配结果")
+                return
+            path, _ = QFileDialog.getSaveFileName(
+                self.ui, "导出匹配结果", "regex_matches.txt", "文本文件 (*.txt);;所有文件 (*)")
+            if not path:
+                return
+            with open(self.regex_spool, 'rb') as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            QMessageBox.information(self.ui, "导出成功", f"匹配结果已导出到 {path}")
+        except Exception as e:
+            logging.error(f"导出匹配结果失败: {str(e)}")
+            QMessageBox.critical(self.ui, "导出失败", f"导出匹配结果失败: {str(e)}")
+
     def _handle_error(self, message):
         logging.error(message)
         QMessageBox.critical(self.ui, "运行错误", message)
         self._finalize_process("错误终止", 0)
 
     def _finalize_process(self, status, progress):
+        self._stop_progress_timer()
         try:
             if self.ui:
                 self.ui.progress_bar.setValue(progress)
@@ -598,28 +1225,19 @@ class Function:
         finally:
             self._cleanup_thread()
             self._cleanup_regex_thread()
+            self._refresh_stats()
+            self._show_profile_notice()
 
     def _cleanup_thread(self):
+        """断开破解线程的信号并放弃它，命中统计由线程自己在结束前保存"""
         if self.active_thread:
             try:
-                signals = [
-                    self.active_thread.progress_updated,
+                self._disconnect_signals(
                     self.active_thread.result_found,
                     self.active_thread.crack_completed,
-                    self.active_thread.error_occurred,
-                    self.active_thread.time_updated
-                ]
-                for signal in signals:
-                    try:
-                        signal.disconnect()
-                    except TypeError:
-                        pass
-                if self.active_thread.isRunning():
-                    self.active_thread._safe_stop()
-                    self.active_thread.wait(2000)
-                    if self.active_thread.isRunning():
-                        self.active_thread.terminate()
-                self.active_thread.deleteLater()
+                    self.active_thread.error_occurred
+                )
+                self._retire_thread(self.active_thread)
             except RuntimeError as e:
                 if "wrapped C/C++ object" not in str(e):
                     logging.error(f"清理线程错误: {str(e)}")
@@ -629,23 +1247,11 @@ class Function:
     def _cleanup_regex_thread(self):
         if self.regex_thread:
             try:
-                signals = [
-                    self.regex_thread.progress_updated,
-                    self.regex_thread.result_found,
+                self._disconnect_signals(
                     self.regex_thread.crack_completed,
                     self.regex_thread.error_occurred
-                ]
-                for signal in signals:
-                    try:
-                        signal.disconnect()
-                    except TypeError:
-                        pass
-                if self.regex_thread.isRunning():
-                    self.regex_thread._safe_stop()
-                    self.regex_thread.wait(2000)
-                    if self.regex_thread.isRunning():
-                        self.regex_thread.terminate()
-                self.regex_thread.deleteLater()
+                )
+                self._retire_thread(self.regex_thread)
             except RuntimeError as e:
                 if "wrapped C/C++ object" not in str(e):
                     logging.error(f"清理正则线程错误: {str(e)}")
@@ -653,15 +1259,25 @@ class Function:
                 self.regex_thread = None
 
     def stop_crack(self):
-        if self.active_thread or self.regex_thread:
+        if self.active_thread or self.regex_thread or self.prepare_thread:
+            self._stop_progress_timer()
             self.ui.progress_bar.setFormat("正在停止...")
             QApplication.processEvents()
+            self._cancel_preparation()
             self._cleanup_thread()
             self._cleanup_regex_thread()
+            self._refresh_stats()
             self.ui.progress_bar.setValue(0)
             self.ui.progress_bar.setFormat("操作已中止")
-            self.ui.result_display.setHtml('<div style="color:#FF5722;">⚠️ 已停止操作</div>')
-            self.ui.regex_output.clear()
+            stopped_html = '<div style="color:#FF5722;">⚠️ 已停止操作</div>'
+            if self.cracked_count:
+                self.ui.result_display.append(stopped_html)
+            else:
+                self.ui.result_display.setHtml(stopped_html)
+            self._show_profile_notice()
+            self.regex_model.clear()
+            self.ui.regex_status.clear()
+            self._discard_regex_spool()
             self.ui.progress_label.setText("0%")
             self.ui.time_remaining.setText("预计剩余时间: --:--:--")
             self.ui.start_btn.setEnabled(True)
@@ -682,6 +1298,7 @@ class Function:
     def _handle_critical_error(self, title, message):
         logging.critical(f"{title}: {message}")
         QMessageBox.critical(self.ui, title, message)
+        self._stop_progress_timer()
         self._cleanup_thread()
         self._cleanup_regex_thread()
         if self.ui:
@@ -690,26 +1307,90 @@ class Function:
 
     def generate_md5(self):
         try:
-            check_log_size()
             input_str = self.ui.md5_input.toPlainText().strip()
             if not input_str:
                 QMessageBox.warning(self.ui, "输入错误", "请输入要加密的内容")
                 return
+            kernel = get_kernel(self._selected_hash_type())
+            salt = ''
+            if kernel.salted:
+                # 加盐算法的输入写作 明文:盐，按最后一个冒号拆分
+                input_str, sep, salt = input_str.rpartition(':')
+                if not sep:
+                    QMessageBox.warning(self.ui, "输入错误", f"{kernel.label} 请按 明文:盐 的格式输入")
+                    return
             try:
                 encoded_str = input_str.encode('utf-8')
             except UnicodeEncodeError as e:
                 logging.error(f"编码错误: {str(e)}")
                 QMessageBox.critical(self.ui, "编码错误", f"不支持的字符: {str(e)}")
                 return
-            md5_hash = hashlib.md5(encoded_str).hexdigest()
-            self.ui.md5_output.setPlainText(md5_hash)
+            digest = kernel.hexdigests([encoded_str], salt.encode('utf-8', 'surrogateescape'))[0]
+            self.ui.md5_output.setPlainText(f"{digest}:{salt}" if kernel.salted else digest)
         except Exception as e:
             logging.error(f"MD5生成失败: {str(e)}")
             QMessageBox.critical(self.ui, "生成错误", f"MD5生成失败: {str(e)}")
 
+    def import_potfile(self):
+        """把 hash:plain 文本导入potfile"""
+        try:
+            potfile = self._get_potfile()
+            if potfile is None:
+                QMessageBox.information(self.ui, "提示", "potfile已在配置中禁用")
+                return
+            path, _ = QFileDialog.getOpenFileName(
+                self.ui, "导入破解记录", "", "potfile (*.pot *.potfile *.txt);;所有文件 (*)")
+            if not path:
+                return
+            with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                added, invalid = potfile.import_lines(f)
+            message = f"新增 {added} 条记录，共 {len(potfile)} 条"
+            if invalid:
+                message += f"，忽略 {invalid} 行无法识别的内容"
+            QMessageBox.information(self.ui, "导入成功", message)
+        except Exception as e:
+            logging.error(f"导入potfile失败: {str(e)}")
+            QMessageBox.critical(self.ui, "导入失败", f"导入破解记录失败: {str(e)}")
+
+    def export_potfile(self):
+        """把potfile导出为 hash:plain 文本"""
+        try:
+            potfile = self._get_potfile()
+            if potfile is None:
+                QMessageBox.information(self.ui, "提示", "potfile已在配置中禁用")
+                return
+            path, _ = QFileDialog.getSaveFileName(
+                self.ui, "导出破解记录", "md5_cracker.potfile", "potfile (*.potfile *.txt);;所有文件 (*)")
+            if not path:
+                return
+            count = 0
+            with open(path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                for line in potfile.export_lines():
+                    f.write(line + '\n')
+                    count += 1
+            QMessageBox.information(self.ui, "导出成功", f"已导出 {count} 条记录")
+        except Exception as e:
+            logging.error(f"导出potfile失败: {str(e)}")
+            QMessageBox.critical(self.ui, "导出失败", f"导出破解记录失败: {str(e)}")
+
+    def export_stats(self):
+        """把最近一次运行的统计导出为JSON"""
+        try:
+            if self.run_stats is None:
+                QMessageBox.information(self.ui, "提示", "尚无运行统计")
+                return
+            path, _ = QFileDialog.getSaveFileName(
+                self.ui, "导出运行统计", "md5_cracker_stats.json", "JSON (*.json);;所有文件 (*)")
+            if not path:
+                return
+            self.run_stats.dump(path)
+            QMessageBox.information(self.ui, "导出成功", f"运行统计已导出到 {path}")
+        except Exception as e:
+            logging.error(f"导出运行统计失败: {str(e)}")
+            QMessageBox.critical(self.ui, "导出失败", f"导出运行统计失败: {str(e)}")
+
     def on_save_click(self):
         try:
-            check_log_size()
             selected_name = self.ui.dict_combo.currentText()
             if not selected_name:
                 QMessageBox.warning(self.ui, "未选择字典", "请先从下拉框选择一个字典文件")
@@ -745,11 +1426,14 @@ class Function:
 
     def clear_content(self):
         self.ui.result_display.clear()
-        self.ui.regex_output.clear()
+        self.regex_model.clear()
+        self.ui.regex_status.clear()
+        self._discard_regex_spool()
         self.ui.progress_bar.setValue(0)
         self.ui.progress_bar.setFormat("准备就绪")
         self.ui.time_remaining.setText("预计剩余时间: --:--:--")
         self.ui.progress_label.setText("0%")
         self.ui.md5_output.clear()
         self.ui.md5_input.clear()
+        self.ui.stats_output.clear()
 
@@ -1,11 +1,12 @@
 import sys, os, json
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
-                             QLabel, QTextEdit, QPushButton, QComboBox,
-                             QGroupBox, QProgressBar, QFrame,
+                             QLabel, QTextEdit, QLineEdit, QPushButton, QComboBox,
+                             QGroupBox, QProgressBar, QFrame, QListView,
                              QGraphicsDropShadowEffect, QMessageBox, QFileDialog, QSplitter)
 from PyQt5.QtCore import Qt, QEasingCurve
 from PyQt5.QtGui import QFont, QColor
-from Function_pro import StyleManager, Function
+from Function_pro import ALL_DICTS_MODE, DICT_MODE, MASK_MODE, StyleManager, Function
+from hash_kernels import get_kernel, kernels
 
 class Tog:
     def __init__(self, splitter, sidebar_index, original_width, toggle_button):
@@ -56,6 +57,7 @@ class MD5CrackerPro(QWidget):
             }
         }
         self.current_files = {}
+        self.settings = {}
         self.style_manager = StyleManager(self.design_config)
         self.function = Function(self)
         self.tog = Tog(None, 1, 330, None)  # 用占位符初始化
@@ -77,6 +79,7 @@ class MD5CrackerPro(QWidget):
                             valid_files[display_name] = path
                             self.dict_combo.addItem(display_name)
                     self.current_files = valid_files
+                    self.settings = data.get('settings', {})
                     if valid_files:
                         self.dict_combo.setCurrentIndex(0)
         except json.JSONDecodeError:
@@ -88,7 +91,7 @@ class MD5CrackerPro(QWidget):
         """保存当前字典设置到配置文件"""
         try:
             with open(self.config_file, 'w') as f:
-                json.dump({'dictionaries': self.current_files}, f, indent=2)
+                json.dump({'dictionaries': self.current_files, 'settings': self.settings}, f, indent=2)
         except PermissionError:
             QMessageBox.warning(self, "权限错误", "无权限写入配置文件")
         except Exception as e:
@@ -123,6 +126,23 @@ class MD5CrackerPro(QWidget):
                 self.dict_combo.removeItem(current)
                 self.save_settings()
 
+    def on_mode_changed(self):
+        """切换字典/全部字典/掩码模式时显示对应的输入控件"""
+        mode = self.mode_combo.currentText()
+        self.mask_input.setVisible(mode == MASK_MODE)
+        self.dict_combo.setEnabled(mode == DICT_MODE)
+        self.rules_input.setEnabled(mode != MASK_MODE)
+
+    def on_hash_type_changed(self):
+        """按所选算法更新哈希输入框和生成器的提示"""
+        kernel = get_kernel(self.hash_type_combo.currentData())
+        if kernel.salted:
+            self.hash_input.setPlaceholderText(f"请输入{kernel.label}的 hash:salt，多个哈希每行一个")
+            self.md5_input.setPlaceholderText("输入 明文:盐 ...")
+        else:
+            self.hash_input.setPlaceholderText(f"请输入32位的{kernel.label}值，多个哈希每行一个")
+            self.md5_input.setPlaceholderText("输入要加密的字符串...")
+
     def init_ui(self):
         """初始化用户界面"""
         self.splitter = QSplitter(Qt.Horizontal)
@@ -174,7 +194,12 @@ class MD5CrackerPro(QWidget):
         layout.addWidget(self.create_input_group(
             "目标哈希值",
             self.create_hash_input(),
-            "输入32位MD5哈希值"
+            "输入一个或多个32位MD5哈希值（每行一个），或从文件导入"
+        ))
+        layout.addWidget(self.create_input_group(
+            "变形规则",
+            self.create_rules_input(),
+            "hashcat风格的变形规则，每行一条，例如 c $1 或 sa@；留空则只尝试字典原词"
         ))
         layout.addWidget(self.create_input_group(
             "密码字典管理",
@@ -215,11 +240,33 @@ class MD5CrackerPro(QWidget):
 
     def create_hash_input(self):
         """创建哈希输入框"""
+        container = QWidget()
+        layout = QHBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
         self.hash_input = QTextEdit()
         self.hash_input.setObjectName("hashInput")
-        self.hash_input.setPlaceholderText("请输入32位的md5值")
+        self.hash_input.setPlaceholderText("请输入32位的md5值，多个哈希每行一个")
         self.hash_input.setMaximumHeight(100)
-        return self.hash_input
+        layout.addWidget(self.hash_input)
+        import_btn = self.create_icon_button("📂", self.function.import_hash_file)
+        import_btn.setToolTip("从文件导入哈希列表")
+        layout.addWidget(import_btn, 0, Qt.AlignTop)
+        return container
+
+    def create_rules_input(self):
+        """创建变形规则输入框"""
+        container = QWidget()
+        layout = QHBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.rules_input = QTextEdit()
+        self.rules_input.setObjectName("rulesInput")
+        self.rules_input.setPlaceholderText("每行一条规则，如: c $1")
+        self.rules_input.setMaximumHeight(70)
+        layout.addWidget(self.rules_input)
+        import_btn = self.create_icon_button("📂", self.function.import_rule_file)
+        import_btn.setToolTip("从文件导入规则")
+        layout.addWidget(import_btn, 0, Qt.AlignTop)
+        return container
 
     def create_dictionary_controls(self):
         """创建字典管理控件"""
@@ -228,13 +275,34 @@ class MD5CrackerPro(QWidget):
         layout.setSpacing(self.design_config["spacing"]["md"])
         # 字典选择行
         combo_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([DICT_MODE, ALL_DICTS_MODE, MASK_MODE])
+        self.mode_combo.setToolTip("字典模式逐行尝试所选字典；全部字典模式依次扫描已添加的全部字典并跳过重复单词；"
+                                   "掩码模式按掩码枚举全部组合")
+        self.mode_combo.currentIndexChanged.connect(self.on_mode_changed)
+        combo_layout.addWidget(self.mode_combo, 1)
+        self.hash_type_combo = QComboBox()
+        for kernel in kernels():
+            self.hash_type_combo.addItem(kernel.label, kernel.name)
+        self.hash_type_combo.setToolTip("哈希算法，破解、正则匹配和哈希生成器共用；加盐算法的目标每行写作 hash:salt")
+        self.hash_type_combo.currentIndexChanged.connect(self.on_hash_type_changed)
+        combo_layout.addWidget(self.hash_type_combo, 1)
         self.dict_combo = QComboBox()
         self.dict_combo.setObjectName("dict_Combo")
         self.dict_combo.setMinimumWidth(175)
         combo_layout.addWidget(self.dict_combo, 3)
         combo_layout.addWidget(self.create_icon_button("➕", self.add_dictionary_file))
         combo_layout.addWidget(self.create_icon_button("➖", self.remove_dictionary))
+        index_btn = self.create_icon_button("🗂", self.function.build_index)
+        index_btn.setToolTip("为当前字典建立MD5索引，之后的破解可直接查表")
+        combo_layout.addWidget(index_btn)
         layout.addLayout(combo_layout)
+        # 掩码输入，仅在掩码模式下显示
+        self.mask_input = QLineEdit()
+        self.mask_input.setPlaceholderText("掩码，如 ?u?l?l?l?d?d?d?d 或 ?l?d,?1?1?1?1")
+        self.mask_input.setToolTip("?l小写 ?u大写 ?d数字 ?s符号 ?a全部 ?h/?H十六进制 ?b任意字节 ?1-?4自定义")
+        self.mask_input.setVisible(False)
+        layout.addWidget(self.mask_input)
         # 字典编辑器
         self.dict_editor = QTextEdit()
         self.dict_editor.setPlaceholderText("每行输入一个密码...")
@@ -297,8 +365,10 @@ class MD5CrackerPro(QWidget):
         header.addWidget(QLabel("高级工具"))
         layout.addLayout(header)
         # 工具
-        layout.addWidget(self.create_tool_panel("MD5生成器", self.create_md5_generator()))
+        layout.addWidget(self.create_tool_panel("哈希生成器", self.create_md5_generator()))
         layout.addWidget(self.create_tool_panel("正则匹配", self.create_regex_tool()))
+        layout.addWidget(self.create_tool_panel("破解记录(potfile)", self.create_potfile_tool()))
+        layout.addWidget(self.create_tool_panel("运行统计", self.create_stats_tool()))
         return sidebar
 
     def create_tool_panel(self, title, widget):
@@ -316,7 +386,7 @@ class MD5CrackerPro(QWidget):
         self.md5_input.setPlaceholderText("输入要加密的字符串...")
         self.md5_output = QTextEdit()
         self.md5_output.setReadOnly(True)
-        generate_btn = QPushButton("生成MD5")
+        generate_btn = QPushButton("生成哈希")
         generate_btn.clicked.connect(lambda: self.function.generate_md5())
         layout.addWidget(self.md5_input)
         layout.addWidget(generate_btn)
@@ -328,14 +398,55 @@ class MD5CrackerPro(QWidget):
         container = QWidget()
         layout = QVBoxLayout(container)
         self.regex_input = QTextEdit()
-        self.regex_input.setPlaceholderText("输入正则表达式...")
-        self.regex_output = QTextEdit()
-        self.regex_output.setReadOnly(True)
+        self.regex_input.setPlaceholderText("输入正则表达式，每行一个...")
+        # 匹配可能多达数百万个，列表视图只绘制可见的行
+        self.regex_results = QListView()
+        self.regex_results.setModel(self.function.regex_model)
+        self.regex_results.setUniformItemSizes(True)
+        self.regex_results.setEditTriggers(QListView.NoEditTriggers)
+        self.regex_status = QLabel()
+        self.regex_status.setWordWrap(True)
+        buttons = QHBoxLayout()
         test_btn = QPushButton("测试匹配")
         test_btn.clicked.connect(lambda: self.function.test_regex())
+        export_btn = QPushButton("导出匹配")
+        export_btn.setToolTip("把最近一次正则匹配的全部结果导出为文本文件")
+        export_btn.clicked.connect(lambda: self.function.export_regex_results())
+        buttons.addWidget(test_btn)
+        buttons.addWidget(export_btn)
         layout.addWidget(self.regex_input)
-        layout.addWidget(test_btn)
-        layout.addWidget(self.regex_output)
+        layout.addLayout(buttons)
+        layout.addWidget(self.regex_status)
+        layout.addWidget(self.regex_results)
+        return container
+
+    def create_potfile_tool(self):
+        """创建potfile导入导出工具"""
+        container = QWidget()
+        layout = QHBoxLayout(container)
+        import_btn = QPushButton("导入")
+        import_btn.setToolTip("导入 hash:plain 格式的破解记录")
+        import_btn.clicked.connect(lambda: self.function.import_potfile())
+        export_btn = QPushButton("导出")
+        export_btn.setToolTip("导出全部破解记录为 hash:plain 格式")
+        export_btn.clicked.connect(lambda: self.function.export_potfile())
+        layout.addWidget(import_btn)
+        layout.addWidget(export_btn)
+        return container
+
+    def create_stats_tool(self):
+        """创建运行统计面板"""
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        self.stats_output = QTextEdit()
+        self.stats_output.setReadOnly(True)
+        self.stats_output.setPlaceholderText("运行时显示各阶段耗时、工作者吞吐与批次耗时分布...")
+        self.stats_output.setFont(QFont("Consolas", 9))
+        export_btn = QPushButton("导出JSON")
+        export_btn.setToolTip("把最近一次运行的统计导出为JSON")
+        export_btn.clicked.connect(lambda: self.function.export_stats())
+        layout.addWidget(self.stats_output)
+        layout.addWidget(export_btn)
         return container
 
     def setup_style(self):
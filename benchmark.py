@@ -0,0 +1,405 @@
+"""基准测试套件：在合成字典上测量读取、哈希热路径、正则及各引擎的吞吐量
+
+每个测试用例在独立子进程中运行，以便准确统计峰值内存(RSS)；全程不导入Qt，
+可在无显示器的服务器上运行。结果写成JSON，便于不同版本之间对比。
+
+用法:
+    python benchmark.py                                  # 默认规模 1K/100K/1M
+    python benchmark.py --sizes 1000,1000000,100000000 --profiles ascii,mixed
+    python benchmark.py --cases crack_batch,process_engine --workers 1,2,4,8
+    python benchmark.py --output bench.json              # 保存JSON结果
+    python benchmark.py --startup                        # 只测量命令行启动耗时
+"""
+import gc
+import os
+import sys
+import json
+import time
+import random
+import string
+import hashlib
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+MISS_TARGET = hashlib.md5(b'\x00benchmark-miss\x00').hexdigest()
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_PROFILES = ('ascii', 'mixed')
+ALL_CASES = ('loader', 'cached_loader', 'hotpath', 'crack_batch', 'regex_batch', 'dedup_filter',
+             'hash_kernels', 'mask_range', 'thread_engine', 'process_engine', 'first_hit')
+# 只在单个进程数下运行的用例
+SINGLE_WORKER_CASES = ('loader', 'cached_loader', 'hotpath', 'crack_batch', 'regex_batch', 'dedup_filter',
+                       'hash_kernels', 'mask_range')
+# mask_range 用例的掩码，枚举前 size 个候选
+BENCH_MASK = '?l?l?l?l?d?d?d'
+# 加盐kernel基准使用的盐
+BENCH_SALT = b'benchmark-salt'
+REGEX_PATTERN = '^25d5'
+# 合成字典中位于50%位置的命中单词
+FIRST_HIT_WORD = b'benchmark-first-hit'
+
+_CJK = [chr(c) for c in range(0x4E00, 0x4E00 + 2000)]
+_ASCII = string.ascii_lowercase + string.digits
+
+
+def _random_word(rng, profile):
+    if profile == 'ascii':
+        return ''.join(rng.choices(_ASCII, k=rng.randint(6, 12))).encode()
+    # mixed: 长度1~32，约10%含中文，1%含非法UTF-8字节
+    roll = rng.random()
+    if roll < 0.10:
+        return ''.join(rng.choices(_CJK, k=rng.randint(1, 8))).encode('utf-8')
+    if roll < 0.11:
+        return bytes(rng.choices(range(0x80, 0x100), k=rng.randint(2, 10)))
+    return ''.join(rng.choices(_ASCII + string.ascii_uppercase + '!@#$%_',
+                               k=rng.randint(1, 32))).encode()
+
+
+def generate_wordlist(path, words, profile='ascii', seed=1234, hit_word=None, hit_position=0.5):
+    """生成合成字典；hit_word 会被放在 hit_position 比例处，用于测量首次命中时间"""
+    rng = random.Random(seed)
+    newline = b'\n'
+    hit_index = int(words * hit_position) if hit_word else -1
+    with open(path, 'wb') as f:
+        buffer = []
+        for i in range(words):
+            word = hit_word if i == hit_index else _random_word(rng, profile)
+            # mixed 字典中约5%的行使用CRLF换行
+            if profile == 'mixed' and rng.random() < 0.05:
+                buffer.append(word + b'\r\n')
+            else:
+                buffer.append(word + newline)
+            if len(buffer) >= 65536:
+                f.write(b''.join(buffer))
+                buffer = []
+        f.write(b''.join(buffer))
+
+
+def _peak_rss_mb():
+    """当前进程及其已回收子进程的峰值RSS(MB)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux下ru_maxrss单位为KB，macOS下为字节
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _timed(func):
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+
+def _load_words(path):
+    from crack_core import normalize_line
+    with open(path, 'rb') as f:
+        return [word for word in map(normalize_line, f.read().split(b'\n')) if word]
+
+
+def _legacy_str_batch(batch, target_hash):
+    """旧版热路径：逐词strip/encode/hexdigest后做字符串比较，仅作对照"""
+    hits = []
+    for word in batch:
+        word = word.strip()
+        if hashlib.md5(word.encode('utf-8', 'ignore')).hexdigest() == target_hash:
+            hits.append(word)
+    return hits
+
+
+def _warm_up_kernels():
+    """提前导入NumPy(向量化MD5)，导入耗时不计入计时"""
+    from hash_kernels import get_kernel
+    return get_kernel().vectorize
+
+
+def case_loader(path, workers):
+    from wordlist import WordlistStream
+    elapsed, words = _timed(lambda: sum(len(chunk) for chunk, _ in WordlistStream(path)))
+    return {'words': words, 'seconds': elapsed}
+
+
+def case_cached_loader(path, workers):
+    """第二次读取同一字典：第一次读取时建立常驻缓存，只计第二次"""
+    from wordlist import WordlistStream, DictionaryCache
+    cache = DictionaryCache()
+    sum(len(chunk) for chunk, _ in WordlistStream(path, cache=cache))
+    elapsed, words = _timed(lambda: sum(len(chunk) for chunk, _ in WordlistStream(path, cache=cache)))
+    return {'words': words, 'seconds': elapsed, 'cache_mb': round(cache.nbytes / 1048576, 1)}
+
+
+def case_hotpath(path, workers, repeat=5):
+    from crack_core import crack_batch, digest_targets
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        str_words = [line.strip() for line in f if line.strip()]
+    byte_words = _load_words(path)
+    targets = digest_targets([MISS_TARGET])
+    _warm_up_kernels()
+    cases = {
+        'legacy_str': lambda: _legacy_str_batch(str_words, MISS_TARGET),
+        'bytes_digest': lambda: crack_batch(byte_words, targets),
+    }
+    # 交替执行各用例并取最优值，减少机器负载波动带来的偏差
+    best = {name: float('inf') for name in cases}
+    for _ in range(repeat):
+        for name, func in cases.items():
+            best[name] = min(best[name], _timed(func)[0])
+    return {'words': len(byte_words), 'seconds': best['bytes_digest'],
+            'legacy_words_per_sec': round(len(str_words) / best['legacy_str'])}
+
+
+def case_crack_batch(path, workers):
+    from engine import CrackJob
+    words = _load_words(path)
+    _warm_up_kernels()
+    job = CrackJob(path, [MISS_TARGET])
+    elapsed, _ = _timed(lambda: job._process_batch(words, len(words)))
+    return {'words': len(words), 'seconds': elapsed}
+
+
+def case_regex_batch(path, workers):
+    """正则匹配吞吐量：降级为掩码比较的路径，以及逐个生成十六进制串交给 re 的对照"""
+    from engine import RegexJob
+    from regex_compiler import PatternSet
+    words = _load_words(path)
+    _warm_up_kernels()
+    job = RegexJob(path, REGEX_PATTERN)
+    elapsed, result = _timed(lambda: job._process_batch(words, len(words)))
+    baseline = PatternSet([REGEX_PATTERN], lower=False)
+    re_elapsed, _ = _timed(lambda: baseline.match(words, job.kernel))
+    return {'words': len(words), 'seconds': elapsed, 'matches': len(result[0]),
+            're_words_per_sec': round(len(words) / re_elapsed) if re_elapsed else 0}
+
+
+def case_dedup_filter(path, workers):
+    """去重过滤器的单词吞吐量：首轮全部为新单词，次轮全部为重复单词"""
+    from dedup import BloomFilter, _mask_tables
+    words = _load_words(path)
+    bloom = BloomFilter(len(words))
+    _mask_tables(bloom.hash_count)
+    elapsed, _ = _timed(lambda: bloom.add_new(words))
+    repeat_elapsed, _ = _timed(lambda: bloom.add_new(words))
+    return {'words': len(words), 'seconds': elapsed, 'repeat_seconds': repeat_elapsed,
+            'filter_bytes': bloom.nbytes,
+            'estimated_error_rate': bloom.estimated_error_rate()}
+
+
+def case_hash_kernels(path, workers):
+    """各哈希kernel的批量吞吐量(match路径，与破解时一致)；顶层结果为MD5"""
+    from crack_core import crack_batch, digest_targets
+    from hash_kernels import Md5Kernel, kernels
+    words = _load_words(path)
+    _warm_up_kernels()
+    per_kernel = {}
+    # md5_hashlib 为关闭NumPy向量化的MD5，作为对照
+    for kernel in kernels() + [Md5Kernel(vectorize=False)]:
+        target = f"{MISS_TARGET}:{BENCH_SALT.decode()}" if kernel.salted else MISS_TARGET
+        targets = digest_targets([target], kernel)
+        elapsed, _ = _timed(lambda: crack_batch(words, targets, kernel))
+        name = 'md5_hashlib' if getattr(kernel, 'vectorize', None) is False else kernel.name
+        per_kernel[name] = {'seconds': elapsed, 'words_per_sec': round(len(words) / elapsed)
+                            if elapsed else None}
+    return {'words': len(words), 'seconds': per_kernel['md5']['seconds'], 'kernels': per_kernel}
+
+
+def case_mask_range(path, workers):
+    """掩码区间枚举+MD5的候选吞吐量，候选数与字典行数相同；对照值为逐个调用hashlib"""
+    from crack_core import digest_targets
+    from hash_kernels import Md5Kernel, get_kernel
+    from mask import Mask
+    mask = Mask(BENCH_MASK)
+    candidates = min(mask.keyspace, sum(1 for _ in open(path, 'rb')))
+    targets = digest_targets([MISS_TARGET])
+    kernel = get_kernel()
+    _warm_up_kernels()
+    elapsed, _ = _timed(lambda: mask.crack_range(0, candidates, targets, None, kernel))
+    hashlib_elapsed, _ = _timed(lambda: mask.crack_range(0, candidates, targets, None, Md5Kernel(vectorize=False)))
+    return {'words': candidates, 'seconds': elapsed, 'vectorized': kernel.vectorize,
+            'hashlib_words_per_sec': round(candidates / hashlib_elapsed) if hashlib_elapsed else None}
+
+
+def _run_job(job):
+    first_hit = []
+    start = time.perf_counter()
+
+    def on_result(*_):
+        if not first_hit:
+            first_hit.append(time.perf_counter() - start)
+
+    job.run(None, on_result)
+    return {'words': job.processed_words, 'seconds': time.perf_counter() - start,
+            'first_hit_seconds': first_hit[0] if first_hit else None,
+            'final_batch_size': job.tuner.size}
+
+
+def case_thread_engine(path, workers):
+    from engine import CrackJob
+    return _run_job(CrackJob(path, [MISS_TARGET], {'threads': workers}))
+
+
+def case_process_engine(path, workers):
+    from process_engine import ProcessCrackEngine
+    return _run_job(ProcessCrackEngine(path, [MISS_TARGET], workers))
+
+
+def case_first_hit(path, workers):
+    from engine import CrackJob
+    target = hashlib.md5(FIRST_HIT_WORD).hexdigest()
+    return _run_job(CrackJob(path, [target], {'threads': workers}))
+
+
+CASES = {name: globals()[f'case_{name}'] for name in ALL_CASES}
+
+
+def run_case_in_subprocess(name, path, workers):
+    """在独立子进程中运行单个用例，返回包含峰值内存的结果字典"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', name, '--dict', path,
+         '--case-workers', str(workers)],
+        cwd=here, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _run_case_here(name, path, workers):
+    result = CASES[name](path, workers)
+    result['words_per_sec'] = round(result['words'] / result['seconds']) if result['seconds'] else None
+    result['peak_rss_mb'] = _peak_rss_mb()
+    print(json.dumps(result))
+    return 0
+
+
+def bench_cli_startup(runs=10):
+    """测量命令行启动耗时(毫秒中位数)，并与空解释器启动对比"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        'python -c pass': [sys.executable, '-c', 'pass'],
+        'md5cracker hash': [sys.executable, '-m', 'md5cracker', 'hash', 'x'],
+        'md5cracker --help': [sys.executable, '-m', 'md5cracker', 'crack', '--help'],
+    }
+    results = {}
+    for name, command in commands.items():
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=here, stdout=subprocess.DEVNULL, check=True)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(samples)
+    check = subprocess.run(
+        [sys.executable, '-c', "import sys, md5cracker, engine; print('PyQt5' in sys.modules)"],
+        cwd=here, capture_output=True, text=True, check=True)
+    results['qt_imported'] = check.stdout.strip() == 'True'
+    return results
+
+
+def default_worker_series():
+    cpus = os.cpu_count() or 1
+    series = []
+    n = 1
+    while n < cpus:
+        series.append(n)
+        n *= 2
+    series.append(cpus)
+    return series
+
+
+def _environment():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(sizes, profiles, cases, worker_series, tmp_dir, log=print):
+    results = []
+    for profile in profiles:
+        for size in sizes:
+            path = os.path.join(tmp_dir, f'bench_{profile}_{size}.txt')
+            if not os.path.exists(path):
+                generate_wordlist(path, size, profile, hit_word=FIRST_HIT_WORD)
+            for name in cases:
+                for workers in ([1] if name in SINGLE_WORKER_CASES else worker_series):
+                    result = run_case_in_subprocess(name, path, workers)
+                    result.update({'case': name, 'profile': profile, 'size': size,
+                                   'bytes': os.path.getsize(path), 'workers': workers})
+                    results.append(result)
+                    log(_format_row(result))
+    return results
+
+
+def _format_row(r):
+    if 'error' in r:
+        return f"{r['case']:<15} {r['profile']:<6} {r['size']:>11,} {r['workers']:>3}  ERROR {r['error']}"
+    rate = f"{r['words_per_sec']:>14,}" if r.get('words_per_sec') is not None else f"{'-':>14}"
+    hit = f"{r['first_hit_seconds'] * 1000:>9.1f}" if r.get('first_hit_seconds') is not None else f"{'-':>9}"
+    row = f"{r['case']:<15} {r['profile']:<6} {r['size']:>11,} {r['workers']:>3} {rate} {hit} {r['peak_rss_mb']:>9}"
+    # hash_kernels 用例逐个kernel列出吞吐量
+    for name, kernel in r.get('kernels', {}).items():
+        row += f"\n  {name:<13} {'':>18} {kernel['words_per_sec'] or 0:>18,}"
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MD5破解基准测试套件")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="逗号分隔的字典行数")
+    parser.add_argument('--profiles', default=','.join(DEFAULT_PROFILES), help="字典类型: ascii,mixed")
+    parser.add_argument('--cases', default=','.join(ALL_CASES), help="要运行的用例")
+    parser.add_argument('--workers', default=None, help="逗号分隔的线程/进程数列表")
+    parser.add_argument('--output', default=None, help="把结果写入JSON文件")
+    parser.add_argument('--keep-data', default=None, help="合成字典的保存目录，可跨多次运行复用")
+    parser.add_argument('--startup', action='store_true', help="只测量命令行启动耗时")
+    parser.add_argument('--run-case', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--dict', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--case-workers', type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        return _run_case_here(args.run_case, args.dict, args.case_workers)
+
+    if args.startup:
+        results = bench_cli_startup()
+        for name in ('python -c pass', 'md5cracker hash', 'md5cracker --help'):
+            print(f"{name:<20} {results[name]:>8.1f} ms")
+        print(f"{'imports Qt':<20} {results['qt_imported']!s:>8}")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({'environment': _environment(), 'startup': results}, f, indent=2)
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    profiles = args.profiles.split(',')
+    cases = [c for c in args.cases.split(',') if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"未知用例: {', '.join(unknown)}")
+    worker_series = [int(w) for w in args.workers.split(',')] if args.workers else default_worker_series()
+
+    print(f"{'case':<15} {'data':<6} {'words':>11} {'w':>3} {'words/s':>14} {'1st hit ms':>9} {'peak MB':>9}")
+    if args.keep_data:
+        os.makedirs(args.keep_data, exist_ok=True)
+        results = run_suite(sizes, profiles, cases, worker_series, args.keep_data)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_suite(sizes, profiles, cases, worker_series, tmp)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'environment': _environment(), 'results': results}, f, indent=2)
+        print(f"\n结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
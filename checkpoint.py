@@ -0,0 +1,137 @@
+"""破解任务的检查点：定期把已按顺序完成的位置写入小型JSON状态文件
+
+位置对字典任务是字节偏移，对掩码任务是keyspace序号；两者都只在其之前的工作
+全部完成后才前进，因此从该位置继续不会漏掉候选。状态文件以输入(字典文件签名
+或掩码、规则、哈希算法、目标哈希)的摘要命名，输入相同的新任务会自动从中断处继续，
+并沿用保存的吞吐量使剩余时间估计一开始就准确。
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+from crack_core import ThroughputMeter
+from hash_kernels import DEFAULT_KERNEL
+
+VERSION = 1
+# 默认的检查点保存间隔(秒)
+DEFAULT_INTERVAL = 30.0
+
+
+def dictionary_source(file_path):
+    """字典的身份信息，文件内容变化(大小或修改时间)后旧检查点失效"""
+    st = os.stat(file_path)
+    return {'path': os.path.abspath(file_path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def checkpoint_identity(kind, source, target_hashes, rules=None, hash_type=None):
+    identity = {'kind': kind, 'source': source, 'targets': sorted(target_hashes), 'rules': list(rules or [])}
+    # 只有非MD5算法才写入算法名，已有的MD5检查点保持有效
+    if hash_type and hash_type != DEFAULT_KERNEL:
+        identity['hash_type'] = hash_type
+    return identity
+
+
+def checkpoint_path_for(identity, checkpoint_dir):
+    key = hashlib.sha1(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()
+    return os.path.join(checkpoint_dir, f"{key}.json")
+
+
+def make_checkpointer(settings, identity):
+    """settings.checkpoint_dir 为空时不启用检查点"""
+    settings = settings or {}
+    if not settings.get('checkpoint_dir'):
+        return None
+    return Checkpointer(settings['checkpoint_dir'], identity,
+                        settings.get('checkpoint_interval', DEFAULT_INTERVAL))
+
+
+def seed_found(remaining, found, state=None, cracked=None):
+    """把检查点 state 中的结果与已知结果 cracked(如potfile命中)计入 found 并从 remaining 中移除
+
+    两者都直接视为已破解，任务在 run 开始时把 found 中的结果一起上报。
+    """
+    if state:
+        remaining.intersection_update(state['remaining'])
+        found.update(state['found'])
+    for target, word in (cracked or {}).items():
+        if target in remaining:
+            remaining.discard(target)
+            found[target] = word
+
+
+class Checkpointer:
+    """读取、定期保存和清除单个任务的检查点"""
+
+    def __init__(self, checkpoint_dir, identity, interval=DEFAULT_INTERVAL):
+        self.identity = identity
+        self.path = checkpoint_path_for(identity, checkpoint_dir)
+        self.interval = interval
+        self.meter = ThroughputMeter()
+        self.elapsed = 0.0
+        # 任务自行维护的附加状态(如全部字典模式的扫描顺序)，随检查点一起保存
+        self.extra = {}
+        self._started = time.monotonic()
+        self._last_save = self._started
+
+    def load(self):
+        """读取与当前输入一致的检查点，不存在或不一致时返回None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('version') != VERSION or state.get('identity') != self.identity:
+            return None
+        self.meter = ThroughputMeter(rate=state.get('rate'))
+        self.elapsed = state.get('elapsed', 0.0)
+        self.extra = state.get('extra', {})
+        return state
+
+    def update(self, position, processed_words, remaining, found):
+        """上报已按顺序完成的位置，距上次保存超过interval时写盘"""
+        self.meter.update(position)
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save(position, processed_words, remaining, found)
+
+    def save(self, position, processed_words, remaining, found):
+        now = time.monotonic()
+        state = {
+            'version': VERSION,
+            'identity': self.identity,
+            'position': position,
+            'processed_words': processed_words,
+            'remaining': sorted(remaining),
+            'found': found,
+            'rate': self.meter.rate,
+            'elapsed': self.elapsed + now - self._started,
+            'extra': self.extra,
+            'saved_at': time.time(),
+        }
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._last_save = now
+
+    def finish(self, completed, position, processed_words, remaining, found):
+        """任务结束时调用：完整结束则删除检查点，否则保存最终位置"""
+        if completed:
+            self.clear()
+        else:
+            self.save(position, processed_words, remaining, found)
+
+    def clear(self):
+        """任务完整结束后删除检查点"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,235 @@
+"""破解核心逻辑：不依赖Qt，供线程、进程引擎和索引共用
+
+热路径全程使用bytes：字典按字节行读取，目标哈希预先转换为16字节摘要，
+比较时直接做bytes相等判断，只有命中时才解码明文。
+"""
+import re
+import time
+from collections import deque
+
+from hash_kernels import get_kernel, split_salted
+
+# 每个工作线程/进程允许的在途批次数
+IN_FLIGHT_PER_WORKER = 2
+# 自动调节批大小时每批的目标耗时(秒)
+DEFAULT_BATCH_LATENCY = 0.05
+# 吞吐量估计的半衰期(秒)，越小对速度变化越敏感
+THROUGHPUT_HALF_LIFE = 3.0
+
+
+# 匹配一行中独立出现的32位十六进制串，兼容 "user:hash" 等常见导出格式
+HASH_TOKEN_RE = re.compile(r'(?<![0-9a-fA-F])[0-9a-fA-F]{32}(?![0-9a-fA-F])')
+# 加盐目标的hashcat格式 "hash:salt"，盐可以为空或包含冒号
+SALTED_HASH_RE = re.compile(r'([0-9a-fA-F]{32}):(.*)')
+
+
+def parse_hash_list(text, salted=False):
+    """从文本中提取哈希，返回(去重后的哈希列表, 无法识别的行)
+
+    salted 为真时每行必须是 hash:salt，结果为小写哈希加原样的盐。
+    """
+    hashes = []
+    seen = set()
+    invalid = []
+    for line in text.splitlines():
+        if salted:
+            # 盐中的空白有意义，只去掉行首空白
+            match = SALTED_HASH_RE.fullmatch(line.lstrip())
+            tokens = [f"{match.group(1).lower()}:{match.group(2)}"] if match else []
+            line = line.strip()
+        else:
+            line = line.strip()
+            tokens = [token.lower() for token in HASH_TOKEN_RE.findall(line)]
+        if not line:
+            continue
+        if not tokens:
+            invalid.append(line)
+            continue
+        for token in tokens:
+            if token not in seen:
+                seen.add(token)
+                hashes.append(token)
+    return hashes, invalid
+
+
+def digest_targets(target_hashes, kernel=None):
+    """十六进制哈希 -> {16字节摘要: 十六进制哈希}
+
+    加盐算法按盐分组: {盐bytes: {16字节摘要: "hash:salt"}}。
+    """
+    if kernel is None or not kernel.salted:
+        return {bytes.fromhex(h): h for h in target_hashes}
+    groups = {}
+    for target in target_hashes:
+        target_hash, salt = split_salted(target)
+        groups.setdefault(salt, {})[bytes.fromhex(target_hash)] = target
+    return groups
+
+
+def drop_solved_salts(targets, solved, kernel=None):
+    """去掉全部目标都已在别处破解的盐分组，返回新的 digest_targets 结果
+
+    加盐算法每个盐都要把候选完整计算一遍，整组去掉即省下一遍计算；无盐算法多比较
+    一个目标没有额外开销，原样返回。
+    """
+    if kernel is None or not kernel.salted:
+        return targets
+    return {salt: group for salt, group in targets.items() if not solved.issuperset(group.values())}
+
+
+def normalize_target(target):
+    """目标哈希统一为小写，"hash:salt" 中的盐保持原样"""
+    target_hash, sep, salt = target.strip().partition(':')
+    return target_hash.lower() + sep + salt
+
+
+def normalize_line(line):
+    """字典行规范化为候选口令，与读取、索引逻辑保持一致"""
+    return line.strip()
+
+
+def decode_word(word):
+    return word.decode('utf-8', 'replace')
+
+
+def progress_snapshot(job):
+    """读取任务进度计数器: (已处理字节, 总字节, 已处理单词, 当前单词)
+
+    计数器只由任务的调度线程写入，界面线程定时读取即可，无需加锁或逐批发信号。
+    """
+    return (job.processed_bytes, job.total_bytes, job.processed_words,
+            decode_word(job.current_word)[:20])
+
+
+def estimate_words(processed_words, processed_bytes, total_bytes):
+    """按已处理部分的平均行长推算字典总单词数，扫描完成后即为精确值"""
+    if not processed_bytes or processed_bytes >= total_bytes:
+        return processed_words
+    return int(processed_words * total_bytes / processed_bytes)
+
+
+def crack_batch(words, targets, kernel=None):
+    """用kernel(默认MD5)计算一批bytes候选并与 digest_targets 的结果比较，返回[(目标, 明文bytes)]"""
+    kernel = kernel or _MD5
+    if not kernel.salted:
+        return kernel.match(words, targets)
+    hits = []
+    for salt, group in targets.items():
+        hits.extend(kernel.match(words, group, salt))
+    return hits
+
+
+_MD5 = get_kernel()
+
+
+def map_bounded(executor, fn, tasks, window, should_stop=None):
+    """有界并发调度：最多window个任务在途，按提交顺序产出 (meta, 结果)
+
+    tasks 产出 (args, meta)，只有在队首任务完成后才会继续提交，因此内存占用
+    与任务总数无关。调用方停止迭代或 should_stop() 为真时，所有未开始的任务
+    都会被立即取消。
+    """
+    pending = deque()
+    try:
+        for args, meta in tasks:
+            if should_stop and should_stop():
+                return
+            pending.append((executor.submit(fn, *args), meta))
+            if len(pending) >= window:
+                future, head_meta = pending.popleft()
+                yield head_meta, future.result()
+        while pending:
+            if should_stop and should_stop():
+                return
+            future, head_meta = pending.popleft()
+            yield head_meta, future.result()
+    finally:
+        for future, _ in pending:
+            future.cancel()
+
+
+class BatchTuner:
+    """根据实测批次耗时自动调整批大小，使每批耗时接近 target_latency
+
+    fixed 不为空时始终使用固定批大小，便于复现基准测试结果。
+    history 记录每次调整后的批大小，用于诊断。
+    """
+
+    def __init__(self, initial, minimum, maximum, target_latency=DEFAULT_BATCH_LATENCY, fixed=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.fixed = fixed
+        self.size = int(fixed or initial)
+        self.history = deque([self.size], maxlen=1024)
+
+    def record(self, units, elapsed):
+        """上报一个批次的处理量与耗时"""
+        if self.fixed or units <= 0:
+            return
+        if elapsed <= 0:
+            ratio = 2.0
+        else:
+            # 单次调整幅度限制在0.5~2倍之间，避免个别慢批次造成抖动
+            ratio = min(2.0, max(0.5, self.target_latency / (elapsed / units * self.size)))
+        size = int(min(self.maximum, max(self.minimum, self.size * ratio)))
+        if size != self.size:
+            self.size = size
+            self.history.append(size)
+
+    def summary(self):
+        sizes = list(self.history)
+        return {
+            'fixed': bool(self.fixed),
+            'current': self.size,
+            'min': min(sizes),
+            'max': max(sizes),
+            'adjustments': len(sizes) - 1,
+        }
+
+
+def iter_batches(stream, tuner):
+    """把字典流拆成批次任务，批大小取自tuner；meta为 (批次最后一个单词, 块结束偏移或None)"""
+    for words, offset in stream:
+        i = 0
+        while i < len(words):
+            batch = words[i:i + tuner.size]
+            i += len(batch)
+            yield (batch, i), (batch[-1], offset if i >= len(words) else None)
+
+
+class ThroughputMeter:
+    """指数加权的吞吐量估计，近期速度权重更高，剩余时间预测不会被早期速度拖累
+
+    采样间隔可以不均匀，权重按 half_life 换算，因此定时器抖动不影响结果。
+    """
+
+    def __init__(self, half_life=THROUGHPUT_HALF_LIFE, rate=None):
+        self.half_life = half_life
+        # rate 可用历史速度(如检查点中保存的值)作为初始估计
+        self.rate = rate
+        self._last = None
+
+    def update(self, processed, now=None):
+        """上报累计处理量，返回当前估计速度(单位/秒)，样本不足时为None"""
+        now = time.monotonic() if now is None else now
+        if self._last is None:
+            self._last = (now, processed)
+            return self.rate
+        last_time, last_processed = self._last
+        dt = now - last_time
+        if dt <= 0:
+            return self.rate
+        sample = (processed - last_processed) / dt
+        if self.rate is None:
+            self.rate = sample
+        else:
+            self.rate += (1 - 0.5 ** (dt / self.half_life)) * (sample - self.rate)
+        self._last = (now, processed)
+        return self.rate
+
+    def eta(self, remaining):
+        """按当前速度估计剩余秒数，尚无有效速度时返回None"""
+        if not self.rate or self.rate <= 0:
+            return None
+        return max(0.0, remaining / self.rate)
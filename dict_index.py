@@ -0,0 +1,181 @@
+"""字典MD5索引：按摘要排序的二进制索引文件，支持在mmap上二分查找
+
+索引文件结构:
+    头部  MAGIC(6) 版本(u16) 源文件大小(u64) 源文件mtime_ns(u64) 记录数(u64)
+    记录  MD5摘要(16字节) + 该单词所在行的字节偏移(u64)，按摘要升序排列
+源文件的大小或修改时间变化后索引即视为过期，需要重建。
+"""
+import os
+import mmap
+import heapq
+import struct
+import hashlib
+import tempfile
+
+from crack_core import decode_word, normalize_line
+
+MAGIC = b'MD5IDX'
+VERSION = 2
+HEADER = struct.Struct('<6sHQQQ')
+RECORD = struct.Struct('<16sQ')
+# 外部排序时每个有序段的记录数，约占用 RUN_RECORDS * 24 字节内存
+RUN_RECORDS = 1_000_000
+
+
+class IndexBuildCancelled(Exception):
+    pass
+
+
+def index_path_for(file_path, index_dir):
+    """根据字典的绝对路径得到索引文件位置"""
+    key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(index_dir, f"{key}.md5idx")
+
+
+def _source_signature(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _iter_records(file_path, on_progress=None, should_stop=None):
+    """逐行产生 (摘要+偏移) 记录，单词规范化方式与扫描线程一致"""
+    total = os.path.getsize(file_path)
+    pack = RECORD.pack
+    md5 = hashlib.md5
+    with open(file_path, 'rb') as f:
+        offset = 0
+        for lineno, line in enumerate(f):
+            if lineno % 65536 == 0:
+                if should_stop and should_stop():
+                    raise IndexBuildCancelled()
+                if on_progress:
+                    on_progress(offset, total)
+            word = normalize_line(line)
+            if word:
+                yield pack(md5(word).digest(), offset)
+            offset += len(line)
+    if on_progress:
+        on_progress(total, total)
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            record = f.read(RECORD.size)
+            if len(record) < RECORD.size:
+                return
+            yield record
+
+
+def build_index(file_path, index_path, on_progress=None, should_stop=None):
+    """为字典构建排序索引，使用外部归并排序保证内存占用有上限"""
+    size, mtime_ns = _source_signature(file_path)
+    index_dir = os.path.dirname(index_path) or '.'
+    os.makedirs(index_dir, exist_ok=True)
+    runs = []
+    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=index_dir)
+    try:
+        buffer = []
+        for record in _iter_records(file_path, on_progress, should_stop):
+            buffer.append(record)
+            if len(buffer) >= RUN_RECORDS:
+                runs.append(_write_run(buffer, index_dir))
+                buffer = []
+        buffer.sort()
+        count = 0
+        with os.fdopen(fd, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, VERSION, size, mtime_ns, 0))
+            if runs:
+                runs.append(_write_run(buffer, index_dir))
+                merged = heapq.merge(*(_read_run(path) for path in runs))
+            else:
+                merged = buffer
+            for record in merged:
+                out.write(record)
+                count += 1
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, VERSION, size, mtime_ns, count))
+        os.replace(tmp_path, index_path)
+        return count
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        for path in runs:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _write_run(buffer, index_dir):
+    buffer.sort()
+    fd, path = tempfile.mkstemp(suffix='.run', dir=index_dir)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(buffer))
+    return path
+
+
+def index_status(file_path, index_path):
+    """返回索引状态: 'missing' / 'stale' / 'valid'"""
+    if not os.path.isfile(index_path):
+        return 'missing'
+    try:
+        with open(index_path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return 'stale'
+        magic, version, size, mtime_ns, _ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            return 'stale'
+        if (size, mtime_ns) != _source_signature(file_path):
+            return 'stale'
+        return 'valid'
+    except OSError:
+        return 'stale'
+
+
+class DictionaryIndex:
+    """已构建索引的只读视图，查询为O(log n)的二分查找"""
+
+    def __init__(self, file_path, index_path):
+        self.file_path = file_path
+        self.index_path = index_path
+        self._file = open(index_path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, _, _, self.count = HEADER.unpack_from(self._mm, 0)
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _digest_at(self, i):
+        start = HEADER.size + i * RECORD.size
+        return self._mm[start:start + 16]
+
+    def find_offset(self, digest):
+        """查找摘要对应的行偏移，不存在时返回None"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._digest_at(mid) < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._digest_at(lo) == digest:
+            return RECORD.unpack_from(self._mm, HEADER.size + lo * RECORD.size)[1]
+        return None
+
+    def lookup(self, target_hash):
+        """按十六进制哈希查询明文，不存在时返回None"""
+        offset = self.find_offset(bytes.fromhex(target_hash))
+        if offset is None:
+            return None
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            return decode_word(normalize_line(f.readline()))
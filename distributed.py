@@ -0,0 +1,581 @@
+"""分布式破解：协调端把字典或掩码的keyspace切分为工作单元，通过TCP分发给多台机器上的工作端
+
+协议为每行一个JSON对象(UTF-8)，工作端主动连接协调端:
+    工作端 -> 协调端
+        hello      {name, version, token}        连接后第一条消息
+        request    {}                            请求下一个工作单元
+        heartbeat  {unit, processed, words}      定时发送，同时上报当前单元进度
+        found      {unit, hash, plain}           命中后立即上报
+        done       {unit, words}                 单元完成
+        error      {message}                     无法继续(如本地字典与协调端不一致)
+    协调端 -> 工作端
+        job        {spec}                        任务描述：字典签名与规则，或掩码
+        unit       {id, start, end, targets}     工作单元：字典字节区间或掩码序号区间
+        wait       {seconds}                     暂无可分配单元，稍后再请求
+        solved     {hash}                        某个目标已被破解(目标尚未全部命中时)
+        stop       {}                            全部完成、目标全部命中或被停止
+        error      {message}                     握手失败
+
+工作端用与图形界面相同的 engine.create_crack_job 处理每个单元，本地可选线程或进程引擎。
+协调端在超过 heartbeat_timeout 秒收不到某个工作端的任何消息或连接断开时，把它手上的
+单元放回队首重新分配；目标全部命中时立即通知所有工作端停止。尚有目标未命中时，
+每次命中也会通知所有工作端(solved)：新单元只携带剩余目标，正在运行的线程引擎单元在
+某个盐的目标全部破解后不再计算这个盐。
+字典不经网络传输，工作端按文件名在本地查找，并用大小和首尾内容的摘要确认是同一个文件。
+"""
+import os
+import json
+import hmac
+import queue
+import socket
+import hashlib
+import logging
+import threading
+import socketserver
+from collections import deque
+
+from checkpoint import seed_found
+from crack_core import estimate_words, normalize_target
+from rules import compile_rules
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 7788
+DEFAULT_ADDRESS = f"127.0.0.1:{DEFAULT_PORT}"
+# 工作端发送心跳的间隔与协调端判定工作端失联的超时(秒)
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 15.0
+# 字典工作单元的字节数(使用规则时按规则数缩小)与掩码工作单元的候选数
+DICT_UNIT_BYTES = 64 * 1024 * 1024
+MIN_DICT_UNIT_BYTES = 1024 * 1024
+MASK_UNIT_SIZE = 50_000_000
+# 计算字典摘要时读取的首尾字节数
+FINGERPRINT_BYTES = 1024 * 1024
+CONNECT_TIMEOUT = 10.0
+# 单条消息的字节上限：工作端发来的消息都很短，协调端下发的工作单元附带全部剩余目标
+MAX_MESSAGE_BYTES = 1024 * 1024
+MAX_UNIT_MESSAGE_BYTES = 256 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    """"host:port" -> (host, port)，省略端口时使用默认端口"""
+    host, sep, port = address.rpartition(':')
+    if not sep:
+        return address or '127.0.0.1', default_port
+    return host.strip('[]') or '0.0.0.0', int(port)
+
+
+def dictionary_fingerprint(file_path):
+    """字典的大小与首尾内容摘要，用于确认不同机器上的字典是同一个文件"""
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha1(str(size).encode('ascii'))
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return {'name': os.path.basename(file_path), 'size': size, 'fingerprint': digest.hexdigest()}
+
+
+def resolve_dictionary(spec, paths=(), directories=()):
+    """在本机查找与任务描述一致的字典：依次尝试指定路径、目录中的同名文件和协调端上的原路径"""
+    candidates = list(paths)
+    candidates += [os.path.join(directory, spec['name']) for directory in directories]
+    candidates.append(spec.get('path', ''))
+    for path in candidates:
+        if path and os.path.isfile(path) and os.path.getsize(path) == spec['size'] and \
+                dictionary_fingerprint(path)['fingerprint'] == spec['fingerprint']:
+            return path
+    return None
+
+
+class _Connection:
+    """JSON Lines连接，发送加锁以便多个线程共用；超过 max_bytes 的消息视为协议错误"""
+
+    def __init__(self, sock, max_bytes):
+        self.sock = sock
+        self.rfile = sock.makefile('rb')
+        self.max_bytes = max_bytes
+        self._send_lock = threading.Lock()
+
+    def send(self, msg_type, **fields):
+        data = json.dumps(dict(fields, type=msg_type), ensure_ascii=False).encode('utf-8') + b'\n'
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def receive(self):
+        """读取一条消息，连接关闭时返回None"""
+        # 限制读取长度，未通过令牌校验的连接也无法让对端无限占用内存
+        line = self.rfile.readline(self.max_bytes + 1)
+        if not line:
+            return None
+        if len(line) > self.max_bytes:
+            raise ProtocolError(f"消息超过 {self.max_bytes} 字节")
+        try:
+            message = json.loads(line)
+        except ValueError:
+            raise ProtocolError(f"无法解析的消息: {line[:80]!r}") from None
+        if not isinstance(message, dict) or 'type' not in message:
+            raise ProtocolError(f"缺少消息类型: {line[:80]!r}")
+        return message
+
+    def finish(self):
+        """只关闭发送方向：对端读完已发出的消息后才看到连接结束
+
+        直接 close() 时若本端还有未读的数据，系统会发出RST，对端可能丢掉尚未读取的stop。
+        """
+        try:
+            self.sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    def drain(self):
+        """丢弃对端发来的数据直到对端关闭(受socket超时限制)，之后 close() 不会发出RST"""
+        try:
+            while self.rfile.read1(65536):
+                pass
+        except (OSError, ValueError):
+            pass
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.rfile.close()
+        self.sock.close()
+
+
+class _Peer:
+    """协调端眼中的一个工作端连接"""
+
+    def __init__(self, connection, address):
+        self.connection = connection
+        self.address = address
+        self.name = f"{address[0]}:{address[1]}"
+        # 单元编号 -> (已处理量, 单词数)
+        self.units = {}
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.server.coordinator._serve_peer(self.request, self.client_address)
+
+
+class Coordinator:
+    """协调端，接口与其他破解任务一致：run(on_progress, on_result) 与 stop()
+
+    settings.coordinator 为监听地址 "host:port"，端口为0时由系统分配，实际地址见 address。
+    settings.token 不为空时工作端必须提供相同的令牌。file_path 为字典路径，
+    settings.mask 不为空时改为切分掩码keyspace；settings.rules 由工作端在本地展开。
+    进度计数器包含已完成单元和各工作端心跳上报的在途进度。
+    """
+
+    def __init__(self, target_hashes, file_path=None, settings=None):
+        settings = settings or {}
+        self.target_hashes = [normalize_target(h) for h in target_hashes]
+        self.remaining = set(self.target_hashes)
+        self.found = {}
+        self.token = settings.get('token') or ''
+        self.heartbeat_timeout = settings.get('heartbeat_timeout', HEARTBEAT_TIMEOUT)
+        rule_lines = list(settings.get('rules') or [])
+        self.rule_count = len(compile_rules(rule_lines)) or 1
+        self.mask = None
+        if settings.get('mask'):
+            from mask import Mask, split_keyspace
+            charsets = settings.get('charsets') or {}
+            self.mask = Mask(settings['mask'], charsets)
+            self.spec = {'kind': 'mask', 'mask': settings['mask'], 'charsets': charsets}
+            self.total_bytes = self.mask.keyspace
+            units = split_keyspace(self.mask.keyspace, settings.get('unit_size') or MASK_UNIT_SIZE)
+        else:
+            # 进程引擎模块导入较慢，协调端只用到其中的区间切分
+            from process_engine import split_ranges
+            self.spec = dict(dictionary_fingerprint(file_path), kind='dict',
+                             path=os.path.abspath(file_path), rules=rule_lines)
+            self.total_bytes = self.spec['size']
+            unit_bytes = settings.get('unit_size') or \
+                max(MIN_DICT_UNIT_BYTES, DICT_UNIT_BYTES // self.rule_count)
+            units = split_ranges(file_path, unit_bytes)
+        # 哈希算法随任务描述下发，为空时工作端使用MD5
+        self.spec['hash_type'] = settings.get('hash_type')
+        self.units = dict(enumerate(units))
+        self._pending = deque(self.units)
+        self._done_units = set()
+        self._done_bytes = 0
+        self._done_words = 0
+        self.peers = set()
+        self.current_word = b''
+        self.resumed = False
+        self.checkpoint = None
+        seed_found(self.remaining, self.found, cracked=settings.get('cracked'))
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._finished = threading.Event()
+        self._stopped = False
+        # 在构造时就绑定端口，地址被占用等错误可以立即报告
+        self._server = _Server(parse_address(settings.get('coordinator') or DEFAULT_ADDRESS), _Handler)
+        self._server.coordinator = self
+        self.address = self._server.server_address[:2]
+
+    @property
+    def processed_bytes(self):
+        with self._lock:
+            return self._done_bytes + sum(p for peer in self.peers for p, _ in peer.units.values())
+
+    @property
+    def processed_words(self):
+        with self._lock:
+            return self._done_words + sum(w for peer in self.peers for _, w in peer.units.values())
+
+    def keyspace(self):
+        """候选总数：掩码为精确值，字典为估计的单词数 × 规则数"""
+        if self.mask is not None:
+            return self.mask.keyspace
+        return estimate_words(self.processed_words, self.processed_bytes, self.total_bytes) * self.rule_count
+
+    def worker_count(self):
+        with self._lock:
+            return len(self.peers)
+
+    def run(self, on_progress=None, on_result=None):
+        """开始监听并分发工作单元，直到全部完成、目标全部命中或被停止"""
+        if on_result:
+            for target, word in self.found.items():
+                on_result(target, word)
+        if not self.remaining or not self.units:
+            self._server.server_close()
+            return True
+        server_thread = threading.Thread(target=self._server.serve_forever, name="Coordinator", daemon=True)
+        server_thread.start()
+        try:
+            # 回调统一在调用run的线程中执行，与其他任务保持一致
+            while not (self._finished.is_set() and self._events.empty()):
+                try:
+                    event = self._events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if event[0] == 'found' and on_result:
+                    on_result(event[1], event[2])
+                elif event[0] == 'progress' and on_progress:
+                    on_progress(self.processed_bytes, self.total_bytes, self.processed_words, '')
+            return not self._stopped
+        finally:
+            self._finish()
+            self._server.shutdown()
+            self._server.server_close()
+            with self._lock:
+                peers = list(self.peers)
+            # 各连接由其处理线程在工作端断开后关闭
+            for peer in peers:
+                peer.connection.finish()
+
+    def stop(self):
+        self._stopped = True
+        self._finish()
+
+    def _finish(self):
+        """结束任务并通知全部工作端停止"""
+        if self._finished.is_set():
+            return
+        self._finished.set()
+        self._broadcast('stop')
+
+    def _broadcast(self, msg_type, **fields):
+        with self._lock:
+            peers = list(self.peers)
+        for peer in peers:
+            try:
+                peer.connection.send(msg_type, **fields)
+            except OSError:
+                pass
+
+    def _serve_peer(self, sock, address):
+        sock.settimeout(self.heartbeat_timeout)
+        peer = _Peer(_Connection(sock, MAX_MESSAGE_BYTES), address)
+        try:
+            if not self._handshake(peer):
+                return
+            while not self._finished.is_set():
+                message = peer.connection.receive()
+                if message is None:
+                    break
+                self._handle(peer, message)
+        except (OSError, ProtocolError) as e:
+            # socket.timeout 也是OSError：超过心跳超时没有任何消息即视为失联
+            if not self._finished.is_set():
+                logging.error(f"工作端 {peer.name} 连接中断: {str(e)}")
+        finally:
+            self._release(peer)
+            if self._finished.is_set():
+                # _finish 广播时本连接可能已被移出 peers，重发stop(工作端只处理第一条)；
+                # 等工作端读到stop并断开后再关闭本端
+                try:
+                    peer.connection.send('stop')
+                except OSError:
+                    pass
+                peer.connection.finish()
+                peer.connection.drain()
+            peer.connection.close()
+
+    def _handshake(self, peer):
+        hello = peer.connection.receive()
+        if hello is None or hello.get('type') != 'hello':
+            raise ProtocolError("第一条消息必须是hello")
+        if hello.get('version') != PROTOCOL_VERSION:
+            peer.connection.send('error', message=f"协议版本不一致: {hello.get('version')}")
+            return False
+        if not hmac.compare_digest(str(hello.get('token', '')), self.token):
+            peer.connection.send('error', message="令牌错误")
+            return False
+        peer.name = f"{hello.get('name') or peer.address[0]}@{peer.address[0]}:{peer.address[1]}"
+        with self._lock:
+            if self._finished.is_set():
+                peer.connection.send('stop')
+                return False
+            self.peers.add(peer)
+        peer.connection.send('job', spec=self.spec)
+        return True
+
+    def _handle(self, peer, message):
+        kind = message['type']
+        if kind == 'request':
+            self._assign(peer)
+        elif kind == 'heartbeat':
+            with self._lock:
+                if message.get('unit') not in peer.units:
+                    return
+                peer.units[message['unit']] = (message.get('processed', 0), message.get('words', 0))
+            self._events.put(('progress',))
+        elif kind == 'found':
+            self._record_hit(message.get('hash', ''), message.get('plain', ''))
+        elif kind == 'done':
+            self._complete(peer, message.get('unit'), message.get('words', 0))
+        elif kind == 'error':
+            raise ProtocolError(message.get('message', ''))
+        else:
+            raise ProtocolError(f"未知的消息类型: {kind}")
+
+    def _assign(self, peer):
+        with self._lock:
+            if self._finished.is_set():
+                reply = ('stop', {})
+            elif self._pending:
+                unit_id = self._pending.popleft()
+                peer.units[unit_id] = (0, 0)
+                start, end = self.units[unit_id]
+                reply = ('unit', {'id': unit_id, 'start': start, 'end': end,
+                                  'targets': sorted(self.remaining)})
+            else:
+                # 剩余单元都在其他工作端手上，等待它们完成或失联后重新分配
+                reply = ('wait', {'seconds': 1.0})
+        peer.connection.send(reply[0], **reply[1])
+
+    def _record_hit(self, target, plain):
+        with self._lock:
+            if target not in self.remaining:
+                return
+            self.remaining.discard(target)
+            self.found[target] = plain
+            all_found = not self.remaining
+        self._events.put(('found', target, plain))
+        if all_found:
+            self._finish()
+        else:
+            self._broadcast('solved', hash=target)
+
+    def _complete(self, peer, unit_id, words):
+        with self._lock:
+            if peer.units.pop(unit_id, None) is None or unit_id in self._done_units:
+                return
+            self._done_units.add(unit_id)
+            start, end = self.units[unit_id]
+            self._done_bytes += end - start
+            self._done_words += words
+            all_done = len(self._done_units) == len(self.units)
+        self._events.put(('progress',))
+        if all_done:
+            self._finish()
+
+    def _release(self, peer):
+        """工作端断开：未完成的单元放回队首，优先重新分配"""
+        with self._lock:
+            self.peers.discard(peer)
+            lost = [unit_id for unit_id in peer.units if unit_id not in self._done_units]
+            peer.units.clear()
+            self._pending.extendleft(reversed(lost))
+        if lost and not self._finished.is_set():
+            logging.error(f"工作端 {peer.name} 失联，重新分配 {len(lost)} 个工作单元")
+
+
+class Worker:
+    """工作端：连接协调端，逐个领取工作单元并用本地引擎处理
+
+    settings 为本地引擎配置(engine、workers、threads等)；dictionaries 与 dictionary_dirs
+    用于在本机查找协调端字典对应的文件。on_event(类型, 字段字典) 可用于输出日志。
+    """
+
+    def __init__(self, address, settings=None, dictionaries=(), dictionary_dirs=(), name=None,
+                 token='', heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.address = parse_address(address)
+        self.settings = {key: value for key, value in (settings or {}).items()
+                         if key not in ('coordinator', 'checkpoint_dir', 'cracked')}
+        self.dictionaries = list(dictionaries)
+        self.dictionary_dirs = list(dictionary_dirs)
+        self.name = name or socket.gethostname()
+        self.token = token
+        self.heartbeat_interval = heartbeat_interval
+        self.units_done = 0
+        self.job = None
+        # 协调端通知的已破解目标，读取线程与主循环都会用它更新当前任务
+        self.solved = set()
+        self._solved_lock = threading.Lock()
+        # 协调端主动通知停止(任务结束)，区别于连接断开和本地停止
+        self.finished = False
+        self._unit = None
+        self._connection = None
+        self._reader = None
+        self._replies = queue.Queue()
+        self._stop_event = threading.Event()
+
+    def run(self, on_event=None):
+        """处理工作单元直到协调端通知停止，返回True；连接断开或本地停止时返回False"""
+        on_event = on_event or (lambda kind, fields: None)
+        sock = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+        sock.settimeout(None)
+        self._connection = _Connection(sock, MAX_UNIT_MESSAGE_BYTES)
+        try:
+            self._connection.send('hello', name=self.name, version=PROTOCOL_VERSION, token=self.token)
+            message = self._connection.receive()
+            if message is None or message['type'] == 'stop':
+                return True
+            if message['type'] != 'job':
+                raise ProtocolError(message.get('message') or f"握手失败: {message['type']}")
+            spec = message['spec']
+            file_path = None
+            if spec['kind'] == 'dict':
+                file_path = resolve_dictionary(spec, self.dictionaries, self.dictionary_dirs)
+                if file_path is None:
+                    self._connection.send('error', message=f"本地没有找到一致的字典 {spec['name']}")
+                    raise ProtocolError(f"本地没有找到与协调端一致的字典: {spec['name']}")
+            on_event('job', {'spec': spec, 'dictionary': file_path})
+            self._reader = threading.Thread(target=self._read_loop, name="WorkerReader", daemon=True)
+            self._reader.start()
+            threading.Thread(target=self._heartbeat_loop, name="WorkerHeartbeat", daemon=True).start()
+            return self._work_loop(spec, file_path, on_event)
+        except OSError:
+            # 协调端通知停止后随即关闭连接，此时的发送失败不算错误；
+            # 发送可能先于读取线程看到stop而失败，等读取线程读完已收到的消息再判断
+            if self._reader is not None:
+                self._reader.join(CONNECT_TIMEOUT)
+            if self.finished:
+                return True
+            raise
+        finally:
+            self._stop_event.set()
+            self._connection.close()
+
+    def stop(self):
+        self._stop_event.set()
+        job = self.job
+        if job is not None:
+            job.stop()
+
+    def _read_loop(self):
+        """后台读取协调端消息：stop立即停止当前单元，solved更新当前单元的目标，其余交给主循环"""
+        try:
+            while True:
+                message = self._connection.receive()
+                if message is None:
+                    break
+                if message['type'] == 'stop':
+                    self.finished = True
+                    self._replies.put(message)
+                    self.stop()
+                    return
+                if message['type'] == 'solved':
+                    self._drop_solved(message.get('hash', ''))
+                    continue
+                self._replies.put(message)
+        except (OSError, ProtocolError):
+            pass
+        self._replies.put(None)
+        self.stop()
+
+    def _heartbeat_loop(self):
+        while not self._stop_event.wait(self.heartbeat_interval):
+            unit, job = self._unit, self.job
+            try:
+                if unit is not None and job is not None:
+                    processed, words = self._unit_progress(unit, job)
+                    self._connection.send('heartbeat', unit=unit['id'], processed=processed, words=words)
+                else:
+                    self._connection.send('heartbeat')
+            except OSError:
+                return
+
+    def _drop_solved(self, target=None):
+        """记录已破解的目标并从当前任务中去掉；进程引擎等不支持的任务照常运行到单元结束"""
+        with self._solved_lock:
+            if target:
+                self.solved.add(target)
+            drop = getattr(self.job, 'drop_targets', None)
+            if drop is not None and self.solved:
+                drop(frozenset(self.solved))
+
+    @staticmethod
+    def _unit_progress(unit, job):
+        """单元内已处理量(字节或序号)与单词数；掩码任务的 processed_words 即序号"""
+        processed = max(0, job.processed_bytes - unit['start'])
+        words = processed if getattr(job, 'mask', None) is not None else job.processed_words
+        return processed, words
+
+    def _work_loop(self, spec, file_path, on_event):
+        from engine import create_crack_job
+        while not self._stop_event.is_set():
+            self._connection.send('request')
+            message = self._replies.get()
+            if message is None:
+                return False
+            if message['type'] == 'stop':
+                return True
+            if message['type'] == 'wait':
+                self._stop_event.wait(message.get('seconds', 1.0))
+                continue
+            if message['type'] != 'unit':
+                raise ProtocolError(f"意外的消息: {message['type']}")
+            settings = dict(self.settings, start_offset=message['start'], end_offset=message['end'],
+                            hash_type=spec.get('hash_type'))
+            if spec['kind'] == 'mask':
+                settings.update(mask=spec['mask'], charsets=spec.get('charsets') or {})
+            else:
+                settings['rules'] = spec.get('rules') or []
+            unit = message
+
+            def on_result(target, word, unit_id=unit['id']):
+                self._connection.send('found', unit=unit_id, hash=target, plain=word)
+                on_event('found', {'unit': unit_id, 'hash': target, 'plain': word})
+
+            self.job = create_crack_job(file_path, unit['targets'], settings)
+            # 单元分配之后、任务创建之前收到的 solved
+            self._drop_solved()
+            self._unit = unit
+            on_event('unit', {'unit': unit['id'], 'start': unit['start'], 'end': unit['end']})
+            # stop() 可能发生在任务对象创建之前
+            completed = not self._stop_event.is_set() and self.job.run(None, on_result)
+            _, words = self._unit_progress(unit, self.job)
+            self._unit = None
+            if not completed:
+                return self.finished
+            self._connection.send('done', unit=unit['id'], words=words)
+            self.units_done += 1
+            on_event('done', {'unit': unit['id'], 'words': words})
+        return self.finished
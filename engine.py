@@ -0,0 +1,616 @@
+"""Qt无关的破解任务：GUI线程和命令行共用同一套引擎
+
+任务对象统一提供 run(on_progress, on_result) 与 stop() 两个接口：
+    on_progress(processed_bytes, total_bytes, processed_words, current_word)
+    on_result(...) 参数由具体任务决定
+进度同时记录在任务的 processed_bytes / processed_words / current_word 属性上，
+界面可以用 crack_core.progress_snapshot 定时轮询，而不必传入 on_progress。
+run 返回True表示正常结束（扫描完毕或目标全部命中），False表示被外部停止。
+"""
+import os
+import re
+import time
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+from crack_core import (IN_FLIGHT_PER_WORKER, BatchTuner, crack_batch, decode_word, digest_targets,
+                        drop_solved_salts, estimate_words, iter_batches, map_bounded, normalize_target)
+from checkpoint import checkpoint_identity, dictionary_source, make_checkpointer, seed_found
+from dedup import DEFAULT_ERROR_RATE, BloomFilter
+from hash_kernels import get_kernel
+from instrumentation import RunStats, timed_iter, worker_name
+from mask import Mask, split_keyspace
+from ordering import order_dictionaries
+from regex_compiler import PatternSet
+from rules import compile_rules, expand
+from wordlist import WordlistStream, dictionary_cache, estimate_line_count
+
+# 线程池单个任务处理的初始单词数及自动调节范围
+BATCH_SIZE = 1000
+MIN_BATCH_SIZE = 64
+MAX_BATCH_SIZE = 200_000
+# 线程引擎的工作线程数
+THREAD_WORKERS = 4
+# 掩码模式每个任务的初始候选数及自动调节范围
+MASK_BATCH_SIZE = 100_000
+MIN_MASK_BATCH_SIZE = 1_000
+MAX_MASK_BATCH_SIZE = 50_000_000
+# 去重为auto时，每个单词至少展开为这么多个候选才启用(一次过滤器查询约为两次多MD5)
+DEDUP_MIN_RULES = 8
+# 去重过滤器默认内存上限(MB)
+DEDUP_MEMORY_MB = 256
+
+# 目标为32位十六进制哈希，加盐算法后接 ":盐"
+HASH_RE = re.compile(r'^[a-f0-9]{32}(?::.*)?$')
+
+
+def valid_hashes(target_hashes):
+    return bool(target_hashes) and all(HASH_RE.match(h) for h in target_hashes)
+
+
+def make_batch_tuner(settings):
+    """按配置创建批大小调节器，settings.batch_size 可固定批大小"""
+    settings = settings or {}
+    return BatchTuner(BATCH_SIZE, MIN_BATCH_SIZE, MAX_BATCH_SIZE,
+                      settings.get('batch_latency_ms', 50) / 1000, settings.get('batch_size'))
+
+
+def create_crack_job(file_path, target_hashes, settings=None):
+    """根据 settings.engine 创建线程池或进程池破解任务
+
+    settings.mask 不为空时为掩码任务；file_path 为列表时依次扫描全部字典。
+    settings.coordinator 为监听地址时创建分布式协调端，由连接上来的工作端完成破解。
+    """
+    settings = settings or {}
+    if settings.get('coordinator'):
+        if isinstance(file_path, (list, tuple)):
+            raise ValueError("分布式破解一次只能使用一个字典")
+        from distributed import Coordinator
+        return Coordinator(target_hashes, file_path, settings)
+    if settings.get('mask'):
+        return MaskJob(settings['mask'], target_hashes, settings)
+    if isinstance(file_path, (list, tuple)):
+        return MultiDictJob(file_path, target_hashes, settings)
+    if settings.get('engine', 'thread') == 'process':
+        # multiprocessing导入较慢，只在选用进程引擎时才加载，保证命令行启动速度
+        from process_engine import ProcessCrackEngine
+        return ProcessCrackEngine(file_path, target_hashes, settings.get('workers'),
+                                  settings.get('chunk_bytes'),
+                                  settings.get('batch_latency_ms', 50) / 1000,
+                                  settings.get('rules'), settings)
+    return CrackJob(file_path, target_hashes, settings)
+
+
+class CrackJob:
+    """线程池字典破解，on_result(十六进制哈希, 明文)
+
+    settings.rules 为变形规则行列表时，每个基础单词在工作线程内按规则逐个展开为候选。
+    settings.priority 为优先候选(bytes列表，如历史命中最多的口令)，在扫描字典之前先行计算。
+    settings.hash_type 为 hash_kernels 中注册的算法名，默认MD5；加盐算法的目标写作 hash:salt。
+    settings.checkpoint_dir 不为空时定期保存已完成的块偏移，相同输入的任务从中断处继续。
+    settings.start_offset 与 settings.dedup_filter 由 MultiDictJob 传入，分别为起始偏移
+    和各字典共用的去重过滤器；settings.end_offset 限定只扫描到该偏移(分布式工作单元)，
+    两个偏移都必须位于行首。各阶段耗时记录在 stats(instrumentation.RunStats)中，
+    settings.stats 可传入共用的统计对象。
+    """
+
+    def __init__(self, file_path, target_hashes, settings=None):
+        settings = settings or {}
+        self.target_hashes = [normalize_target(h) for h in target_hashes]
+        self.remaining = set(self.target_hashes)
+        self.kernel = get_kernel(settings.get('hash_type'))
+        self.targets = digest_targets(self.target_hashes, self.kernel)
+        self.tuner = make_batch_tuner(settings)
+        self.threads = settings.get('threads') or THREAD_WORKERS
+        rule_lines = list(settings.get('rules') or [])
+        self.rules = compile_rules(rule_lines)
+        self.rule_count = len(self.rules) or 1
+        self.dedup = settings.get('dedup_filter')
+        self.priority = list(settings.get('priority') or [])
+        self.stats = settings.get('stats') or RunStats()
+        self.processed_words = 0
+        self.processed_bytes = settings.get('start_offset', 0)
+        self.skipped_words = 0
+        self.current_word = b''
+        self.found = {}
+        self.checkpoint = make_checkpointer(settings, checkpoint_identity(
+            'dict', dictionary_source(file_path), self.target_hashes, rule_lines, self.kernel.name))
+        state = self.checkpoint.load() if self.checkpoint else None
+        self.resumed = state is not None
+        seed_found(self.remaining, self.found, state, settings.get('cracked'))
+        if state:
+            self.processed_bytes = state['position']
+            self.processed_words = state['processed_words']
+        # 最近一个块结束时的单词数，与processed_bytes对应，用于推算总单词数和保存检查点
+        self._words_at_offset = self.processed_words
+        self.stream = WordlistStream(file_path, start_offset=self.processed_bytes,
+                                     end_offset=settings.get('end_offset'), cache=dictionary_cache(settings),
+                                     stats=self.stats)
+        self.total_bytes = self.stream.total_bytes
+        self._stop_event = threading.Event()
+
+    def keyspace(self):
+        """候选总数 = 单词数 × 规则数，扫描结束前单词数为估计值"""
+        words = self._words_at_offset if self.processed_bytes else self.processed_words
+        return estimate_words(words, self.processed_bytes, self.total_bytes) * self.rule_count
+
+    def run(self, on_progress=None, on_result=None):
+        if on_result:
+            for target, word in self.found.items():
+                on_result(target, word)
+        if not self.remaining:
+            return True
+        executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='crack')
+        # 只保持有限个批次在途，结果按提交顺序回收，命中或停止时立即取消剩余任务
+        results = timed_iter(map_bounded(executor, self._process_batch,
+                                         iter_batches(self.stream, self.tuner),
+                                         self.threads * IN_FLIGHT_PER_WORKER, self._stop_event.is_set),
+                             self.stats)
+        completed = False
+        try:
+            if self._crack_priority(on_result):
+                completed = True
+                return True
+            with closing(results):
+                for (last_word, offset), (hits, count, skipped, elapsed) in results:
+                    self.tuner.record(count, elapsed)
+                    self.stats.sample('queue_depth', self.stream.queue_depth)
+                    for target, word in hits:
+                        if target in self.remaining:
+                            self.remaining.discard(target)
+                            self.found[target] = decode_word(word)
+                            if on_result:
+                                on_result(target, self.found[target])
+                    # 停止后的批次可能被跳过，不再推进已完成位置
+                    if self._stop_event.is_set():
+                        break
+                    self.processed_words += count
+                    self.skipped_words += skipped
+                    self.current_word = last_word
+                    if offset is not None:
+                        self.processed_bytes = offset
+                        self._words_at_offset = self.processed_words
+                        if self.checkpoint:
+                            self.checkpoint.update(self.processed_bytes, self.processed_words,
+                                                   self.remaining, self.found)
+                        if on_progress:
+                            on_progress(self.processed_bytes, self.total_bytes, self.processed_words,
+                                        decode_word(last_word)[:20])
+                    if not self.remaining:
+                        completed = True
+                        return True
+            completed = not self._stop_event.is_set()
+            return completed
+        finally:
+            self.stream.stop()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.checkpoint:
+                self.checkpoint.finish(completed, self.processed_bytes, self._words_at_offset,
+                                       self.remaining, self.found)
+
+    def _crack_priority(self, on_result):
+        """扫描字典之前先计算优先候选，返回目标是否已全部命中"""
+        if not self.priority:
+            return False
+        began = time.perf_counter()
+        for target, word in crack_batch(self.priority, self.targets, self.kernel):
+            if target in self.remaining:
+                self.remaining.discard(target)
+                self.found[target] = decode_word(word)
+                if on_result:
+                    on_result(target, self.found[target])
+        # 没有规则时字典中的同一单词无需再算一次；有规则时其变形尚未尝试，不能跳过
+        if self.dedup is not None and not self.rules:
+            self.dedup.add_new(self.priority)
+        self.stats.add_time('priority', time.perf_counter() - began)
+        return not self.remaining
+
+    def _process_batch(self, batch, end_index):
+        if self._stop_event.is_set():
+            return [], 0, 0, 0.0
+        start = time.perf_counter()
+        # 去重在规则展开之前进行，跳过一个重复单词即省下它的全部变形
+        fresh = self.dedup.add_new(batch) if self.dedup is not None else batch
+        deduped = time.perf_counter()
+        hits = crack_batch(expand(fresh, self.rules) if self.rules else fresh, self.targets, self.kernel)
+        elapsed = time.perf_counter() - start
+        if self.dedup is not None:
+            self.stats.add_time('dedup', deduped - start)
+        self.stats.add_time('hash', elapsed - (deduped - start))
+        self.stats.batch(worker_name(), len(batch), elapsed)
+        return hits, len(batch), len(batch) - len(fresh), elapsed
+
+    def drop_targets(self, solved):
+        """分布式工作单元：不再计算目标已由其他工作端全部破解的盐，可在其他线程中调用"""
+        self.targets = drop_solved_salts(self.targets, solved, self.kernel)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class MultiDictJob:
+    """依次扫描多个字典，on_result(十六进制哈希, 明文)
+
+    每个字典交给 create_crack_job 创建的单字典任务(线程或进程引擎)处理，目标只传
+    尚未破解的部分。settings.dedup 为 auto/true/false，启用时全部字典共用一个布隆
+    过滤器，本次运行中已尝试过的基础单词不再计算；auto 只在规则数不少于
+    DEDUP_MIN_RULES 时启用。进度按全部字典首尾相接计算，processed_bytes 即全局偏移，
+    检查点保存的也是全局偏移；过滤器不写入检查点，继续运行时从空过滤器开始。
+    settings.dictionary_rates 为 {字典绝对路径: 每MB命中数} 时按命中率从高到低安排扫描
+    顺序，所选顺序随检查点保存，继续运行时沿用；settings.priority 只交给第一个字典任务。
+    各字典任务共用同一个 stats。
+    """
+
+    def __init__(self, file_paths, target_hashes, settings=None):
+        settings = settings or {}
+        self.file_paths = list(file_paths)
+        self.target_hashes = [normalize_target(h) for h in target_hashes]
+        self.remaining = set(self.target_hashes)
+        rule_lines = list(settings.get('rules') or [])
+        self.rule_count = len(compile_rules(rule_lines)) or 1
+        self.settings = settings
+        self.stats = settings.get('stats') or RunStats()
+        self.dedup = None
+        self.job = None
+        self.index = 0
+        self.found = {}
+        self.checkpoint = make_checkpointer(settings, checkpoint_identity(
+            'multi', [dictionary_source(path) for path in self.file_paths],
+            self.target_hashes, rule_lines, get_kernel(settings.get('hash_type')).name))
+        state = self.checkpoint.load() if self.checkpoint else None
+        self.resumed = state is not None
+        # 检查点中的位置对应当时的扫描顺序；没有保存顺序的旧检查点按传入顺序扫描
+        if state:
+            self.file_paths = self.checkpoint.extra.get('order', self.file_paths)
+        else:
+            self.file_paths = order_dictionaries(self.file_paths, settings.get('dictionary_rates'))
+        if self.checkpoint:
+            self.checkpoint.extra['order'] = self.file_paths
+        self.dictionaries = [{'path': path, 'name': os.path.basename(path),
+                              'total_bytes': os.path.getsize(path), 'processed_bytes': 0,
+                              'words': 0, 'skipped': 0} for path in self.file_paths]
+        self.total_bytes = sum(d['total_bytes'] for d in self.dictionaries)
+        # 已完成字典的累计字节数与单词数，当前字典的进度取自其任务对象
+        self._done_bytes = 0
+        self._done_words = 0
+        self._done_skipped = 0
+        self._start_offset = 0
+        seed_found(self.remaining, self.found, state, settings.get('cracked'))
+        if state:
+            self._done_words = state['processed_words']
+            self._seek(state['position'])
+        # 最近一次块边界处的全局单词数，与全局偏移一起写入检查点
+        self._words_at_offset = self._done_words
+        self._stop_event = threading.Event()
+
+    def _seek(self, position):
+        """把全局偏移换算为字典序号和字典内偏移"""
+        for self.index, d in enumerate(self.dictionaries):
+            if position < self._done_bytes + d['total_bytes']:
+                break
+            d['processed_bytes'] = d['total_bytes']
+            self._done_bytes += d['total_bytes']
+        else:
+            self.index = len(self.dictionaries)
+        if self.index < len(self.dictionaries):
+            self._start_offset = position - self._done_bytes
+            self.dictionaries[self.index]['processed_bytes'] = self._start_offset
+
+    @property
+    def current(self):
+        """正在扫描的字典信息，全部完成后为None"""
+        return self.dictionaries[self.index] if self.index < len(self.dictionaries) else None
+
+    @property
+    def processed_bytes(self):
+        job = self.job
+        return self._done_bytes + (job.processed_bytes if job else self._start_offset)
+
+    @property
+    def processed_words(self):
+        job = self.job
+        return self._done_words + (job.processed_words if job else 0)
+
+    @property
+    def skipped_words(self):
+        job = self.job
+        return self._done_skipped + (job.skipped_words if job else 0)
+
+    @property
+    def current_word(self):
+        job = self.job
+        return job.current_word if job else b''
+
+    def keyspace(self):
+        """候选总数 = 全部字典单词数 × 规则数，扫描结束前单词数为估计值"""
+        return estimate_words(self.processed_words, self.processed_bytes, self.total_bytes) * self.rule_count
+
+    def dictionary_progress(self):
+        """各字典的 (名称, 已处理字节, 总字节, 单词数, 去重跳过数)"""
+        job = self.job
+        progress = []
+        for i, d in enumerate(self.dictionaries):
+            if i == self.index and job is not None:
+                progress.append((d['name'], job.processed_bytes, d['total_bytes'],
+                                 job.processed_words, job.skipped_words))
+            else:
+                progress.append((d['name'], d['processed_bytes'], d['total_bytes'],
+                                 d['words'], d['skipped']))
+        return progress
+
+    def _dedup_enabled(self):
+        mode = self.settings.get('dedup', 'auto')
+        if mode == 'auto':
+            return self.rule_count >= DEDUP_MIN_RULES
+        return bool(mode)
+
+    def _create_filter(self):
+        """按全部字典的估计行数创建过滤器，进程引擎下分配在共享内存中"""
+        capacity = sum(estimate_line_count(path) for path in self.file_paths)
+        max_bytes = int(self.settings.get('dedup_memory_mb', DEDUP_MEMORY_MB) * 1024 * 1024)
+        return BloomFilter(capacity, self.settings.get('dedup_error_rate', DEFAULT_ERROR_RATE), max_bytes,
+                           shared=self.settings.get('engine', 'thread') == 'process')
+
+    def run(self, on_progress=None, on_result=None):
+        if on_result:
+            for target, word in self.found.items():
+                on_result(target, word)
+        if not self.remaining:
+            return True
+        if self._dedup_enabled():
+            self.dedup = self._create_filter()
+
+        def job_result(target, word):
+            if target in self.remaining:
+                self.remaining.discard(target)
+                self.found[target] = word
+                if on_result:
+                    on_result(target, word)
+
+        def job_progress(processed_bytes, total_bytes, processed_words, current_word):
+            # 单字典任务只在块边界上报，此时的位置可以安全地作为全局检查点
+            self._words_at_offset = self._done_words + processed_words
+            if self.checkpoint:
+                self.checkpoint.update(self._done_bytes + processed_bytes, self._words_at_offset,
+                                       self.remaining, self.found)
+            if on_progress:
+                on_progress(self._done_bytes + processed_bytes, self.total_bytes,
+                            self._done_words + processed_words, current_word)
+
+        completed = False
+        priority = self.settings.get('priority')
+        try:
+            while self.current is not None:
+                settings = dict(self.settings, checkpoint_dir=None, cracked=None, priority=priority,
+                                start_offset=self._start_offset, dedup_filter=self.dedup, stats=self.stats)
+                priority = None
+                self.job = create_crack_job(self.current['path'], sorted(self.remaining), settings)
+                # stop() 可能发生在任务对象创建之前
+                if self._stop_event.is_set() or not self.job.run(job_progress, job_result):
+                    break
+                d = self.current
+                d['processed_bytes'] = self.job.processed_bytes
+                d['words'] = self.job.processed_words
+                d['skipped'] = self.job.skipped_words
+                self._done_bytes += d['total_bytes']
+                self._done_words += self.job.processed_words
+                self._done_skipped += self.job.skipped_words
+                self._words_at_offset = self._done_words
+                self._start_offset = 0
+                self.job = None
+                self.index += 1
+                if not self.remaining:
+                    completed = True
+                    return True
+            completed = not self._stop_event.is_set()
+            return completed
+        finally:
+            if self.checkpoint:
+                self.checkpoint.finish(completed, self.processed_bytes, self._words_at_offset,
+                                       self.remaining, self.found)
+            if self.dedup is not None:
+                self.dedup.close()
+
+    def stop(self):
+        self._stop_event.set()
+        job = self.job
+        if job is not None:
+            job.stop()
+
+
+class MaskJob:
+    """掩码暴力破解，on_result(十六进制哈希, 明文)
+
+    keyspace按序号切分为互不重叠的区间交给线程池或进程池(settings.engine)，
+    工作者之间无需任何协调。settings.charsets 可提供自定义字符集 {'1': '?l?d'}。
+    启用检查点时保存的是已按顺序完成的序号。settings.start_offset/end_offset 把任务
+    限定在 [start, end) 序号区间内(分布式工作单元)。
+    """
+
+    def __init__(self, mask_text, target_hashes, settings=None):
+        settings = settings or {}
+        self.target_hashes = [normalize_target(h) for h in target_hashes]
+        self.remaining = set(self.target_hashes)
+        self.kernel = get_kernel(settings.get('hash_type'))
+        self.targets = digest_targets(self.target_hashes, self.kernel)
+        self.charsets = settings.get('charsets') or {}
+        self.mask = Mask(mask_text, self.charsets)
+        self.use_processes = settings.get('engine', 'thread') == 'process'
+        if self.use_processes:
+            import multiprocessing
+            self.workers = settings.get('workers') or os.cpu_count() or 1
+            self._stop_event = multiprocessing.Event()
+        else:
+            self.workers = settings.get('threads') or THREAD_WORKERS
+            self._stop_event = threading.Event()
+        self.tuner = BatchTuner(MASK_BATCH_SIZE, MIN_MASK_BATCH_SIZE, MAX_MASK_BATCH_SIZE,
+                                settings.get('batch_latency_ms', 50) / 1000, settings.get('batch_size'))
+        self.stats = settings.get('stats') or RunStats()
+        self.processed_words = settings.get('start_offset', 0)
+        self.end = min(settings.get('end_offset') or self.mask.keyspace, self.mask.keyspace)
+        self.current_word = b''
+        self.found = {}
+        self.checkpoint = make_checkpointer(settings, checkpoint_identity(
+            'mask', {'mask': mask_text, 'charsets': self.charsets}, self.target_hashes,
+            hash_type=self.kernel.name))
+        state = self.checkpoint.load() if self.checkpoint else None
+        self.resumed = state is not None
+        seed_found(self.remaining, self.found, state, settings.get('cracked'))
+        if state:
+            self.processed_words = state['position']
+
+    # 掩码任务以候选序号计量进度，沿用字典任务的 processed_bytes/total_bytes 进度接口
+    @property
+    def processed_bytes(self):
+        return self.processed_words
+
+    @property
+    def total_bytes(self):
+        return self.end
+
+    def keyspace(self):
+        return self.mask.keyspace
+
+    def _executor(self):
+        if self.use_processes:
+            from concurrent.futures import ProcessPoolExecutor
+            from mask import _crack_range, _init_worker
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(self.mask.text, self.charsets, self.target_hashes, self._stop_event,
+                          self.kernel.name))
+            return executor, _crack_range
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mask'), self._process_range
+
+    def run(self, on_progress=None, on_result=None):
+        if on_result:
+            for target, word in self.found.items():
+                on_result(target, word)
+        if not self.remaining:
+            return True
+        executor, fn = self._executor()
+        tasks = (((start, end), None)
+                 for start, end in split_keyspace(self.end, self.tuner, self.processed_words))
+        results = timed_iter(map_bounded(executor, fn, tasks, self.workers * IN_FLIGHT_PER_WORKER,
+                                         self._stop_event.is_set), self.stats)
+        completed = False
+        try:
+            with closing(results):
+                for _, (hits, count, last_word, elapsed, worker) in results:
+                    self.tuner.record(count, elapsed)
+                    # 工作进程中的统计无法直接累加，批次耗时随结果带回
+                    self.stats.add_time('hash', elapsed)
+                    self.stats.batch(worker, count, elapsed)
+                    for target, word in hits:
+                        if target in self.remaining:
+                            self.remaining.discard(target)
+                            self.found[target] = decode_word(word)
+                            if on_result:
+                                on_result(target, self.found[target])
+                    # 停止后的区间可能只枚举了一部分，不计入已完成序号
+                    if self._stop_event.is_set():
+                        break
+                    self.processed_words += count
+                    self.current_word = last_word
+                    if self.checkpoint:
+                        self.checkpoint.update(self.processed_words, self.processed_words,
+                                               self.remaining, self.found)
+                    if on_progress:
+                        on_progress(self.processed_words, self.end, self.processed_words,
+                                    decode_word(last_word)[:20])
+                    if not self.remaining:
+                        completed = True
+                        return True
+            completed = not self._stop_event.is_set()
+            return completed
+        finally:
+            # 进程池的工作进程通过同一个事件感知停止
+            self._stop_event.set()
+            executor.shutdown(wait=self.use_processes, cancel_futures=True)
+            if self.checkpoint:
+                self.checkpoint.finish(completed, self.processed_words, self.processed_words,
+                                       self.remaining, self.found)
+
+    def _process_range(self, start, end):
+        if self._stop_event.is_set():
+            return [], 0, b'', 0.0, worker_name()
+        began = time.perf_counter()
+        hits, count, last_word = self.mask.crack_range(start, end, self.targets, self._stop_event.is_set,
+                                                       self.kernel)
+        return hits, count, last_word, time.perf_counter() - began, worker_name()
+
+    def drop_targets(self, solved):
+        """同 CrackJob.drop_targets；进程池的工作进程在启动时已取得目标，不受影响"""
+        self.targets = drop_solved_salts(self.targets, solved, self.kernel)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class RegexJob:
+    """查找哈希值匹配正则表达式的单词（re.match语义），on_result(明文, 正则)
+
+    patterns 为一个正则或正则列表，一遍扫描同时匹配全部正则；只约束固定位置十六进制
+    字符的正则由 regex_compiler 降级为摘要上的掩码比较。
+    settings.hash_type 选择哈希算法(默认MD5)，加盐算法使用 settings.salt。
+    各阶段耗时记录在 stats 中。
+    """
+
+    def __init__(self, file_path, patterns, settings=None):
+        settings = settings or {}
+        self.patterns = [patterns] if isinstance(patterns, str) else list(patterns)
+        self.matcher = PatternSet(self.patterns)
+        self.kernel = get_kernel(settings.get('hash_type'))
+        self.salt = (settings.get('salt') or '').encode('utf-8', 'surrogateescape')
+        self.stats = settings.get('stats') or RunStats()
+        self.stream = WordlistStream(file_path, cache=dictionary_cache(settings), stats=self.stats)
+        self.total_bytes = self.stream.total_bytes
+        self.tuner = make_batch_tuner(settings)
+        self.threads = settings.get('threads') or THREAD_WORKERS
+        self.processed_words = 0
+        self.processed_bytes = 0
+        self.match_count = 0
+        self.current_word = b''
+        self._stop_event = threading.Event()
+
+    def run(self, on_progress=None, on_result=None):
+        executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='regex')
+        results = timed_iter(map_bounded(executor, self._process_batch,
+                                         iter_batches(self.stream, self.tuner),
+                                         self.threads * IN_FLIGHT_PER_WORKER, self._stop_event.is_set),
+                             self.stats)
+        try:
+            with closing(results):
+                for (last_word, offset), (batch_matches, count, elapsed) in results:
+                    self.tuner.record(count, elapsed)
+                    self.stats.sample('queue_depth', self.stream.queue_depth)
+                    self.processed_words += count
+                    self.match_count += len(batch_matches)
+                    if on_result:
+                        for word, index in batch_matches:
+                            on_result(decode_word(word), self.patterns[index])
+                    self.current_word = last_word
+                    if offset is not None:
+                        self.processed_bytes = offset
+                        if on_progress:
+                            on_progress(self.processed_bytes, self.total_bytes, self.processed_words,
+                                        decode_word(last_word)[:20])
+            return not self._stop_event.is_set()
+        finally:
+            self.stream.stop()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _process_batch(self, batch, end_index):
+        if self._stop_event.is_set():
+            return [], 0, 0.0
+        start = time.perf_counter()
+        # 掩码比较与哈希计算在kernel中合并进行，整体计入 match 阶段
+        matches = self.matcher.match(batch, self.kernel, self.salt)
+        elapsed = time.perf_counter() - start
+        self.stats.add_time('match', elapsed)
+        self.stats.batch(worker_name(), len(batch), elapsed)
+        return matches, len(batch), elapsed
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,108 @@
+"""错误日志：队列转交的异步写入、按大小轮转与重复日志限流
+
+调用 logging 的线程(界面线程、哈希工作线程等)只把记录放进内存队列，由 QueueListener
+的专用线程写文件，热路径上不做任何磁盘操作。文件超过 LOG_MAX_BYTES 时轮转为
+error.log.1 ... error.log.N，保留最近 LOG_BACKUP_COUNT 份历史而不是直接删除。
+
+同一调用位置(源文件+行号)在 RATE_LIMIT_WINDOW 秒内最多写出 RATE_LIMIT_BURST 条，
+其余只计数；窗口过后该位置的下一条日志附带被省略的条数，关闭时补写尚未报告的计数。
+格式错误的字典或输入因此不会让写日志成为瓶颈，也不会刷满日志文件。
+"""
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = 'error.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# 单个日志文件的大小上限与保留的历史文件数
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+# 同一调用位置每个窗口(秒)内最多写出的条数
+RATE_LIMIT_WINDOW = 60.0
+RATE_LIMIT_BURST = 5
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """按调用位置限流：每个窗口内放行前 burst 条，其余计数后丢弃；线程安全"""
+
+    def __init__(self, window=RATE_LIMIT_WINDOW, burst=RATE_LIMIT_BURST):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        # 调用位置 -> [窗口开始时间, 窗口内放行条数, 省略条数, 最后一条省略的消息]
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                self._sites[key] = [now, 1, 0, None]
+                return True
+            if now - site[0] >= self.window:
+                suppressed = site[2]
+                site[:] = [now, 1, 0, None]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} (此前另有 {suppressed} 条同类日志被省略)"
+                    record.args = None
+                return True
+            if site[1] < self.burst:
+                site[1] += 1
+                return True
+            site[2] += 1
+            site[3] = record
+            return False
+
+    def pending(self):
+        """取出并清零尚未报告的省略计数：[(最后一条被省略的记录, 条数)]"""
+        with self._lock:
+            result = [(site[3], site[2]) for site in self._sites.values() if site[2]]
+            for site in self._sites.values():
+                site[2], site[3] = 0, None
+        return result
+
+
+def setup_logging(path=LOG_FILE, level=logging.ERROR, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT):
+    """为根日志器安装队列日志：重复调用时不再安装，进程退出时自动 shutdown_logging"""
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding='utf-8', delay=True)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _handler = QueueHandler(queue.SimpleQueue())
+        _handler.addFilter(RateLimitFilter())
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_handler)
+        _listener = QueueListener(_handler.queue, file_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """补写被省略的日志计数，等待写入线程处理完队列后停止"""
+    global _listener, _handler
+    with _lock:
+        if _listener is None:
+            return
+        for record, count in _handler.filters[0].pending():
+            summary = logging.makeLogRecord(record.__dict__)
+            summary.msg = f"{record.getMessage()} (最近 {count} 条同类日志被省略)"
+            summary.args = None
+            _handler.enqueue(summary)
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _handler = None
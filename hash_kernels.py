@@ -0,0 +1,279 @@
+"""哈希算法注册表：破解、正则匹配和哈希生成共用同一组批量哈希kernel
+
+每个kernel以批为单位工作：digests(words, salt) 一次处理一批bytes候选并返回16字节
+摘要列表，match(words, targets, salt) 在批内直接与目标摘要比较，只返回命中，
+masked_match(words, masks, salt) 检查摘要的指定位是否等于给定值(正则降级后的比较)。
+默认实现由 digests 推导出其余方法，各kernel可按自身特点单独覆盖优化，
+调用方(线程、进程、掩码引擎)无需为不同算法分叉。
+
+加盐算法的目标写作hashcat格式 "hash:salt"，同一个盐的目标共用一次批量计算。
+NTLM在hashlib不提供MD4时(OpenSSL 3默认如此)使用纯Python实现，速度慢得多。
+"""
+import struct
+import hashlib
+
+import vector_md5
+
+DEFAULT_KERNEL = 'md5'
+
+
+class HashKernelError(ValueError):
+    pass
+
+
+class HashKernel:
+    """批量哈希kernel基类，子类至少实现 digests"""
+    name = ''
+    label = ''
+    salted = False
+
+    def digests(self, words, salt=b''):
+        """一批bytes候选 -> 16字节摘要列表"""
+        raise NotImplementedError
+
+    def hexdigests(self, words, salt=b''):
+        return [digest.hex() for digest in self.digests(words, salt)]
+
+    def digest(self, word, salt=b''):
+        return self.digests([word], salt)[0]
+
+    def match(self, words, targets, salt=b''):
+        """targets为 {摘要: 目标}，返回命中的 [(目标, 明文bytes)]"""
+        return [(targets[digest], word) for word, digest in zip(words, self.digests(words, salt))
+                if digest in targets]
+
+    def masked_match(self, words, masks, salt=b''):
+        """masks为 [(掩码, 值)] 128位整数(摘要按大端序)，返回与之一一对应的命中单词列表"""
+        if not isinstance(words, list):
+            words = list(words)
+        return match_masks(words, self.digests(words, salt), masks)
+
+
+def match_masks(words, digests, masks):
+    """逐个摘要检查 (int(摘要) & 掩码) == 值，返回每个掩码的命中单词列表"""
+    results = [[] for _ in masks]
+    from_bytes = int.from_bytes
+    if len(masks) == 1:
+        (mask, value), hits = masks[0], results[0]
+        for word, digest in zip(words, digests):
+            if from_bytes(digest, 'big') & mask == value:
+                hits.append(word)
+        return results
+    for word, digest in zip(words, digests):
+        number = from_bytes(digest, 'big')
+        for (mask, value), hits in zip(masks, results):
+            if number & mask == value:
+                hits.append(word)
+    return results
+
+
+class Md5Kernel(HashKernel):
+    """MD5；安装了NumPy时，match 把批内长度相同、不超过55字节的候选交给 vector_md5 计算
+
+    vectorize 为None时按NumPy是否可用自动决定。
+    """
+    name = 'md5'
+    label = 'MD5'
+
+    def __init__(self, vectorize=None):
+        self._vectorize = vectorize
+        # 最近一次使用的目标筛选器，同一任务的各批次共用同一个targets字典
+        self._filter = None
+
+    @property
+    def vectorize(self):
+        # 第一次用到时才检测NumPy，导入本模块不会加载NumPy
+        if self._vectorize is None:
+            self._vectorize = vector_md5.available()
+        return self._vectorize
+
+    def target_filter(self, targets):
+        target_filter = self._filter
+        if target_filter is None or target_filter.targets is not targets:
+            target_filter = self._filter = vector_md5.TargetFilter(targets)
+        return target_filter
+
+    def digests(self, words, salt=b''):
+        md5 = hashlib.md5
+        return [md5(word).digest() for word in words]
+
+    def hexdigests(self, words, salt=b''):
+        md5 = hashlib.md5
+        return [md5(word).hexdigest() for word in words]
+
+    def match(self, words, targets, salt=b''):
+        hits = []
+        if self.vectorize and not isinstance(words, list):
+            # 规则展开传入的是生成器，分组前先展开为列表
+            words = list(words)
+        if self.vectorize and len(words) >= vector_md5.MIN_BATCH:
+            groups, words = vector_md5.group_by_length(words)
+            if groups:
+                target_filter = self.target_filter(targets)
+                for length, group in groups.items():
+                    for i in range(0, len(group), vector_md5.MAX_LANES):
+                        chunk = group[i:i + vector_md5.MAX_LANES]
+                        hits.extend(target_filter.match(vector_md5.as_array(chunk, length)))
+        # 其余候选逐个计算，计算与比较合并在一个循环内，不生成中间摘要列表
+        md5 = hashlib.md5
+        for word in words:
+            digest = md5(word).digest()
+            if digest in targets:
+                hits.append((targets[digest], word))
+        return hits
+
+    def masked_match(self, words, masks, salt=b''):
+        if not isinstance(words, list):
+            words = list(words)
+        if not (self.vectorize and len(words) >= vector_md5.MIN_BATCH):
+            return super().masked_match(words, masks, salt)
+        groups, rest = vector_md5.group_by_length(words)
+        results = super().masked_match(rest, masks, salt)
+        state_masks = [vector_md5.state_mask(mask, value) for mask, value in masks]
+        for length, group in groups.items():
+            for i in range(0, len(group), vector_md5.MAX_LANES):
+                chunk = group[i:i + vector_md5.MAX_LANES]
+                state = vector_md5.compress(vector_md5.as_array(chunk, length))
+                for hits, state_mask in zip(results, state_masks):
+                    hits.extend(chunk[lane] for lane in vector_md5.masked_lanes(state, state_mask))
+        return results
+
+
+class DoubleMd5Kernel(HashKernel):
+    """md5(md5($pass))，内层取32位小写十六进制串，与hashcat模式2600一致"""
+    name = 'md5md5'
+    label = 'md5(md5($pass))'
+
+    def digests(self, words, salt=b''):
+        md5 = hashlib.md5
+        return [md5(md5(word).hexdigest().encode('ascii')).digest() for word in words]
+
+
+class SaltPassKernel(HashKernel):
+    """md5($salt.$pass)：盐的压缩状态只计算一次，每个候选从其副本继续"""
+    name = 'md5_salt_pass'
+    label = 'md5($salt.$pass)'
+    salted = True
+
+    def digests(self, words, salt=b''):
+        prefix = hashlib.md5(salt)
+        result = []
+        for word in words:
+            h = prefix.copy()
+            h.update(word)
+            result.append(h.digest())
+        return result
+
+
+class PassSaltKernel(HashKernel):
+    """md5($pass.$salt)"""
+    name = 'md5_pass_salt'
+    label = 'md5($pass.$salt)'
+    salted = True
+
+    def digests(self, words, salt=b''):
+        md5 = hashlib.md5
+        return [md5(word + salt).digest() for word in words]
+
+
+def _md4_python(data):
+    """纯Python的MD4(RFC 1320)，仅在hashlib不支持md4时使用"""
+    mask = 0xFFFFFFFF
+    message = bytearray(data)
+    message.append(0x80)
+    message.extend(b'\x00' * ((56 - len(message)) % 64))
+    message.extend(struct.pack('<Q', len(data) * 8 & 0xFFFFFFFFFFFFFFFF))
+    state = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476]
+    for offset in range(0, len(message), 64):
+        x = struct.unpack_from('<16I', message, offset)
+        a, b, c, d = state
+        # 每一步更新a后把四个寄存器轮换一位，16步之后回到原位
+        for i in range(16):
+            a = (a + ((b & c) | (~b & d)) + x[i]) & mask
+            s = (3, 7, 11, 19)[i % 4]
+            a, b, c, d = d, (a << s | a >> (32 - s)) & mask, b, c
+        for i in range(16):
+            a = (a + ((b & c) | (b & d) | (c & d)) + x[_MD4_ROUND2[i]] + 0x5A827999) & mask
+            s = (3, 5, 9, 13)[i % 4]
+            a, b, c, d = d, (a << s | a >> (32 - s)) & mask, b, c
+        for i in range(16):
+            a = (a + (b ^ c ^ d) + x[_MD4_ROUND3[i]] + 0x6ED9EBA1) & mask
+            s = (3, 9, 11, 15)[i % 4]
+            a, b, c, d = d, (a << s | a >> (32 - s)) & mask, b, c
+        state = [(v + w) & mask for v, w in zip(state, (a, b, c, d))]
+    return struct.pack('<4I', *state)
+
+
+_MD4_ROUND2 = (0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15)
+_MD4_ROUND3 = (0, 8, 4, 12, 2, 10, 6, 14, 1, 9, 5, 13, 3, 11, 7, 15)
+
+
+def _md4_function():
+    """优先使用hashlib(OpenSSL)的MD4，不可用时退回纯Python实现"""
+    try:
+        hashlib.new('md4', b'')
+    except ValueError:
+        return _md4_python
+    return lambda data: hashlib.new('md4', data).digest()
+
+
+def _utf16le(word):
+    """NTLM对口令的UTF-16LE编码；不是合法UTF-8的字节串按Latin-1逐字节扩展，与hashcat一致"""
+    try:
+        return word.decode('utf-8').encode('utf-16-le')
+    except UnicodeDecodeError:
+        return word.decode('latin-1').encode('utf-16-le')
+
+
+class NtlmKernel(HashKernel):
+    """NTLM = md4(utf16le($pass))"""
+    name = 'ntlm'
+    label = 'NTLM'
+
+    def __init__(self):
+        self.md4 = _md4_function()
+        self.native = self.md4 is not _md4_python
+
+    def digests(self, words, salt=b''):
+        md4 = self.md4
+        result = []
+        for word in words:
+            # ASCII口令最常见，直接逐字节补零，省去解码
+            encoded = word.decode('latin-1').encode('utf-16-le') if word.isascii() else _utf16le(word)
+            result.append(md4(encoded))
+        return result
+
+
+_KERNELS = {}
+
+
+def register_kernel(kernel):
+    """注册kernel实例，同名kernel会被替换(可用于接入更快的实现)"""
+    _KERNELS[kernel.name] = kernel
+    return kernel
+
+
+for _kernel in (Md5Kernel(), DoubleMd5Kernel(), SaltPassKernel(), PassSaltKernel(), NtlmKernel()):
+    register_kernel(_kernel)
+
+
+def get_kernel(name=None):
+    """按名称取kernel，name为空时返回MD5"""
+    try:
+        return _KERNELS[name or DEFAULT_KERNEL]
+    except KeyError:
+        raise HashKernelError(f"未知的哈希算法: {name}") from None
+
+
+def kernel_names():
+    return list(_KERNELS)
+
+
+def kernels():
+    return list(_KERNELS.values())
+
+
+def split_salted(target):
+    """"hash:salt" -> (十六进制哈希, 盐bytes)"""
+    target_hash, _, salt = target.partition(':')
+    return target_hash, salt.encode('utf-8', 'surrogateescape')
@@ -0,0 +1,229 @@
+"""运行统计：热路径各阶段的耗时与计数，以及可选的整次运行性能剖析
+
+RunStats 由任务创建并在工作线程中累加，界面定时读取 snapshot()，运行结束后可用
+dump() 保存为JSON。记录以批次或读取块为单位，每次只是几次 perf_counter 和一次加锁，
+相对几十毫秒的批次可以忽略，因此始终开启。阶段名称：
+    read       读取线程从磁盘读取字典
+    normalize  读取线程切分行、去除空白
+    cache      从常驻字典缓存切块
+    wait       结果循环等待工作线程(批次尚未算完或读取跟不上)
+    consume    结果循环处理命中、检查点与进度
+    priority   扫描字典前计算优先候选
+    dedup      去重过滤
+    hash       哈希计算(含规则展开与目标比较)
+    match      正则匹配(含哈希计算)
+工作者的 words/s 为该工作者处理的单词数除以其处理批次的总耗时。
+
+RunProfiler 按 settings.profile 用 cProfile 剖析整次运行，包括运行期间新建的工作线程，
+结果保存为 .prof 文件(可用 pstats、snakeviz 查看)。多进程引擎的工作进程不在剖析范围内。
+"""
+import os
+import sys
+import json
+import time
+import threading
+import multiprocessing
+
+# Python 3.12 起 cProfile 基于 sys.monitoring，一个剖析器即覆盖全部线程，且同时只能启用一个
+PROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+# 批次耗时直方图的桶上界(毫秒)，最后一个桶收集更慢的批次
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+PROFILE_KINDS = ('cprofile',)
+
+
+def worker_name():
+    """当前工作者的名称：线程池中为线程名，进程池中为进程名"""
+    thread = threading.current_thread()
+    if thread is threading.main_thread():
+        return multiprocessing.current_process().name
+    return thread.name
+
+
+class RunStats:
+    """一次运行的阶段计时、计数器、采样值与批次统计，所有方法线程安全"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.workers = {}
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def add_time(self, stage, seconds, calls=1):
+        """累加一个阶段的耗时"""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                self.stages[stage] = [seconds, calls]
+            else:
+                entry[0] += seconds
+                entry[1] += calls
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def sample(self, name, value):
+        """记录一个采样值(如队列深度)，保留最新值、最大值与平均值"""
+        with self._lock:
+            entry = self.gauges.get(name)
+            if entry is None:
+                self.gauges[name] = [value, value, value, 1]
+            else:
+                entry[0] = value
+                entry[1] = max(entry[1], value)
+                entry[2] += value
+                entry[3] += 1
+
+    def batch(self, worker, words, seconds):
+        """记录一个批次：计入工作者吞吐与批次耗时直方图"""
+        milliseconds = seconds * 1000
+        bucket = 0
+        while bucket < len(LATENCY_BUCKETS_MS) and milliseconds > LATENCY_BUCKETS_MS[bucket]:
+            bucket += 1
+        with self._lock:
+            self.histogram[bucket] += 1
+            entry = self.workers.get(worker)
+            if entry is None:
+                self.workers[worker] = [words, seconds, 1]
+            else:
+                entry[0] += words
+                entry[1] += seconds
+                entry[2] += 1
+
+    def finish(self):
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def snapshot(self):
+        """当前统计的JSON兼容副本"""
+        with self._lock:
+            workers = {name: {'words': words, 'seconds': round(seconds, 6), 'batches': batches,
+                              'words_per_sec': round(words / seconds) if seconds else 0}
+                       for name, (words, seconds, batches) in sorted(self.workers.items())}
+            return {
+                'elapsed': round(self.elapsed, 6),
+                'finished': self.finished is not None,
+                'stages': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                           for name, (seconds, calls) in self.stages.items()},
+                'counters': dict(self.counters),
+                'gauges': {name: {'last': last, 'max': peak, 'mean': round(total / samples, 3)}
+                           for name, (last, peak, total, samples) in self.gauges.items()},
+                'workers': workers,
+                'batch_latency_ms': {
+                    'buckets': [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"],
+                    'counts': list(self.histogram),
+                },
+            }
+
+    def dump(self, path):
+        """把 snapshot() 写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+def timed_iter(iterable, stats):
+    """逐项产出 iterable：取下一项的耗时计入 wait 阶段，调用方处理每一项的耗时计入 consume 阶段
+
+    关闭时一并关闭 iterable(如 map_bounded 取消未开始的任务)。
+    """
+    iterator = iter(iterable)
+    try:
+        while True:
+            began = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            fetched = time.perf_counter()
+            stats.add_time('wait', fetched - began)
+            yield item
+            stats.add_time('consume', time.perf_counter() - fetched)
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+
+
+def format_stats(snapshot):
+    """统计快照 -> 供界面显示的多行文本"""
+    lines = [f"运行 {snapshot['elapsed']:.2f} 秒"]
+    stages = sorted(snapshot['stages'].items(), key=lambda item: -item[1]['seconds'])
+    if stages:
+        lines.append("阶段耗时:")
+        lines.extend(f"  {name:<10}{stage['seconds']:>9.3f}s {stage['calls']:>8,}次" for name, stage in stages)
+    if snapshot['workers']:
+        lines.append("工作者吞吐:")
+        lines.extend(f"  {name[-16:]:<16}{worker['words_per_sec']:>12,}/s {worker['batches']:>6,}批"
+                     for name, worker in snapshot['workers'].items())
+    histogram = snapshot['batch_latency_ms']
+    if any(histogram['counts']):
+        lines.append("批次耗时(ms):")
+        lines.extend(f"  {bucket:<8}{count:>8,}" for bucket, count in zip(histogram['buckets'], histogram['counts'])
+                     if count)
+    for name, gauge in snapshot['gauges'].items():
+        lines.append(f"{name}: 当前 {gauge['last']} 最大 {gauge['max']} 平均 {gauge['mean']}")
+    for name, count in sorted(snapshot['counters'].items()):
+        lines.append(f"{name}: {count:,}")
+    return '\n'.join(lines)
+
+
+class RunProfiler:
+    """用cProfile剖析一次运行，包括 with 块内新建的线程，结束时保存
+
+    Python 3.12 之前剖析器只作用于启用它的线程，期间新建的线程各用一个，结束时合并；
+    3.12 起只用一个剖析器，它本身就覆盖全部线程。
+    """
+
+    def __init__(self, path, kind='cprofile'):
+        if kind not in PROFILE_KINDS:
+            raise ValueError(f"未知的剖析方式: {kind}")
+        self.path = path
+        self.kind = kind
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def _thread_hook(self, *args):
+        # threading 在新线程开始时调用一次该钩子，随即由该线程自己的剖析器接管
+        import cProfile
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def __enter__(self):
+        import cProfile
+        self._main = cProfile.Profile()
+        if not PROFILE_ALL_THREADS:
+            threading.setprofile(self._thread_hook)
+        self._main.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        import pstats
+        self._main.disable()
+        if not PROFILE_ALL_THREADS:
+            threading.setprofile(None)
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            for profile in self._profiles:
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # 没有记录到任何调用的剖析器无法加入统计
+                    pass
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        stats.dump_stats(self.path)
+        return False
+
+
+def profile_path(directory, prefix='profile'):
+    """剖析结果的保存路径：directory/prefix-时间戳.prof"""
+    return os.path.join(directory, f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
@@ -0,0 +1,254 @@
+"""掩码暴力破解：按序号枚举候选，keyspace可切分为互不重叠的区间并行处理
+
+掩码语法与hashcat一致:
+    ?l 小写字母  ?u 大写字母  ?d 数字  ?s 符号  ?a 以上全部
+    ?h 小写十六进制  ?H 大写十六进制  ?b 全部256个字节  ?? 问号本身
+    ?1-?4 自定义字符集，其余字符按原样出现在候选中
+也支持hcmask行格式 "?l?d,?u?1?1?1"：逗号前依次为自定义字符集1-4，最后一段为掩码。
+
+序号按混合进制换算，最右边的位置变化最快。区间内的候选在同一个bytearray上
+原地递增生成，只有命中时才复制出bytes。MD5且安装了NumPy时，候选按序号整批换算为
+(n, 长度) 的字节数组，交给 vector_md5 一次计算。
+"""
+import time
+import math
+import string
+import hashlib
+
+import vector_md5
+from crack_core import crack_batch, digest_targets
+from hash_kernels import DEFAULT_KERNEL, get_kernel
+from instrumentation import worker_name
+
+CHARSETS = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    's': string.punctuation + ' ',
+    'h': '0123456789abcdef',
+    'H': '0123456789ABCDEF',
+}
+CHARSETS['a'] = CHARSETS['l'] + CHARSETS['u'] + CHARSETS['d'] + CHARSETS['s']
+CUSTOM_KEYS = '1234'
+# 掩码模式下每检查一次停止标志之间最多枚举的候选数
+STOP_CHECK_INTERVAL = 65536
+
+_worker_state = {}
+
+
+class MaskError(ValueError):
+    pass
+
+
+def _split_hcmask(text):
+    """按未转义的逗号拆分hcmask行，"\\," 表示字面量逗号"""
+    fields = ['']
+    i = 0
+    while i < len(text):
+        if text[i] == '\\' and text[i + 1:i + 2] == ',':
+            fields[-1] += ','
+            i += 2
+            continue
+        if text[i] == ',':
+            fields.append('')
+        else:
+            fields[-1] += text[i]
+        i += 1
+    return fields
+
+
+def _unique(data):
+    return bytes(dict.fromkeys(data))
+
+
+def _charset(key, custom):
+    if key == 'b':
+        return bytes(range(256))
+    if key == '?':
+        return b'?'
+    if key in CHARSETS:
+        return CHARSETS[key].encode('ascii')
+    if key in CUSTOM_KEYS:
+        if key not in custom:
+            raise MaskError(f"未定义自定义字符集 ?{key}")
+        return custom[key]
+    raise MaskError(f"未知的字符集 ?{key}")
+
+
+def _expand_charset(text, custom=None):
+    """把字符集定义(可引用内置字符集)展开为去重后的字节集合"""
+    data = bytearray()
+    for position in _positions(text, custom or {}):
+        data += position
+    return _unique(data)
+
+
+def _positions(text, custom):
+    """逐个位置产出该位置的候选字节集合"""
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == '?':
+            if i + 1 >= len(text):
+                raise MaskError("掩码以单独的 ? 结尾")
+            yield _charset(text[i + 1], custom)
+            i += 2
+            continue
+        # 多字节字符按字节拆成多个固定位置
+        for byte in ch.encode('utf-8'):
+            yield bytes([byte])
+        i += 1
+
+
+def parse_mask(text, custom=None):
+    """解析掩码，返回每个位置的字节集合列表；custom为 {'1': '?l?d', ...}"""
+    fields = _split_hcmask(text)
+    if len(fields) > len(CUSTOM_KEYS) + 1:
+        raise MaskError("自定义字符集最多4个")
+    definitions = dict(custom or {})
+    definitions.update(zip(CUSTOM_KEYS, fields[:-1]))
+    resolved = {}
+    for key, value in definitions.items():
+        charset = _expand_charset(value)
+        if not charset:
+            raise MaskError(f"自定义字符集 ?{key} 为空")
+        resolved[key] = charset
+    charsets = [_unique(cs) for cs in _positions(fields[-1], resolved)]
+    if not charsets:
+        raise MaskError("掩码为空")
+    return charsets
+
+
+class Mask:
+    """已解析的掩码，可按序号取候选或在区间内原地枚举"""
+
+    def __init__(self, text, custom=None):
+        self.text = text
+        self.charsets = parse_mask(text, custom)
+        self.keyspace = math.prod(len(cs) for cs in self.charsets)
+
+    def digits(self, index):
+        """序号 -> 每个位置在字符集中的下标"""
+        if not 0 <= index < self.keyspace:
+            raise IndexError(index)
+        digits = [0] * len(self.charsets)
+        for pos in range(len(self.charsets) - 1, -1, -1):
+            index, digits[pos] = divmod(index, len(self.charsets[pos]))
+        return digits
+
+    def candidate(self, index):
+        return bytes(cs[d] for cs, d in zip(self.charsets, self.digits(index)))
+
+    def crack_range(self, start, end, targets, should_stop=None, kernel=None):
+        """枚举[start, end)区间，返回(命中[(十六进制哈希, 明文bytes)], 候选数, 最后一个候选)
+
+        kernel 为空或MD5时逐个候选原地计算，可用NumPy时整批向量化计算；其他算法把最后
+        一位变化的一组候选交给 kernel 批量计算。targets 为 digest_targets 按同一kernel
+        生成的结果。
+        """
+        end = min(end, self.keyspace)
+        if start >= end:
+            return [], 0, b''
+        kernel = kernel or get_kernel()
+        if kernel.name == DEFAULT_KERNEL and getattr(kernel, 'vectorize', False) and \
+                len(self.charsets) <= vector_md5.MAX_LENGTH and end - start >= vector_md5.MIN_BATCH:
+            return self._crack_range_vector(start, end, kernel.target_filter(targets), should_stop)
+        charsets = self.charsets
+        digits = self.digits(start)
+        buf = bytearray(cs[d] for cs, d in zip(charsets, digits))
+        last = charsets[-1]
+        md5 = hashlib.md5
+        batched = kernel.name != DEFAULT_KERNEL
+        hits = []
+        count = 0
+        total = end - start
+        checked = 0
+        while True:
+            # 内层循环只改写最后一个字节，其余位置按进位原地更新
+            first = digits[-1]
+            stop = min(len(last), first + total - count)
+            if batched:
+                prefix = bytes(buf[:-1])
+                hits.extend(crack_batch([prefix + bytes((byte,)) for byte in last[first:stop]],
+                                        targets, kernel))
+                buf[-1] = last[stop - 1]
+            else:
+                for byte in last[first:stop]:
+                    buf[-1] = byte
+                    digest = md5(buf).digest()
+                    if digest in targets:
+                        hits.append((targets[digest], bytes(buf)))
+            count += stop - first
+            if count >= total:
+                break
+            if should_stop and count - checked >= STOP_CHECK_INTERVAL:
+                checked = count
+                if should_stop():
+                    break
+            digits[-1] = 0
+            pos = len(charsets) - 2
+            while pos >= 0:
+                digits[pos] += 1
+                if digits[pos] < len(charsets[pos]):
+                    buf[pos] = charsets[pos][digits[pos]]
+                    break
+                digits[pos] = 0
+                buf[pos] = charsets[pos][0]
+                pos -= 1
+        return hits, count, bytes(buf)
+
+    def _crack_range_vector(self, start, end, target_filter, should_stop=None):
+        """crack_range 的NumPy实现：每次把至多 MAX_LANES 个序号换算为候选字节数组"""
+        np = vector_md5.np
+        charsets = self.charsets
+        tables = [np.frombuffer(bytes(cs), np.uint8) for cs in charsets]
+        hits = []
+        count = 0
+        last_word = b''
+        index = start
+        while index < end:
+            n = min(vector_md5.MAX_LANES, end - index)
+            digits = self.digits(index)
+            data = np.empty((n, len(charsets)), np.uint8)
+            # 从最右边的位置开始逐位加上偏移量并向左进位
+            carry = np.arange(n, dtype=np.int64)
+            for pos in range(len(charsets) - 1, -1, -1):
+                if not carry[-1]:
+                    # 偏移量已不再进位到更左的位置，这些列整列相同
+                    data[:, :pos + 1] = np.frombuffer(
+                        bytes(cs[d] for cs, d in zip(charsets[:pos + 1], digits)), np.uint8)
+                    break
+                carry, column = np.divmod(carry + digits[pos], len(charsets[pos]))
+                data[:, pos] = tables[pos][column]
+            hits.extend(target_filter.match(data))
+            count += n
+            index += n
+            last_word = data[-1].tobytes()
+            if should_stop and index < end and should_stop():
+                break
+        return hits, count, last_word
+
+
+def split_keyspace(keyspace, chunk_size, start=0):
+    """把[start, keyspace)切分为连续区间，chunk_size可为整数或BatchTuner"""
+    while start < keyspace:
+        step = chunk_size if isinstance(chunk_size, int) else chunk_size.size
+        end = min(keyspace, start + step)
+        yield start, end
+        start = end
+
+
+def _init_worker(text, custom, target_hashes, stop_event, hash_type=None):
+    """进程池初始化：解析掩码并缓存目标摘要"""
+    _worker_state['mask'] = Mask(text, custom)
+    _worker_state['kernel'] = get_kernel(hash_type)
+    _worker_state['targets'] = digest_targets(target_hashes, _worker_state['kernel'])
+    _worker_state['stop_event'] = stop_event
+
+
+def _crack_range(start, end):
+    """工作进程入口，返回(命中列表, 候选数, 最后一个候选, 耗时, 工作进程名)"""
+    began = time.perf_counter()
+    hits, count, last_word = _worker_state['mask'].crack_range(
+        start, end, _worker_state['targets'], _worker_state['stop_event'].is_set, _worker_state['kernel'])
+    return hits, count, last_word, time.perf_counter() - began, worker_name()
@@ -0,0 +1,600 @@
+"""命令行入口：无界面运行破解、正则匹配、MD5生成与索引构建
+
+用法:
+    python -m md5cracker crack -d DICT [-d DICT ...] [-H HASH_FILE] [-r RULE_FILE] [-m TYPE] [HASH ...]
+    python -m md5cracker mask [-1 CHARSET] MASK [-H HASH_FILE] [HASH ...]
+    python -m md5cracker regex -d DICT PATTERN [PATTERN ...]
+    python -m md5cracker hash [-m TYPE] [--salt SALT] [TEXT ...]   # 不带参数时从标准输入逐行读取
+    python -m md5cracker index -d DICT [--check]
+    python -m md5cracker pot import|export [FILE]
+    python -m md5cracker order -d DICT -o OUT [--freq-format uniq|tab]
+    python -m md5cracker serve (-d DICT | --mask MASK) [--listen HOST:PORT] [HASH ...]
+    python -m md5cracker worker HOST:PORT [-d DICT] [--dict-dir DIR]
+
+结果以JSON Lines格式逐行写到标准输出，错误信息写到标准错误。
+-m 选择哈希算法(md5、md5md5、md5_salt_pass、md5_pass_salt、ntlm)，加盐算法的目标写作 hash:salt。
+本模块不导入Qt，引擎模块也只在子命令真正执行时才导入，以保证启动速度。
+
+退出码:
+    0  全部目标已破解 / 找到匹配 / 操作成功
+    1  扫描完成但仍有目标未破解 / 没有匹配
+    2  参数或输入错误
+    3  文件读写错误
+    130  被用户中断
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+EXIT_OK = 0
+EXIT_NOT_FOUND = 1
+EXIT_USAGE = 2
+EXIT_IO = 3
+EXIT_INTERRUPTED = 130
+
+# 进度信息写到标准错误的最小间隔(秒)
+PROGRESS_INTERVAL = 1.0
+
+
+class CliError(Exception):
+    def __init__(self, message, code=EXIT_USAGE):
+        super().__init__(message)
+        self.code = code
+
+
+def emit(record, stream=None):
+    stream = stream or sys.stdout
+    stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+    stream.flush()
+
+
+def _settings_from_args(args):
+    # 命令行每次只运行一个任务，常驻字典缓存没有复用的机会
+    settings = {'engine': args.engine, 'dict_cache_mb': 0}
+    if args.workers:
+        settings['workers'] = args.workers
+    if args.batch_size:
+        settings['batch_size'] = args.batch_size
+    if args.chunk_bytes:
+        settings['chunk_bytes'] = args.chunk_bytes
+    if not getattr(args, 'no_checkpoint', True):
+        settings['checkpoint_dir'] = args.checkpoint_dir
+        settings['checkpoint_interval'] = args.checkpoint_interval
+    return settings
+
+
+def _require_file(path):
+    if not os.path.isfile(path):
+        raise CliError(f"文件不存在: {path}", EXIT_IO)
+
+
+def _progress_printer(enabled):
+    """返回节流后的进度回调，进度以JSON写到标准错误"""
+    if not enabled:
+        return None
+    last = [0.0]
+
+    def on_progress(processed_bytes, total_bytes, processed_words, current_word):
+        now = time.monotonic()
+        if now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        percent = round(processed_bytes / total_bytes * 100, 2) if total_bytes else 100.0
+        emit({'event': 'progress', 'percent': percent, 'bytes': processed_bytes,
+              'words': processed_words}, sys.stderr)
+    return on_progress
+
+
+def _kernel(args):
+    from hash_kernels import get_kernel
+    return get_kernel(args.hash_type)
+
+
+def _read_targets(args):
+    from crack_core import parse_hash_list
+    text = '\n'.join(args.hashes)
+    if args.hash_file:
+        _require_file(args.hash_file)
+        with open(args.hash_file, 'r', encoding='utf-8', errors='ignore') as f:
+            text += '\n' + f.read()
+    hashes, invalid = parse_hash_list(text, _kernel(args).salted)
+    for line in invalid:
+        emit({'event': 'warning', 'message': f"无法识别的哈希行: {line[:80]}"}, sys.stderr)
+    if not hashes:
+        raise CliError("没有提供有效的哈希" + ("(格式为 hash:salt)" if _kernel(args).salted else ""))
+    return hashes
+
+
+def _read_rules(args):
+    """读取并校验规则文件，返回规则行列表"""
+    if not args.rules:
+        return []
+    from rules import RuleError, compile_rules, rule_lines
+    _require_file(args.rules)
+    with open(args.rules, 'r', encoding='utf-8', errors='ignore') as f:
+        lines = rule_lines(f.read())
+    try:
+        compile_rules(lines)
+    except RuleError as e:
+        raise CliError(f"规则错误: {e}")
+    return lines
+
+
+def _open_potfile(args):
+    # potfile只记录MD5结果
+    if args.no_potfile or args.hash_type != 'md5':
+        return None
+    from potfile import Potfile
+    try:
+        return Potfile(args.potfile)
+    except ValueError as e:
+        raise CliError(str(e), EXIT_IO)
+
+
+def _open_hit_stats(args):
+    if args.no_hit_stats:
+        return None
+    from ordering import HitStats
+    try:
+        return HitStats(args.hit_stats)
+    except ValueError as e:
+        raise CliError(str(e), EXIT_IO)
+
+
+def _result_recorder(found, potfile, stats=None, source=None, known=()):
+    """输出破解结果并写入potfile
+
+    stats 不为空时同时记录命中统计，source() 返回命中所在的字典；known 中的目标
+    (potfile或检查点中已有的结果)不是本次扫描得到的，不计入统计。
+    """
+    def on_result(target, word):
+        found[target] = word
+        emit({'event': 'found', 'hash': target, 'plain': word})
+        if potfile is not None:
+            potfile.add(target, word)
+        if stats is not None and target not in known:
+            stats.record(word, source() if source else None)
+    return on_result
+
+
+def cmd_crack(args):
+    targets = _read_targets(args)
+    for path in args.dict:
+        _require_file(path)
+    # 多个字典时依次扫描并跳过重复单词
+    dictionaries = args.dict[0] if len(args.dict) == 1 else args.dict
+    rules = _read_rules(args)
+    started = time.perf_counter()
+    found = {}
+    potfile = _open_potfile(args)
+    cached = potfile.lookup_many(targets) if potfile is not None else {}
+    stats = _open_hit_stats(args)
+    known = set(cached)
+    job = None
+
+    def hit_source():
+        # 多个字典时取正在扫描的字典
+        current = getattr(job, 'current', None)
+        return current['path'] if current else args.dict[0]
+    on_result = _result_recorder(found, potfile, stats, hit_source, known)
+
+    scanned = False
+    # 索引只包含字典原词的MD5，使用规则或其他算法时必须全量扫描
+    if not args.no_index and not rules and args.hash_type == 'md5' and isinstance(dictionaries, str):
+        from dict_index import DictionaryIndex, index_path_for, index_status
+        index_path = index_path_for(dictionaries, args.index_dir)
+        if index_status(dictionaries, index_path) == 'valid':
+            with DictionaryIndex(dictionaries, index_path) as index:
+                for target in targets:
+                    word = cached.get(target) or index.lookup(target)
+                    if word is not None:
+                        on_result(target, word)
+            if stats is not None:
+                stats.save()
+            scanned = True
+
+    words = keyspace = 0
+    resumed = False
+    dedup = None
+    priority = []
+    if not scanned:
+        from engine import create_crack_job
+        settings = _settings_from_args(args)
+        settings['rules'] = rules
+        settings['hash_type'] = args.hash_type
+        settings['cracked'] = cached
+        settings['dedup'] = {'auto': 'auto', 'on': True, 'off': False}[args.dedup]
+        if stats is not None:
+            # 历史命中最多的口令先算；多个字典时命中率高的字典先扫
+            priority = settings['priority'] = stats.priority_words(args.priority_words)
+            settings['dictionary_rates'] = stats.hit_rates()
+        job = create_crack_job(dictionaries, targets, settings)
+        known.update(job.found)
+        try:
+            job.run(_progress_printer(args.progress), on_result)
+        except KeyboardInterrupt:
+            job.stop()
+            raise
+        finally:
+            if stats is not None:
+                from ordering import record_scans
+                record_scans(stats, job, dictionaries)
+                stats.save()
+        words = job.processed_words
+        keyspace = job.keyspace()
+        resumed = job.resumed
+        if getattr(job, 'dictionaries', None):
+            for name, processed, total, dict_words, skipped in job.dictionary_progress():
+                emit({'event': 'dictionary', 'name': name, 'bytes': processed, 'total_bytes': total,
+                      'words': dict_words, 'skipped': skipped})
+            if job.dedup is not None:
+                dedup = {'skipped': job.skipped_words, 'saved_hashes': job.skipped_words * job.rule_count,
+                         'filter_bytes': job.dedup.nbytes}
+
+    emit({'event': 'summary', 'found': len(found), 'total': len(targets), 'cached': len(cached),
+          'words': words, 'rules': len(rules), 'keyspace': keyspace, 'index': scanned,
+          'dedup': dedup, 'priority': len(priority), 'resumed': resumed, 'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK if len(found) == len(targets) else EXIT_NOT_FOUND
+
+
+def cmd_mask(args):
+    from mask import MaskError
+    from engine import MaskJob
+    targets = _read_targets(args)
+    settings = _settings_from_args(args)
+    settings['charsets'] = _mask_charsets(args)
+    settings['hash_type'] = args.hash_type
+    potfile = _open_potfile(args)
+    settings['cracked'] = cached = potfile.lookup_many(targets) if potfile is not None else {}
+    try:
+        job = MaskJob(args.mask, targets, settings)
+    except MaskError as e:
+        raise CliError(f"掩码错误: {e}")
+    started = time.perf_counter()
+    found = {}
+    stats = _open_hit_stats(args)
+    on_result = _result_recorder(found, potfile, stats, known=set(job.found))
+
+    try:
+        job.run(_progress_printer(args.progress), on_result)
+    except KeyboardInterrupt:
+        job.stop()
+        raise
+    finally:
+        if stats is not None:
+            stats.save()
+    emit({'event': 'summary', 'found': len(found), 'total': len(targets), 'cached': len(cached),
+          'candidates': job.processed_words, 'keyspace': job.keyspace(), 'resumed': job.resumed,
+          'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK if len(found) == len(targets) else EXIT_NOT_FOUND
+
+
+def cmd_regex(args):
+    import re
+    _require_file(args.dict)
+    for pattern in args.pattern:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise CliError(f"正则表达式错误: {pattern}: {e}")
+    from engine import RegexJob
+    started = time.perf_counter()
+    settings = dict(_settings_from_args(args), hash_type=args.hash_type, salt=args.salt)
+    job = RegexJob(args.dict, args.pattern, settings)
+
+    def on_result(word, pattern):
+        emit({'event': 'match', 'plain': word, 'pattern': pattern,
+              'hash': job.kernel.hexdigests([word.encode('utf-8', 'surrogateescape')], job.salt)[0]})
+
+    try:
+        job.run(_progress_printer(args.progress), on_result)
+    except KeyboardInterrupt:
+        job.stop()
+        raise
+    emit({'event': 'summary', 'matches': job.match_count, 'words': job.processed_words,
+          'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK if job.match_count else EXIT_NOT_FOUND
+
+
+def _mask_charsets(args):
+    return {key: value for key, value in
+            (('1', args.charset1), ('2', args.charset2), ('3', args.charset3), ('4', args.charset4))
+            if value}
+
+
+def cmd_serve(args):
+    from distributed import Coordinator
+    if bool(args.dict) == bool(args.mask):
+        raise CliError("请指定字典(-d)或掩码(--mask)中的一个")
+    targets = _read_targets(args)
+    settings = {'coordinator': args.listen, 'token': args.token, 'rules': _read_rules(args),
+                'heartbeat_timeout': args.heartbeat_timeout, 'hash_type': args.hash_type}
+    if args.unit_size:
+        settings['unit_size'] = args.unit_size
+    if args.dict:
+        _require_file(args.dict)
+    else:
+        from mask import MaskError, Mask
+        settings['mask'] = args.mask
+        settings['charsets'] = _mask_charsets(args)
+        try:
+            Mask(args.mask, settings['charsets'])
+        except MaskError as e:
+            raise CliError(f"掩码错误: {e}")
+    potfile = _open_potfile(args)
+    settings['cracked'] = cached = potfile.lookup_many(targets) if potfile is not None else {}
+    job = Coordinator(targets, args.dict, settings)
+    host, port = job.address
+    emit({'event': 'listening', 'host': host, 'port': port, 'units': len(job.units)}, sys.stderr)
+    started = time.perf_counter()
+    found = {}
+    try:
+        job.run(_progress_printer(args.progress), _result_recorder(found, potfile))
+    except KeyboardInterrupt:
+        job.stop()
+        raise
+    emit({'event': 'summary', 'found': len(found), 'total': len(targets), 'cached': len(cached),
+          'units': len(job.units), 'words': job.processed_words,
+          'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK if len(found) == len(targets) else EXIT_NOT_FOUND
+
+
+def cmd_worker(args):
+    from distributed import ProtocolError, Worker
+    for path in args.dict or ():
+        _require_file(path)
+    worker = Worker(args.coordinator, _settings_from_args(args), args.dict or (), args.dict_dir or (),
+                    args.name, args.token)
+
+    def on_event(kind, fields):
+        if kind == 'found':
+            emit({'event': 'found', 'hash': fields['hash'], 'plain': fields['plain']})
+        elif kind == 'job':
+            emit({'event': 'job', 'kind': fields['spec']['kind'], 'dict': fields['dictionary'],
+                  'mask': fields['spec'].get('mask')}, sys.stderr)
+        elif args.progress:
+            emit(dict(fields, event=kind), sys.stderr)
+
+    started = time.perf_counter()
+    try:
+        finished = worker.run(on_event)
+    except ProtocolError as e:
+        raise CliError(str(e))
+    except KeyboardInterrupt:
+        worker.stop()
+        raise
+    emit({'event': 'summary', 'units': worker.units_done, 'finished': finished,
+          'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK if finished else EXIT_IO
+
+
+def cmd_hash(args):
+    kernel = _kernel(args)
+    salt = args.salt.encode('utf-8')
+    lines = args.text if args.text else (line.rstrip('\r\n') for line in sys.stdin)
+    for text in lines:
+        digest = kernel.hexdigests([text.encode('utf-8')], salt)[0]
+        emit({'plain': text, 'hash': f"{digest}:{args.salt}" if kernel.salted else digest})
+    return EXIT_OK
+
+
+def cmd_index(args):
+    from dict_index import build_index, index_path_for, index_status
+    _require_file(args.dict)
+    index_path = index_path_for(args.dict, args.index_dir)
+    status = index_status(args.dict, index_path)
+    if args.check:
+        emit({'event': 'index', 'dict': args.dict, 'index': index_path, 'status': status})
+        return EXIT_OK if status == 'valid' else EXIT_NOT_FOUND
+    started = time.perf_counter()
+    on_progress = _progress_printer(args.progress)
+    count = build_index(args.dict, index_path,
+                        (lambda done, total: on_progress(done, total, 0, '')) if on_progress else None)
+    emit({'event': 'index', 'dict': args.dict, 'index': index_path, 'status': 'valid',
+          'records': count, 'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK
+
+
+def cmd_pot(args):
+    from potfile import Potfile
+    with Potfile(args.potfile) as potfile:
+        if args.action == 'import':
+            if not args.file:
+                raise CliError("请指定要导入的文件")
+            _require_file(args.file)
+            with open(args.file, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                added, invalid = potfile.import_lines(f)
+            emit({'event': 'pot', 'action': 'import', 'added': added, 'invalid': invalid,
+                  'total': len(potfile)})
+            return EXIT_OK
+        out = open(args.file, 'w', encoding='utf-8', errors='surrogateescape') if args.file else sys.stdout
+        try:
+            for line in potfile.export_lines():
+                out.write(line + '\n')
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    return EXIT_OK
+
+
+def cmd_order(args):
+    from ordering import write_ordered
+    _require_file(args.dict)
+    stats = _open_hit_stats(args)
+    started = time.perf_counter()
+    on_progress = _progress_printer(args.progress)
+    count = write_ordered(args.dict, args.output, stats, args.freq_format,
+                          (lambda done, total: on_progress(done, total, 0, '')) if on_progress else None)
+    emit({'event': 'order', 'dict': args.dict, 'output': args.output, 'words': count,
+          'hit_words': len(stats.words) if stats is not None else 0,
+          'elapsed': round(time.perf_counter() - started, 3)})
+    return EXIT_OK
+
+
+def build_parser():
+    from hash_kernels import DEFAULT_KERNEL, kernel_names
+    from ordering import DEFAULT_PRIORITY_WORDS, FREQUENCY_FORMATS
+    parser = argparse.ArgumentParser(prog='md5cracker', description="MD5字典破解命令行工具")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    dict_opts = argparse.ArgumentParser(add_help=False)
+    dict_opts.add_argument('-d', '--dict', required=True, help="字典文件路径")
+
+    target_opts = argparse.ArgumentParser(add_help=False)
+    target_opts.add_argument('-H', '--hash-file', help="哈希文件，每行一个(兼容 user:hash 格式)")
+
+    engine_opts = argparse.ArgumentParser(add_help=False)
+    engine_opts.add_argument('--engine', choices=('thread', 'process'), default='thread',
+                             help="破解引擎，默认thread")
+    engine_opts.add_argument('--workers', type=int, default=None, help="process引擎的进程数")
+    engine_opts.add_argument('--batch-size', type=int, default=None,
+                             help="固定批大小(thread引擎为单词数，掩码模式为候选数)")
+    engine_opts.add_argument('--chunk-bytes', type=int, default=None,
+                             help="固定process引擎每个工作单元的字节数")
+    engine_opts.add_argument('--progress', action='store_true', help="向标准错误输出进度")
+
+    index_opts = argparse.ArgumentParser(add_help=False)
+    index_opts.add_argument('--index-dir', default=os.path.join(os.getcwd(), 'md5_index'),
+                            help="索引目录，默认与图形界面一致的 ./md5_index")
+
+    pot_opts = argparse.ArgumentParser(add_help=False)
+    pot_opts.add_argument('--potfile', default=os.path.join(os.getcwd(), 'md5_cracker.pot'),
+                          help="已破解哈希的缓存文件，默认与图形界面一致的 ./md5_cracker.pot")
+
+    checkpoint_opts = argparse.ArgumentParser(add_help=False)
+    checkpoint_opts.add_argument('--checkpoint-dir', default=os.path.join(os.getcwd(), 'md5_checkpoints'),
+                                 help="检查点目录，相同输入的任务会从中断处继续，默认 ./md5_checkpoints")
+    checkpoint_opts.add_argument('--checkpoint-interval', type=float, default=30.0,
+                                 help="检查点保存间隔(秒)，默认30")
+    checkpoint_opts.add_argument('--no-checkpoint', action='store_true', help="不保存也不读取检查点")
+
+    target_opts.add_argument('--no-potfile', action='store_true', help="不查询也不写入potfile")
+
+    stats_opts = argparse.ArgumentParser(add_help=False)
+    stats_opts.add_argument('--hit-stats', default=os.path.join(os.getcwd(), 'md5_hit_stats.json'),
+                            help="命中统计文件，默认与图形界面一致的 ./md5_hit_stats.json")
+    stats_opts.add_argument('--no-hit-stats', action='store_true', help="不读取也不更新命中统计")
+
+    kernel_opts = argparse.ArgumentParser(add_help=False)
+    kernel_opts.add_argument('-m', '--hash-type', choices=kernel_names(), default=DEFAULT_KERNEL,
+                             help="哈希算法，默认md5；加盐算法的目标写作 hash:salt")
+
+    salt_opts = argparse.ArgumentParser(add_help=False)
+    salt_opts.add_argument('--salt', default='', help="加盐算法使用的盐")
+
+    token_opts = argparse.ArgumentParser(add_help=False)
+    token_opts.add_argument('--token', default=os.environ.get('MD5_CRACKER_TOKEN', ''),
+                            help="协调端与工作端共用的连接令牌，默认取环境变量 MD5_CRACKER_TOKEN")
+
+    crack = sub.add_parser('crack', parents=[target_opts, kernel_opts, engine_opts, index_opts,
+                                             checkpoint_opts, pot_opts, stats_opts],
+                           help="字典破解一个或多个MD5")
+    crack.add_argument('-d', '--dict', required=True, action='append',
+                       help="字典文件路径，可重复指定以依次扫描多个字典")
+    crack.add_argument('hashes', nargs='*', help="目标哈希")
+    crack.add_argument('--dedup', choices=('auto', 'on', 'off'), default='auto',
+                       help="多个字典时用布隆过滤器跳过已尝试过的单词，auto在规则数不少于8条时启用")
+    crack.add_argument('-r', '--rules', help="hashcat风格的变形规则文件，每行一条规则")
+    crack.add_argument('--no-index', action='store_true', help="不使用索引，始终全量扫描")
+    crack.add_argument('--priority-words', type=int, default=DEFAULT_PRIORITY_WORDS,
+                       help=f"扫描前先计算的历史高频命中口令数，0为不使用，默认{DEFAULT_PRIORITY_WORDS}")
+    crack.set_defaults(func=cmd_crack)
+
+    mask = sub.add_parser('mask', parents=[target_opts, kernel_opts, engine_opts, checkpoint_opts, pot_opts,
+                                           stats_opts],
+                          help="按掩码暴力破解一个或多个MD5")
+    mask.add_argument('mask', help="掩码，如 ?u?l?l?l?d?d?d?d，也可以是hcmask行 ?l?d,?1?1?1")
+    mask.add_argument('hashes', nargs='*', help="目标哈希")
+    for n in '1234':
+        mask.add_argument(f'-{n}', f'--custom-charset{n}', dest=f'charset{n}', help=f"自定义字符集 ?{n}")
+    mask.set_defaults(func=cmd_mask)
+
+    regex = sub.add_parser('regex', parents=[dict_opts, kernel_opts, salt_opts, engine_opts],
+                           help="查找MD5匹配正则的单词")
+    regex.add_argument('pattern', nargs='+', help="正则表达式(从MD5开头匹配)，多个时一遍扫描同时匹配")
+    regex.set_defaults(func=cmd_regex)
+
+    hash_cmd = sub.add_parser('hash', parents=[kernel_opts, salt_opts], help="计算文本的MD5")
+    hash_cmd.add_argument('text', nargs='*', help="要计算的文本，缺省时从标准输入读取")
+    hash_cmd.set_defaults(func=cmd_hash)
+
+    index = sub.add_parser('index', parents=[index_opts], help="构建或检查字典索引")
+    index.add_argument('-d', '--dict', required=True, help="字典文件路径")
+    index.add_argument('--check', action='store_true', help="只检查索引状态")
+    index.add_argument('--progress', action='store_true', help="向标准错误输出进度")
+    index.set_defaults(func=cmd_index)
+
+    pot = sub.add_parser('pot', parents=[pot_opts], help="导入或导出 hash:plain 格式的破解记录")
+    pot.add_argument('action', choices=('import', 'export'))
+    pot.add_argument('file', nargs='?', help="导入的文件；导出时缺省写到标准输出")
+    pot.set_defaults(func=cmd_pot)
+
+    order = sub.add_parser('order', parents=[dict_opts, stats_opts],
+                           help="按命中统计和频率列生成重排后的紧凑字典副本")
+    order.add_argument('-o', '--output', required=True, help="输出文件，可以与字典相同(原地重排)")
+    order.add_argument('--freq-format', choices=FREQUENCY_FORMATS, default=None,
+                       help="字典自带的频率列: uniq 为 sort | uniq -c 的输出，tab 为 单词<TAB>次数")
+    order.add_argument('--progress', action='store_true', help="向标准错误输出进度")
+    order.set_defaults(func=cmd_order)
+
+    serve = sub.add_parser('serve', parents=[target_opts, kernel_opts, pot_opts, token_opts],
+                           help="作为协调端把字典或掩码切分为工作单元分发给工作端")
+    serve.add_argument('hashes', nargs='*', help="目标哈希")
+    serve.add_argument('-d', '--dict', help="字典文件路径，工作端需要有相同的字典")
+    serve.add_argument('--mask', help="掩码，与 -d 二选一")
+    for n in '1234':
+        serve.add_argument(f'-{n}', f'--custom-charset{n}', dest=f'charset{n}', help=f"自定义字符集 ?{n}")
+    serve.add_argument('-r', '--rules', help="变形规则文件，由工作端在本地展开")
+    serve.add_argument('--listen', default='0.0.0.0:7788', help="监听地址，默认 0.0.0.0:7788")
+    serve.add_argument('--unit-size', type=int, default=None,
+                       help="工作单元大小(字典为字节数，掩码为候选数)，默认按规则数自动选择")
+    serve.add_argument('--heartbeat-timeout', type=float, default=15.0,
+                       help="超过该秒数收不到心跳即认为工作端失联并重新分配其单元，默认15")
+    serve.add_argument('--progress', action='store_true', help="向标准错误输出进度")
+    serve.set_defaults(func=cmd_serve)
+
+    worker = sub.add_parser('worker', parents=[engine_opts, token_opts],
+                            help="作为工作端连接协调端并处理分到的工作单元")
+    worker.add_argument('coordinator', help="协调端地址 HOST:PORT")
+    worker.add_argument('-d', '--dict', action='append', help="本地字典路径，可重复指定")
+    worker.add_argument('--dict-dir', action='append', help="按文件名查找字典的目录，可重复指定")
+    worker.add_argument('--name', default=None, help="工作端名称，默认为主机名")
+    worker.set_defaults(func=cmd_worker)
+    parser.commands = sub.choices
+    return parser
+
+
+def parse_args(argv=None):
+    """解析命令行；子命令的位置参数可以与选项交错，如 mask '?d?d' --engine thread HASH
+
+    顶层解析器含子命令，不支持 parse_intermixed_args，因此直接交给子命令的解析器。
+    """
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    command = parser.commands.get(argv[0]) if argv else None
+    if command is None:
+        return parser.parse_args(argv)
+    args = command.parse_intermixed_args(argv[1:])
+    args.command = argv[0]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        return args.func(args)
+    except CliError as e:
+        emit({'event': 'error', 'message': str(e)}, sys.stderr)
+        return e.code
+    except OSError as e:
+        emit({'event': 'error', 'message': str(e)}, sys.stderr)
+        return EXIT_IO
+    except KeyboardInterrupt:
+        emit({'event': 'error', 'message': "已中断"}, sys.stderr)
+        return EXIT_INTERRUPTED
+
+
+if __name__ == '__main__':
+    sys.exit(main())
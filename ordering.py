@@ -0,0 +1,247 @@
+"""命中频率统计与候选重排：让最可能命中的候选先被哈希
+
+破解结果大多来自少数常见口令，它们却散落在字典各处。HitStats 从历次破解的命中
+结果中累计每个明文的命中次数，以及每个字典的命中数和已扫描字节数，保存在一个
+小型JSON文件中。据此可以：
+    priority_words  扫描字典前先计算历史命中最多的若干口令(优先批次)；
+    hit_rates       全部字典模式下按每MB命中数从高到低安排字典顺序(order_dictionaries)；
+    write_ordered   生成按命中次数、字典自带的频率列(如 sort | uniq -c 的输出)降序
+                    重排并去掉频率列的紧凑字典副本。
+重排只改变候选的先后，不增加候选，总工作量不变而首个命中的期望时间缩短。
+"""
+import os
+import json
+import heapq
+import struct
+import tempfile
+import threading
+
+from crack_core import normalize_line
+
+VERSION = 1
+# 统计文件最多保留的明文数，超出时淘汰命中次数最少的
+DEFAULT_MAX_WORDS = 100_000
+# 扫描前先行计算的优先候选数，约相当于哈希10毫秒
+DEFAULT_PRIORITY_WORDS = 10_000
+# 字典频率列的格式: uniq 为 "  次数 单词"(sort | uniq -c 的输出)，tab 为 "单词<TAB>次数"
+FREQUENCY_FORMATS = ('uniq', 'tab')
+# 外部排序时每个有序段的记录数
+RUN_RECORDS = 1_000_000
+# 排序键: 大端序的 (~命中次数, ~频率, 行号) 使bytes比较即为所需顺序，其后为单词长度
+SORT_KEY = struct.Struct('>QQQI')
+_MAX_KEY = 0xFFFFFFFFFFFFFFFF
+
+
+class OrderingCancelled(Exception):
+    pass
+
+
+class HitStats:
+    """命中统计：{明文: 命中次数} 与 {字典绝对路径: {'hits': 命中数, 'bytes': 已扫描字节}}
+
+    所有方法线程安全，save() 之前的修改只在内存中。
+    """
+
+    def __init__(self, path, max_words=DEFAULT_MAX_WORDS):
+        self.path = path
+        self.max_words = max_words
+        self.words = {}
+        self.dictionaries = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            raise ValueError(f"不是有效的命中统计文件: {self.path}") from None
+        if not isinstance(data, dict) or data.get('version') != VERSION:
+            raise ValueError(f"不是有效的命中统计文件: {self.path}")
+        self.words = data.get('words', {})
+        self.dictionaries = data.get('dictionaries', {})
+
+    def _dictionary(self, dictionary):
+        return self.dictionaries.setdefault(os.path.abspath(dictionary), {'hits': 0, 'bytes': 0})
+
+    def record(self, word, dictionary=None):
+        """记录一次命中，dictionary 为命中所在的字典(掩码等模式为None)"""
+        with self._lock:
+            self.words[word] = self.words.get(word, 0) + 1
+            if dictionary:
+                self._dictionary(dictionary)['hits'] += 1
+            self._dirty = True
+
+    def record_scan(self, dictionary, nbytes):
+        """记录一次扫描处理过的字节数，作为字典命中率的分母"""
+        if nbytes <= 0:
+            return
+        with self._lock:
+            self._dictionary(dictionary)['bytes'] += nbytes
+            self._dirty = True
+
+    def top_words(self, limit=DEFAULT_PRIORITY_WORDS):
+        """命中次数最多的明文，按次数降序"""
+        with self._lock:
+            return heapq.nlargest(limit, self.words, key=self.words.get)
+
+    def priority_words(self, limit=DEFAULT_PRIORITY_WORDS):
+        """优先批次：命中次数最多的明文(bytes)，供引擎在扫描字典前先行计算"""
+        return [word.encode('utf-8', 'surrogateescape') for word in self.top_words(limit)]
+
+    def hit_rates(self):
+        """各字典的每MB命中数，只包含扫描过的字典"""
+        with self._lock:
+            return {path: d['hits'] / d['bytes'] * 1024 * 1024
+                    for path, d in self.dictionaries.items() if d['bytes']}
+
+    def save(self):
+        """淘汰多余的明文后整体重写统计文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            if len(self.words) > self.max_words:
+                self.words = {word: self.words[word]
+                              for word in heapq.nlargest(self.max_words, self.words, key=self.words.get)}
+            data = {'version': VERSION, 'words': self.words, 'dictionaries': self.dictionaries}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._dirty = False
+
+
+def record_scans(stats, job, file_path):
+    """把字典任务已扫描的字节数计入统计，file_path 为单个字典路径或全部字典模式的路径列表"""
+    if hasattr(job, 'dictionary_progress'):
+        for d, (_, processed, _, _, _) in zip(job.dictionaries, job.dictionary_progress()):
+            stats.record_scan(d['path'], processed)
+    elif isinstance(file_path, str):
+        stats.record_scan(file_path, job.processed_bytes)
+
+
+def order_dictionaries(paths, rates=None):
+    """按每MB命中数降序排列字典，使单位扫描量的命中期望最高的字典先扫描
+
+    没有统计的字典按已知字典的平均命中率估计；排序稳定，命中率相同的保持原有顺序。
+    """
+    if not rates:
+        return list(paths)
+    known = [rates[os.path.abspath(path)] for path in paths if os.path.abspath(path) in rates]
+    prior = sum(known) / len(known) if known else 0.0
+    return sorted(paths, key=lambda path: -rates.get(os.path.abspath(path), prior))
+
+
+def split_frequency(line, frequency_format=None):
+    """字典行 -> (单词, 频率)，不符合频率列格式的行频率为0、整行作为单词"""
+    if frequency_format == 'uniq':
+        count, sep, word = line.lstrip().partition(b' ')
+        if sep and count.isdigit():
+            return normalize_line(word), int(count)
+    elif frequency_format == 'tab':
+        word, sep, count = line.rstrip(b'\r\n').rpartition(b'\t')
+        if sep and count.strip().isdigit():
+            return normalize_line(word), int(count)
+    return normalize_line(line), 0
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            key = f.read(SORT_KEY.size)
+            if len(key) < SORT_KEY.size:
+                return
+            yield key + f.read(SORT_KEY.unpack(key)[3])
+
+
+def _write_run(records, directory):
+    records.sort()
+    fd, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(b''.join(records))
+    return path
+
+
+def write_ordered(file_path, out_path, stats=None, frequency_format=None, on_progress=None,
+                  should_stop=None):
+    """写出按 (命中次数, 频率) 降序、同分保持原顺序重排的紧凑字典副本，返回单词数
+
+    副本每行一个规范化后的单词，不含频率列和空行。有分数的单词经外部归并排序放在
+    前面，其余单词按原顺序直接接在后面，内存占用有上限。统计中出现过的单词只保留
+    第一次出现。out_path 可以与 file_path 相同。
+    """
+    hits = stats.words if stats is not None else {}
+    total = os.path.getsize(file_path)
+    directory = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(directory, exist_ok=True)
+    runs = []
+    records = []
+    seen = set()
+    count = 0
+    fd, tail_path = tempfile.mkstemp(suffix='.tail', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as tail, open(file_path, 'rb') as f:
+            offset = 0
+            for lineno, line in enumerate(f):
+                if lineno % 65536 == 0:
+                    if should_stop and should_stop():
+                        raise OrderingCancelled()
+                    if on_progress:
+                        on_progress(offset, total)
+                offset += len(line)
+                word, frequency = split_frequency(line, frequency_format)
+                if not word:
+                    continue
+                hit_count = hits.get(word.decode('utf-8', 'surrogateescape'), 0) if hits else 0
+                if hit_count:
+                    if word in seen:
+                        continue
+                    seen.add(word)
+                count += 1
+                if not hit_count and not frequency:
+                    tail.write(word + b'\n')
+                    continue
+                records.append(SORT_KEY.pack(_MAX_KEY - hit_count, _MAX_KEY - frequency, lineno,
+                                             len(word)) + word)
+                if len(records) >= RUN_RECORDS:
+                    runs.append(_write_run(records, directory))
+                    records = []
+        records.sort()
+        if runs:
+            runs.append(_write_run(records, directory))
+            merged = heapq.merge(*(_read_run(path) for path in runs))
+        else:
+            merged = records
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for record in merged:
+                    out.write(record[SORT_KEY.size:] + b'\n')
+                with open(tail_path, 'rb') as tail:
+                    while True:
+                        block = tail.read(1024 * 1024)
+                        if not block:
+                            break
+                        out.write(block)
+            os.replace(tmp_path, out_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if on_progress:
+            on_progress(total, total)
+        return count
+    finally:
+        for path in runs + [tail_path]:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,217 @@
+"""已破解哈希的持久缓存(potfile)：追加写入的二进制日志 + 内存中的LRU索引
+
+文件结构:
+    头部  MAGIC(6) 版本(u16)
+    记录  MD5摘要(16字节) 明文长度(u16) 明文(UTF-8)
+加载时按顺序重放全部记录，同一哈希以最后一条为准，因此记录顺序就是最近使用顺序：
+新结果和缓存命中都追加到文件末尾。条目数超过上限时淘汰最久未使用的条目，
+文件中失效记录过多时整体重写(压缩)。导入导出使用常见的 hash:plain 文本格式，
+含换行、冒号开头等无法直接表示的明文写作 $HEX[...]。
+"""
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+
+from crack_core import HASH_TOKEN_RE
+
+MAGIC = b'MD5POT'
+VERSION = 1
+HEADER = struct.Struct('<6sH')
+RECORD = struct.Struct('<16sH')
+MAX_PLAIN_BYTES = 0xFFFF
+DEFAULT_MAX_ENTRIES = 1_000_000
+# 文件大小超过有效数据的倍数且大于下限时压缩
+COMPACT_RATIO = 2
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+def _encode_plain(plain):
+    return plain.encode('utf-8', 'surrogateescape')
+
+
+def format_line(target_hash, plain):
+    """输出一行 hash:plain，必要时使用 $HEX[] 编码"""
+    if '\n' in plain or '\r' in plain or plain.startswith('$HEX['):
+        plain = f"$HEX[{_encode_plain(plain).hex()}]"
+    return f"{target_hash}:{plain}"
+
+
+def parse_line(line):
+    """解析 hash:plain 行，返回 (十六进制哈希, 明文) 或 None"""
+    line = line.rstrip('\r\n')
+    target_hash, sep, plain = line.partition(':')
+    if not sep or len(target_hash) != 32 or not HASH_TOKEN_RE.fullmatch(target_hash):
+        return None
+    if plain.startswith('$HEX[') and plain.endswith(']'):
+        try:
+            plain = bytes.fromhex(plain[5:-1]).decode('utf-8', 'surrogateescape')
+        except ValueError:
+            return None
+    return target_hash.lower(), plain
+
+
+class Potfile:
+    """哈希 -> 明文的持久缓存，所有方法线程安全"""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._file_bytes = 0
+        self._live_bytes = 0
+        self._load()
+        self._file = open(self.path, 'ab')
+
+    def _load(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            with open(self.path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION))
+            self._file_bytes = HEADER.size
+            return
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        magic, version = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的potfile: {self.path}")
+        pos = HEADER.size
+        while pos + RECORD.size <= len(data):
+            digest, length = RECORD.unpack_from(data, pos)
+            end = pos + RECORD.size + length
+            if end > len(data):
+                break
+            self._put(digest, data[pos + RECORD.size:end])
+            pos = end
+        if pos < len(data):
+            # 上次写入中断留下的不完整记录直接截掉
+            with open(self.path, 'r+b') as f:
+                f.truncate(pos)
+        self._file_bytes = pos
+        self._evict()
+
+    def _put(self, digest, plain_bytes):
+        old = self._entries.pop(digest, None)
+        if old is not None:
+            self._live_bytes -= RECORD.size + len(old)
+        self._entries[digest] = plain_bytes
+        self._live_bytes += RECORD.size + len(plain_bytes)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            _, plain_bytes = self._entries.popitem(last=False)
+            self._live_bytes -= RECORD.size + len(plain_bytes)
+
+    def _append(self, digest, plain_bytes):
+        self._file.write(RECORD.pack(digest, len(plain_bytes)) + plain_bytes)
+        self._file.flush()
+        self._file_bytes += RECORD.size + len(plain_bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, target_hash):
+        return bytes.fromhex(target_hash) in self._entries
+
+    def get(self, target_hash):
+        """查询明文，命中时记为最近使用，未命中返回None"""
+        return self.lookup_many([target_hash]).get(target_hash)
+
+    def lookup_many(self, target_hashes):
+        """批量查询，返回 {十六进制哈希: 明文}"""
+        found = {}
+        with self._lock:
+            for target_hash in target_hashes:
+                digest = bytes.fromhex(target_hash)
+                plain_bytes = self._entries.get(digest)
+                if plain_bytes is None:
+                    continue
+                found[target_hash] = plain_bytes.decode('utf-8', 'surrogateescape')
+                self._touch(digest, plain_bytes)
+            self._maybe_compact()
+        return found
+
+    def _touch(self, digest, plain_bytes):
+        if next(reversed(self._entries)) == digest:
+            return
+        self._entries.move_to_end(digest)
+        self._append(digest, plain_bytes)
+
+    def add(self, target_hash, plain):
+        """记录一条破解结果，返回是否为新条目"""
+        digest = bytes.fromhex(target_hash)
+        plain_bytes = _encode_plain(plain)
+        if len(plain_bytes) > MAX_PLAIN_BYTES:
+            return False
+        with self._lock:
+            is_new = self._entries.get(digest) != plain_bytes
+            if is_new:
+                self._put(digest, plain_bytes)
+                self._append(digest, plain_bytes)
+                self._evict()
+            else:
+                self._touch(digest, plain_bytes)
+            self._maybe_compact()
+        return is_new
+
+    def _maybe_compact(self):
+        if self._file_bytes > COMPACT_MIN_BYTES and \
+                self._file_bytes > COMPACT_RATIO * (HEADER.size + self._live_bytes):
+            self._compact()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        """按最近使用顺序重写全部有效记录"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION))
+                for digest, plain_bytes in self._entries.items():
+                    f.write(RECORD.pack(digest, len(plain_bytes)) + plain_bytes)
+            self._file.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            if self._file.closed:
+                self._file = open(self.path, 'ab')
+        self._file_bytes = HEADER.size + self._live_bytes
+
+    def import_lines(self, lines):
+        """导入 hash:plain 文本行，返回 (新增条数, 无法识别的行数)"""
+        added = invalid = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            parsed = parse_line(line)
+            if parsed is None:
+                invalid += 1
+            elif self.add(*parsed):
+                added += 1
+        return added, invalid
+
+    def export_lines(self):
+        """按最近使用顺序产出 hash:plain 文本行"""
+        with self._lock:
+            items = list(self._entries.items())
+        for digest, plain_bytes in items:
+            yield format_line(digest.hex(), plain_bytes.decode('utf-8', 'surrogateescape'))
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,226 @@
+"""多进程破解引擎：工作进程通过mmap按字节区间读取字典，绕开GIL限制"""
+import os
+import mmap
+import time
+import multiprocessing
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+
+from crack_core import (DEFAULT_BATCH_LATENCY, IN_FLIGHT_PER_WORKER, BatchTuner, crack_batch,
+                        decode_word, digest_targets, estimate_words, map_bounded, normalize_line,
+                        normalize_target)
+from checkpoint import checkpoint_identity, dictionary_source, make_checkpointer, seed_found
+from hash_kernels import get_kernel
+from instrumentation import RunStats, timed_iter, worker_name
+from rules import compile_rules, expand
+
+# 每个任务处理的初始字典字节数及自动调节范围，任务边界总是对齐到换行符
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# 工作进程每处理多少行检查一次停止标志
+STOP_CHECK_INTERVAL = 8192
+
+_worker_state = {}
+
+
+def default_worker_count():
+    return os.cpu_count() or 1
+
+
+def _init_worker(file_path, target_hashes, stop_event, rule_lines=(), dedup=None, hash_type=None):
+    """工作进程初始化：映射字典文件，缓存目标哈希并编译变形规则
+
+    dedup 为共享内存中的去重过滤器，各工作进程共用同一份；hash_type 为哈希算法名。
+    """
+    f = open(file_path, 'rb')
+    size = os.fstat(f.fileno()).st_size
+    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+    _worker_state['file'] = f
+    _worker_state['mm'] = mm
+    _worker_state['kernel'] = get_kernel(hash_type)
+    _worker_state['targets'] = digest_targets(target_hashes, _worker_state['kernel'])
+    _worker_state['stop_event'] = stop_event
+    _worker_state['rules'] = compile_rules(rule_lines)
+    _worker_state['dedup'] = dedup
+
+
+def _crack_range(start, end):
+    """处理字典中[start, end)字节区间
+
+    返回(命中列表, 行数, 去重跳过的行数, 字节数, 最后一个单词, 耗时, 工作进程名, 切分行的耗时)。
+    """
+    began = time.perf_counter()
+    targets = _worker_state['targets']
+    stop_event = _worker_state['stop_event']
+    rules = _worker_state['rules']
+    dedup = _worker_state['dedup']
+    kernel = _worker_state['kernel']
+    # 有规则时每个单词展开为多个候选，相应缩小每次检查停止标志之间的单词数
+    step = max(1, STOP_CHECK_INTERVAL // (len(rules) or 1))
+    words = [word for word in map(normalize_line, _worker_state['mm'][start:end].split(b'\n')) if word]
+    normalized = time.perf_counter()
+    hits = []
+    count = skipped = 0
+    for i in range(0, len(words), step):
+        if stop_event.is_set():
+            break
+        batch = words[i:i + step]
+        fresh = dedup.add_new(batch) if dedup is not None else batch
+        candidates = expand(fresh, rules) if rules else fresh
+        hits.extend((target, decode_word(word)) for target, word in crack_batch(candidates, targets, kernel))
+        count += len(batch)
+        skipped += len(batch) - len(fresh)
+    last_word = words[count - 1][:64] if count else b''
+    return (hits, count, skipped, end - start, last_word, time.perf_counter() - began, worker_name(),
+            normalized - began)
+
+
+def split_ranges(file_path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """按需产出字典文件中按换行对齐的字节区间，chunk_size可为整数或BatchTuner
+
+    start 必须位于行首，用于从检查点继续；end 同样须位于行首，只切分到该处为止。
+    """
+    size = os.path.getsize(file_path) if end is None else min(end, os.path.getsize(file_path))
+    if start >= size:
+        return
+    with open(file_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            while start < size:
+                step = chunk_size if isinstance(chunk_size, int) else chunk_size.size
+                end = mm.find(b'\n', min(start + step, size) - 1)
+                end = size if end == -1 else end + 1
+                yield start, end
+                start = end
+        finally:
+            mm.close()
+
+
+class ProcessCrackEngine:
+    """基于进程池的字典破解，进度与结果通过回调上报，不依赖Qt
+
+    settings.start_offset、settings.end_offset、settings.dedup_filter、settings.priority
+    与 settings.stats 的含义同 engine.CrackJob，优先候选在主进程中计算。工作进程的
+    耗时随结果带回后计入 stats。
+    """
+
+    def __init__(self, file_path, target_hashes, workers=None, chunk_size=None,
+                 batch_latency=DEFAULT_BATCH_LATENCY, rules=None, settings=None):
+        self.file_path = file_path
+        self.target_hashes = [normalize_target(h) for h in target_hashes]
+        self.remaining = set(self.target_hashes)
+        self.workers = workers or default_worker_count()
+        # chunk_size 为空时按实测耗时自动调节任务大小
+        self.tuner = BatchTuner(DEFAULT_CHUNK_SIZE, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE,
+                                batch_latency, chunk_size)
+        end_offset = (settings or {}).get('end_offset')
+        self.total_bytes = os.path.getsize(file_path) if end_offset is None else \
+            min(end_offset, os.path.getsize(file_path))
+        # 规则在主进程先编译一次以尽早报告语法错误，工作进程收到的是规则文本
+        self.rule_lines = list(rules or [])
+        self.rule_count = len(compile_rules(self.rule_lines)) or 1
+        self.dedup = (settings or {}).get('dedup_filter')
+        self.priority = list((settings or {}).get('priority') or [])
+        self.stats = (settings or {}).get('stats') or RunStats()
+        self.kernel = get_kernel((settings or {}).get('hash_type'))
+        self.processed_bytes = (settings or {}).get('start_offset', 0)
+        self.processed_words = 0
+        self.skipped_words = 0
+        self.current_word = b''
+        self.found = {}
+        self.checkpoint = make_checkpointer(settings, checkpoint_identity(
+            'dict', dictionary_source(file_path), self.target_hashes, self.rule_lines, self.kernel.name))
+        state = self.checkpoint.load() if self.checkpoint else None
+        self.resumed = state is not None
+        seed_found(self.remaining, self.found, state, (settings or {}).get('cracked'))
+        if state:
+            self.processed_bytes = state['position']
+            self.processed_words = state['processed_words']
+        self._stop_event = multiprocessing.Event()
+
+    def keyspace(self):
+        """候选总数 = 单词数 × 规则数，扫描结束前单词数为估计值"""
+        return estimate_words(self.processed_words, self.processed_bytes, self.total_bytes) * self.rule_count
+
+    def run(self, on_progress=None, on_result=None):
+        """执行破解，返回是否正常结束（未被外部停止）"""
+        if on_result:
+            for target, word in self.found.items():
+                on_result(target, word)
+        if not self.total_bytes or not self.remaining:
+            return True
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.file_path, self.target_hashes, self._stop_event, self.rule_lines, self.dedup,
+                      self.kernel.name)
+        )
+        tasks = (((start, end), None)
+                 for start, end in split_ranges(self.file_path, self.tuner, self.processed_bytes,
+                                                self.total_bytes))
+        results = timed_iter(map_bounded(executor, _crack_range, tasks,
+                                         self.workers * IN_FLIGHT_PER_WORKER, self._stop_event.is_set),
+                             self.stats)
+        completed = False
+        try:
+            if self._crack_priority(on_result):
+                completed = True
+                return True
+            with closing(results):
+                for _, (hits, count, skipped, nbytes, last_word, elapsed, worker, normalize) in results:
+                    self.tuner.record(nbytes, elapsed)
+                    self.stats.add_time('normalize', normalize)
+                    self.stats.add_time('hash', elapsed - normalize)
+                    self.stats.batch(worker, count, elapsed)
+                    for target, word in hits:
+                        if target in self.remaining:
+                            self.remaining.discard(target)
+                            self.found[target] = word
+                            if on_result:
+                                on_result(target, word)
+                    # 停止后收到的区间可能只处理了一部分，不计入已完成位置
+                    if self._stop_event.is_set():
+                        break
+                    self.processed_bytes += nbytes
+                    self.processed_words += count
+                    self.skipped_words += skipped
+                    self.current_word = last_word
+                    if self.checkpoint:
+                        self.checkpoint.update(self.processed_bytes, self.processed_words,
+                                               self.remaining, self.found)
+                    if on_progress:
+                        on_progress(self.processed_bytes, self.total_bytes, self.processed_words,
+                                    decode_word(last_word)[:20])
+                    if not self.remaining:
+                        completed = True
+                        return True
+            completed = not self._stop_event.is_set()
+            return completed
+        finally:
+            self._stop_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self.checkpoint:
+                self.checkpoint.finish(completed, self.processed_bytes, self.processed_words,
+                                       self.remaining, self.found)
+
+    def _crack_priority(self, on_result):
+        """扫描字典之前先计算优先候选，返回目标是否已全部命中"""
+        if not self.priority:
+            return False
+        began = time.perf_counter()
+        targets = digest_targets(sorted(self.remaining), self.kernel)
+        for target, word in crack_batch(self.priority, targets, self.kernel):
+            if target in self.remaining:
+                self.remaining.discard(target)
+                self.found[target] = decode_word(word)
+                if on_result:
+                    on_result(target, self.found[target])
+        # 没有规则时字典中的同一单词无需再算一次；有规则时其变形尚未尝试，不能跳过
+        if self.dedup is not None and not self.rule_lines:
+            self.dedup.add_new(self.priority)
+        self.stats.add_time('priority', time.perf_counter() - began)
+        return not self.remaining
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,149 @@
+"""正则降级：把只约束固定位置十六进制字符的正则改写为原始摘要上的掩码比较
+
+正则工具按 re.match 语义在摘要的32位小写十六进制串上匹配。常见的查询如 ^25d5
+(前缀)、.*beef$ (后缀)、^.{8}00 (固定位置)，实际上只是要求摘要的某几个半字节
+等于给定值，可以写成 (int(摘要) & 掩码) == 值，既不必为每个单词生成十六进制串，
+也不必运行正则引擎；MD5 kernel 还能在 NumPy 状态字上对整批候选一次比较。
+
+可以降级的正则由以下元素顺序组成，其余写法(字符类、分组、分支、标志等)交给 re：
+    开头的 ^ 或 \\A、结尾的 $ 或 \\Z
+    十六进制字符字面量(其他字面量永远不会出现在摘要中，整个正则不可能匹配)
+    . 与定长重复 .{n}、字面量的定长重复 0{4}
+    至多一个不定长的 .* / .{n,}，其后的部分在有结尾锚点时从摘要末尾往前对齐
+PatternSet 把多个正则合并为一遍扫描：摘要只计算一次，每个正则各自比较。
+"""
+import re
+
+from hash_kernels import match_masks
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python 3.10 及更早
+    import sre_parse
+    import sre_constants
+
+# 摘要的十六进制长度，所有kernel都输出16字节摘要
+DIGEST_HEX_LENGTH = 32
+# 降级结果：该正则不可能匹配任何摘要
+NEVER = 'never'
+
+_HEX_NIBBLES = {ord(c): int(c, 16) for c in '0123456789abcdef'}
+_BEGIN = (sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING)
+_END = (sre_constants.AT_END, sre_constants.AT_END_STRING)
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+
+
+def _element(op, av):
+    """单个字符位置的约束：半字节值、None(任意字符)，无法降级时抛出 ValueError"""
+    if op is sre_constants.ANY:
+        return None
+    if op is sre_constants.LITERAL:
+        # 非十六进制字面量以 -1 标记，整个正则不可能匹配
+        return _HEX_NIBBLES.get(av, -1)
+    raise ValueError
+
+
+def lower_pattern(pattern):
+    """正则 -> (掩码, 值) 两个128位整数(按摘要字节大端序)，不可能匹配时返回 NEVER，无法降级时返回None"""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    # (?i) 等标志改变字面量含义，交给 re 处理
+    if parsed.state.flags & ~sre_constants.SRE_FLAG_UNICODE:
+        return None
+    items = list(parsed)
+    head, tail = [], []
+    gap = end = False
+    try:
+        for i, (op, av) in enumerate(items):
+            if op is sre_constants.AT and av in _BEGIN and i == 0:
+                continue
+            if op is sre_constants.AT and av in _END and i == len(items) - 1:
+                end = True
+                continue
+            elements = tail if gap else head
+            if op in _REPEATS:
+                low, high, sub = av
+                if len(sub) != 1:
+                    return None
+                element = _element(*sub[0])
+                elements.extend([element] * low)
+                if high == low:
+                    continue
+                # 不定长部分只允许一个，且必须是任意字符
+                if gap or element is not None or high != sre_constants.MAXREPEAT:
+                    return None
+                gap = True
+            else:
+                elements.append(_element(op, av))
+    except ValueError:
+        return None
+    if -1 in head or -1 in tail:
+        return NEVER
+    if gap and not end:
+        # .* 之后还有内容时可出现在任意位置，不是固定位置约束
+        if tail:
+            return None
+        tail_start = DIGEST_HEX_LENGTH
+    elif gap:
+        tail_start = DIGEST_HEX_LENGTH - len(tail)
+        if tail_start < len(head):
+            return NEVER
+    elif end and len(head) != DIGEST_HEX_LENGTH:
+        return NEVER
+    else:
+        tail_start = DIGEST_HEX_LENGTH
+    if len(head) > DIGEST_HEX_LENGTH:
+        return NEVER
+    mask = value = 0
+    for position, nibble in list(enumerate(head)) + list(enumerate(tail, tail_start)):
+        if nibble is not None:
+            shift = (DIGEST_HEX_LENGTH - 1 - position) * 4
+            mask |= 0xF << shift
+            value |= nibble << shift
+    return mask, value
+
+
+class PatternSet:
+    """一遍扫描同时匹配多个正则：能降级的用掩码比较，其余用 re
+
+    lower 为False时全部交给 re，仅用于对照测试。
+    """
+
+    def __init__(self, patterns, lower=True):
+        self.patterns = list(patterns)
+        self.masked = []
+        self.fallback = []
+        for index, pattern in enumerate(self.patterns):
+            compiled = re.compile(pattern)
+            lowered = lower_pattern(pattern) if lower else None
+            if lowered is None:
+                self.fallback.append((index, compiled.match))
+            elif lowered is not NEVER:
+                self.masked.append((index, lowered))
+
+    @property
+    def lowered(self):
+        """已降级为掩码比较的正则序号"""
+        return [index for index, _ in self.masked]
+
+    def match(self, words, kernel, salt=b''):
+        """返回 [(单词bytes, 正则序号)]；同一单词匹配多个正则时各出现一次"""
+        hits = []
+        masks = [mask for _, mask in self.masked]
+        if not self.fallback:
+            if masks:
+                for (index, _), matched in zip(self.masked, kernel.masked_match(words, masks, salt)):
+                    hits.extend((word, index) for word in matched)
+            return hits
+        # 需要十六进制串时摘要只算一次，掩码比较也在同一份摘要上进行
+        if not isinstance(words, list):
+            words = list(words)
+        digests = kernel.digests(words, salt)
+        for (index, _), matched in zip(self.masked, match_masks(words, digests, masks)):
+            hits.extend((word, index) for word in matched)
+        hexdigests = [digest.hex() for digest in digests]
+        for index, match in self.fallback:
+            hits.extend((word, index) for word, hexdigest in zip(words, hexdigests) if match(hexdigest))
+        return hits
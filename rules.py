@@ -0,0 +1,186 @@
+"""单词变形规则：兼容hashcat规则语法的常用子集，在工作线程/进程内按需生成候选
+
+规则文件每行一条规则，一条规则由若干操作依次组成，空行和 # 开头的行被忽略。
+位置参数 N/M 取 0-9 或 A-Z(表示10-35)，X/Y 为单个字符。
+
+    :     不变                l     全部小写            u     全部大写
+    c     首字母大写其余小写  C     首字母小写其余大写  t     大小写互换
+    TN    切换第N位大小写     r     反转                d     重复一次
+    pN    重复N次             f     追加反转            {     循环左移
+    }     循环右移            $X    末尾追加X           ^X    开头插入X
+    [     删除首字符          ]     删除末字符          DN    删除第N位
+    xNM   取第N位起M个字符    ONM   删除第N位起M个字符  iNX   在第N位插入X
+    oNX   把第N位改为X        'N    截断为前N个字符     sXY   把X全部替换为Y
+    @X    删除全部X           zN    首字符重复N次       ZN    末字符重复N次
+    q     每个字符重复一次    k     交换前两个字符      K     交换后两个字符
+
+位置超出单词长度时该操作不生效，与hashcat的行为一致。候选从不整体展开，
+expand 逐个产出，内存占用与规则数无关。
+"""
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _position(ch):
+    if '0' <= ch <= '9':
+        return ord(ch) - ord('0')
+    if 'A' <= ch <= 'Z':
+        return ord(ch) - ord('A') + 10
+    raise RuleError(f"无效的位置参数: {ch!r}")
+
+
+def _char(ch):
+    return ch.encode('utf-8')
+
+
+def _toggle_at(n):
+    def op(w):
+        return w[:n] + w[n:n + 1].swapcase() + w[n + 1:] if n < len(w) else w
+    return op
+
+
+def _delete_at(n):
+    def op(w):
+        return w[:n] + w[n + 1:] if n < len(w) else w
+    return op
+
+
+def _extract(n, m):
+    def op(w):
+        return w[n:n + m] if n + m <= len(w) else w
+    return op
+
+
+def _omit(n, m):
+    def op(w):
+        return w[:n] + w[n + m:] if n + m <= len(w) else w
+    return op
+
+
+def _insert(n, x):
+    def op(w):
+        return w[:n] + x + w[n:] if n <= len(w) else w
+    return op
+
+
+def _overwrite(n, x):
+    def op(w):
+        return w[:n] + x + w[n + 1:] if n < len(w) else w
+    return op
+
+
+def _rotate_left(w):
+    return w[1:] + w[:1]
+
+
+def _rotate_right(w):
+    return w[-1:] + w[:-1]
+
+
+def _invert_capitalize(w):
+    return w[:1].lower() + w[1:].upper()
+
+
+def _swap_front(w):
+    return w[1:2] + w[:1] + w[2:] if len(w) > 1 else w
+
+
+def _swap_back(w):
+    return w[:-2] + w[-1:] + w[-2:-1] if len(w) > 1 else w
+
+
+# 操作符 -> (参数格式, 构造函数)；参数格式中 N/M 为位置，X/Y 为字符
+_OPS = {
+    ':': ('', lambda: None),
+    'l': ('', lambda: bytes.lower),
+    'u': ('', lambda: bytes.upper),
+    'c': ('', lambda: bytes.capitalize),
+    'C': ('', lambda: _invert_capitalize),
+    't': ('', lambda: bytes.swapcase),
+    'T': ('N', _toggle_at),
+    'r': ('', lambda: lambda w: w[::-1]),
+    'd': ('', lambda: lambda w: w + w),
+    'p': ('N', lambda n: lambda w: w * (n + 1)),
+    'f': ('', lambda: lambda w: w + w[::-1]),
+    '{': ('', lambda: _rotate_left),
+    '}': ('', lambda: _rotate_right),
+    '$': ('X', lambda x: lambda w: w + x),
+    '^': ('X', lambda x: lambda w: x + w),
+    '[': ('', lambda: lambda w: w[1:]),
+    ']': ('', lambda: lambda w: w[:-1]),
+    'D': ('N', _delete_at),
+    'x': ('NM', _extract),
+    'O': ('NM', _omit),
+    'i': ('NX', _insert),
+    'o': ('NX', _overwrite),
+    "'": ('N', lambda n: lambda w: w[:n]),
+    's': ('XY', lambda x, y: lambda w: w.replace(x, y)),
+    '@': ('X', lambda x: lambda w: w.replace(x, b'')),
+    'z': ('N', lambda n: lambda w: w[:1] * n + w),
+    'Z': ('N', lambda n: lambda w: w + w[-1:] * n),
+    'q': ('', lambda: lambda w: bytes(b for c in w for b in (c, c))),
+    'k': ('', lambda: _swap_front),
+    'K': ('', lambda: _swap_back),
+}
+
+
+def compile_rule(line):
+    """把一条规则编译为操作函数元组，语法错误时抛出RuleError"""
+    ops = []
+    i = 0
+    while i < len(line):
+        name = line[i]
+        i += 1
+        if name == ' ':
+            continue
+        if name not in _OPS:
+            raise RuleError(f"不支持的规则操作: {name!r}")
+        spec, factory = _OPS[name]
+        if i + len(spec) > len(line):
+            raise RuleError(f"规则操作 {name!r} 缺少参数")
+        args = [_position(ch) if kind in 'NM' else _char(ch)
+                for kind, ch in zip(spec, line[i:i + len(spec)])]
+        i += len(spec)
+        op = factory(*args)
+        if op is not None:
+            ops.append(op)
+    return tuple(ops)
+
+
+def rule_lines(text):
+    """从规则文件内容中取出规则行，保留行尾空格(如 "$ " 追加空格)"""
+    lines = []
+    for line in text.splitlines():
+        if line.strip() and not line.startswith('#'):
+            lines.append(line)
+    return lines
+
+
+def compile_rules(lines):
+    """编译多条规则，错误信息中带上行号"""
+    rules = []
+    for lineno, line in enumerate(lines, 1):
+        try:
+            rules.append(compile_rule(line))
+        except RuleError as e:
+            raise RuleError(f"第{lineno}条规则 {line!r}: {e}") from None
+    return rules
+
+
+def apply_rule(rule, word):
+    for op in rule:
+        word = op(word)
+    return word
+
+
+def expand(words, rules):
+    """对每个基础单词依次应用全部规则，逐个产出非空候选"""
+    for word in words:
+        for rule in rules:
+            candidate = word
+            for op in rule:
+                candidate = op(candidate)
+            if candidate:
+                yield candidate
@@ -0,0 +1,15 @@
+"""测试共用的辅助函数"""
+import hashlib
+
+
+def md5_hex(word):
+    """明文(str 按 UTF-8 编码，或 bytes)的MD5十六进制摘要"""
+    if isinstance(word, str):
+        word = word.encode('utf-8', 'surrogateescape')
+    return hashlib.md5(word).hexdigest()
+
+
+def write_dictionary(path, words):
+    """把单词逐行写入字典文件并返回其路径"""
+    path.write_text(''.join(word + '\n' for word in words), encoding='utf-8', errors='surrogateescape')
+    return path
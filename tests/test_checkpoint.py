@@ -0,0 +1,112 @@
+import os
+import json
+
+import pytest
+
+from checkpoint import Checkpointer, checkpoint_identity, checkpoint_path_for, seed_found
+from engine import CrackJob, MaskJob, MultiDictJob
+from hash_kernels import HashKernelError
+from tests.helpers import md5_hex, write_dictionary
+
+
+def test_save_and_load(tmp_path):
+    identity = checkpoint_identity('mask', {'mask': '?d'}, ['b' * 32, 'a' * 32])
+    checkpointer = Checkpointer(str(tmp_path), identity)
+    checkpointer.extra['order'] = ['x']
+    checkpointer.save(10, 5, {'b' * 32}, {'a' * 32: 'plain'})
+    loaded = Checkpointer(str(tmp_path), identity)
+    state = loaded.load()
+    assert state['position'] == 10 and state['processed_words'] == 5
+    assert state['remaining'] == ['b' * 32] and state['found'] == {'a' * 32: 'plain'}
+    assert loaded.extra == {'order': ['x']}
+    # 目标顺序不影响身份
+    assert checkpoint_identity('mask', {'mask': '?d'}, ['a' * 32, 'b' * 32]) == identity
+
+
+def test_load_rejects_other_inputs(tmp_path):
+    identity = checkpoint_identity('mask', {'mask': '?d'}, ['a' * 32])
+    Checkpointer(str(tmp_path), identity).save(1, 1, set(), {})
+    other = checkpoint_identity('mask', {'mask': '?d'}, ['a' * 32], hash_type='ntlm')
+    assert checkpoint_path_for(other, str(tmp_path)) != checkpoint_path_for(identity, str(tmp_path))
+    assert Checkpointer(str(tmp_path), other).load() is None
+    path = checkpoint_path_for(identity, str(tmp_path))
+    with open(path, 'w') as f:
+        f.write('{broken')
+    assert Checkpointer(str(tmp_path), identity).load() is None
+    with open(path, 'w') as f:
+        json.dump({'version': 0, 'identity': identity}, f)
+    assert Checkpointer(str(tmp_path), identity).load() is None
+
+
+def test_update_interval_and_finish(tmp_path):
+    identity = checkpoint_identity('mask', {'mask': '?d'}, ['a' * 32])
+    checkpointer = Checkpointer(str(tmp_path), identity, interval=3600)
+    checkpointer.update(5, 5, {'a' * 32}, {})
+    assert not os.path.exists(checkpointer.path)
+    checkpointer.finish(False, 7, 7, {'a' * 32}, {})
+    assert Checkpointer(str(tmp_path), identity).load()['position'] == 7
+    checkpointer.finish(True, 10, 10, set(), {})
+    assert not os.path.exists(checkpointer.path)
+
+
+def test_seed_found():
+    remaining = {'a', 'b', 'c'}
+    found = {}
+    seed_found(remaining, found, {'remaining': ['b', 'c'], 'found': {'a': '1'}}, {'c': '3', 'z': '9'})
+    assert remaining == {'b'}
+    assert found == {'a': '1', 'c': '3'}
+
+
+def _stop_on_first_hit(job, hits):
+    def on_result(target, word):
+        hits[target] = word
+        job.stop()
+    return on_result
+
+
+def test_crack_job_resumes_after_stop(tmp_path):
+    words = [f'word{i:06d}' for i in range(200_000)]
+    dictionary = write_dictionary(tmp_path / 'dict.txt', words)
+    early, late = md5_hex(words[100_000]), md5_hex(words[-10])
+    settings = {'checkpoint_dir': str(tmp_path / 'cp'), 'checkpoint_interval': 0, 'dict_cache_mb': 0,
+                'batch_size': 1000}
+    job = CrackJob(str(dictionary), [early, late], dict(settings))
+    hits = {}
+    assert not job.run(on_result=_stop_on_first_hit(job, hits))
+    assert hits == {early: words[100_000]}
+    assert os.listdir(tmp_path / 'cp')
+
+    resumed = CrackJob(str(dictionary), [early, late], dict(settings))
+    assert resumed.resumed and 0 < resumed.processed_bytes < resumed.total_bytes
+    hits = {}
+    assert resumed.run(on_result=lambda target, word: hits.setdefault(target, word))
+    assert hits == {early: words[100_000], late: words[-10]}
+    assert not os.listdir(tmp_path / 'cp')
+
+
+def test_mask_job_resumes_after_stop(tmp_path):
+    early, late = md5_hex('500123'), md5_hex('999990')
+    settings = {'checkpoint_dir': str(tmp_path), 'checkpoint_interval': 0, 'batch_size': 10_000}
+    job = MaskJob('?d?d?d?d?d?d', [early, late], dict(settings))
+    hits = {}
+    assert not job.run(on_result=_stop_on_first_hit(job, hits))
+    assert hits == {early: '500123'}
+
+    resumed = MaskJob('?d?d?d?d?d?d', [early, late], dict(settings))
+    assert resumed.resumed and resumed.processed_words > 0
+    hits = {}
+    assert resumed.run(on_result=lambda target, word: hits.setdefault(target, word))
+    assert hits == {early: '500123', late: '999990'}
+    assert not os.listdir(tmp_path)
+
+
+def test_multi_dict_identity_uses_kernel_name(tmp_path):
+    paths = [str(write_dictionary(tmp_path / f'{name}.txt', ['alpha', 'beta'])) for name in 'ab']
+    settings = {'checkpoint_dir': str(tmp_path / 'cp')}
+    default = MultiDictJob(paths, [md5_hex('x')], dict(settings))
+    md5 = MultiDictJob(paths, [md5_hex('x')], dict(settings, hash_type='md5'))
+    assert default.checkpoint.path == md5.checkpoint.path
+    ntlm = MultiDictJob(paths, [md5_hex('x')], dict(settings, hash_type='ntlm'))
+    assert ntlm.checkpoint.identity['hash_type'] == 'ntlm'
+    with pytest.raises(HashKernelError):
+        MultiDictJob(paths, [md5_hex('x')], dict(settings, hash_type='sha1'))
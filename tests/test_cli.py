@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+import md5cracker
+from tests.helpers import md5_hex, write_dictionary
+
+TARGET = md5_hex('42')
+OFFLINE = ['--no-potfile', '--no-hit-stats', '--no-checkpoint']
+
+
+def _events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.parametrize('argv', [
+    ['mask', '?d?d', '--engine', 'thread', TARGET],
+    ['mask', '?d?d', TARGET, '--engine', 'thread'],
+    ['mask', '--engine', 'thread', '?d?d', TARGET],
+])
+def test_mask_argument_order(argv, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert md5cracker.main(argv + OFFLINE) == md5cracker.EXIT_OK
+    events = _events(capsys)
+    assert {'event': 'found', 'hash': TARGET, 'plain': '42'}.items() <= events[0].items()
+    assert events[-1]['found'] == 1
+
+
+def test_mask_targets_from_hash_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'hashes.txt').write_text(TARGET + '\n')
+    assert md5cracker.main(['mask', '?d?d', '-H', 'hashes.txt'] + OFFLINE) == md5cracker.EXIT_OK
+    assert _events(capsys)[-1]['found'] == 1
+
+
+def test_regex_patterns_around_options(tmp_path, capsys):
+    dictionary = write_dictionary(tmp_path / 'dict.txt', ['42', 'hello'])
+    prefix = '^' + TARGET[:4]
+    assert md5cracker.main(['regex', '-d', str(dictionary), '^zz', '--engine', 'thread', prefix]) == \
+        md5cracker.EXIT_OK
+    matches = [event for event in _events(capsys) if event['event'] == 'match']
+    assert matches == [{'event': 'match', 'plain': '42', 'pattern': prefix, 'hash': TARGET}]
+
+
+def test_batch_size_does_not_set_chunk_bytes():
+    args = md5cracker.parse_args(['crack', '-d', 'dict.txt', '--batch-size', '1000', TARGET])
+    settings = md5cracker._settings_from_args(args)
+    assert settings['batch_size'] == 1000
+    assert 'chunk_bytes' not in settings
+    args = md5cracker.parse_args(['crack', '-d', 'dict.txt', '--engine', 'process', '--chunk-bytes', '65536'])
+    assert md5cracker._settings_from_args(args)['chunk_bytes'] == 65536
+
+
+def test_hash_command(capsys):
+    assert md5cracker.main(['hash', 'abc']) == md5cracker.EXIT_OK
+    assert _events(capsys) == [{'plain': 'abc', 'hash': '900150983cd24fb0d6963f7d28e17f72'}]
+
+
+def test_missing_command_is_usage_error():
+    with pytest.raises(SystemExit) as exc:
+        md5cracker.main([])
+    assert exc.value.code == 2
@@ -0,0 +1,103 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from crack_core import map_bounded
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """记录提交的全部 future，便于检查取消情况"""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = super().submit(fn, *args)
+        self.futures.append(future)
+        return future
+
+
+def _tasks(count, pulled=None):
+    for i in range(count):
+        if pulled is not None:
+            pulled.append(i)
+        yield (i,), f'meta{i}'
+
+
+def test_results_in_submission_order():
+    # 先提交的任务耗时更长，完成顺序与提交顺序相反
+    def work(i):
+        time.sleep((20 - i) * 0.001)
+        return i * i
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(map_bounded(executor, work, _tasks(20), 8))
+    assert results == [(f'meta{i}', i * i) for i in range(20)]
+
+
+def test_in_flight_never_exceeds_window():
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def work(i):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.002)
+        with lock:
+            running[0] -= 1
+        return i
+
+    pulled = []
+    consumed = 0
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for _, result in map_bounded(executor, work, _tasks(50, pulled), 4):
+            consumed += 1
+            # 已从 tasks 取出但尚未产出的任务即在途任务
+            assert len(pulled) - consumed < 4
+    assert consumed == 50
+    assert running[1] <= 4
+
+
+def _gated_work(gate, started, ran=None):
+    """任务1开始运行时设置 started，一直运行到 gate 打开"""
+    def work(i):
+        if i == 1:
+            started.set()
+            gate.wait(10)
+        if ran is not None:
+            ran.append(i)
+        return i
+    return work
+
+
+def test_should_stop_cancels_pending():
+    gate, started = threading.Event(), threading.Event()
+    ran = []
+    stop = [False]
+    pulled = []
+    executor = RecordingExecutor(max_workers=1)
+    results = map_bounded(executor, _gated_work(gate, started, ran), _tasks(10, pulled), 4, lambda: stop[0])
+    assert next(results) == ('meta0', 0)
+    assert started.wait(10)
+    stop[0] = True
+    assert list(results) == []
+    # 任务1正在运行无法取消，排队中的2、3被取消，之后的任务不再从 tasks 中取出
+    assert [future.cancelled() for future in executor.futures] == [False, False, True, True]
+    assert pulled == [0, 1, 2, 3, 4]
+    gate.set()
+    executor.shutdown(wait=True)
+    assert ran == [0, 1]
+
+
+def test_closing_iterator_cancels_pending():
+    gate, started = threading.Event(), threading.Event()
+    executor = RecordingExecutor(max_workers=1)
+    results = map_bounded(executor, _gated_work(gate, started), _tasks(10), 3)
+    assert next(results) == ('meta0', 0)
+    assert started.wait(10)
+    results.close()
+    assert [future.cancelled() for future in executor.futures] == [False, False, True]
+    gate.set()
+    executor.shutdown(wait=True)
@@ -0,0 +1,64 @@
+import pickle
+
+from dedup import BloomFilter, filter_size
+from engine import MultiDictJob
+from tests.helpers import md5_hex, write_dictionary
+
+
+def _words(prefix, count):
+    return [f'{prefix}{i}'.encode() for i in range(count)]
+
+
+def test_no_false_negatives():
+    bloom = BloomFilter(20_000)
+    words = _words('w', 20_000)
+    assert bloom.add_new(words) == words
+    assert bloom.add_new(words) == []
+    assert all(word in bloom for word in words)
+    assert bloom.add(words[0])
+
+
+def test_duplicates_within_a_batch():
+    bloom = BloomFilter(100)
+    assert bloom.add_new([b'a', b'b', b'a', b'c', b'b']) == [b'a', b'b', b'c']
+
+
+def test_false_positive_rate_near_target():
+    bloom = BloomFilter(50_000, error_rate=1e-3)
+    bloom.add_new(_words('seen', 50_000))
+    unseen = _words('unseen', 50_000)
+    false_positives = sum(word in bloom for word in unseen)
+    assert false_positives < 50_000 * 1e-3 * 3
+    assert 0 < bloom.estimated_error_rate() < 1e-2
+
+
+def test_filter_size_respects_memory_cap():
+    blocks, hash_count = filter_size(10_000_000, 1e-4, max_bytes=1024)
+    assert blocks * 8 <= 1024 and 2 <= hash_count
+    assert BloomFilter(10_000_000, max_bytes=1024).nbytes <= 1024
+
+
+def test_shared_filter_survives_pickling():
+    bloom = BloomFilter(1000, shared=True)
+    try:
+        bloom.add_new([b'x', b'y'])
+        copy = pickle.loads(pickle.dumps(bloom))
+        try:
+            assert b'x' in copy and copy.add_new([b'z']) == [b'z']
+            assert b'z' in bloom
+        finally:
+            copy.close()
+    finally:
+        bloom.close()
+
+
+def test_multi_dict_job_skips_repeated_words(tmp_path):
+    first = write_dictionary(tmp_path / 'first.txt', [f'w{i}' for i in range(5000)])
+    second = write_dictionary(tmp_path / 'second.txt', [f'w{i}' for i in range(2500, 7500)])
+    target = md5_hex('w7000')
+    found = {}
+    job = MultiDictJob([str(first), str(second)], [target],
+                       {'dedup': True, 'checkpoint': False, 'dict_cache_mb': 0})
+    assert job.run(on_result=lambda digest, word: found.setdefault(digest, word))
+    assert found == {target: 'w7000'}
+    assert job.dictionaries[1]['skipped'] == 2500
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import dict_index
+from dict_index import DictionaryIndex, IndexBuildCancelled, build_index, index_path_for, index_status
+from tests.helpers import md5_hex, write_dictionary
+
+WORDS = [f'word{i}' for i in range(1000)] + ['  padded  ', '', '密码']
+
+
+def test_build_and_lookup(tmp_path):
+    dictionary = write_dictionary(tmp_path / 'dict.txt', WORDS)
+    index_path = index_path_for(str(dictionary), str(tmp_path / 'index'))
+    assert build_index(str(dictionary), index_path) == len(WORDS) - 1
+    with DictionaryIndex(str(dictionary), index_path) as index:
+        assert index.lookup(md5_hex('word0')) == 'word0'
+        assert index.lookup(md5_hex('word999')) == 'word999'
+        assert index.lookup(md5_hex('padded')) == 'padded'
+        assert index.lookup(md5_hex('密码')) == '密码'
+        assert index.lookup(md5_hex('missing')) is None
+        assert index.lookup('0' * 32) is None and index.lookup('f' * 32) is None
+
+
+def test_external_merge_matches_single_run(tmp_path, monkeypatch):
+    dictionary = write_dictionary(tmp_path / 'dict.txt', WORDS)
+    single = str(tmp_path / 'single.md5idx')
+    build_index(str(dictionary), single)
+    monkeypatch.setattr(dict_index, 'RUN_RECORDS', 64)
+    merged = str(tmp_path / 'merged.md5idx')
+    build_index(str(dictionary), merged)
+    with open(single, 'rb') as a, open(merged, 'rb') as b:
+        assert a.read() == b.read()
+    # 归并用的临时文件都已删除
+    assert sorted(os.listdir(tmp_path)) == ['dict.txt', 'merged.md5idx', 'single.md5idx']
+
+
+def test_index_status_follows_dictionary(tmp_path):
+    dictionary = write_dictionary(tmp_path / 'dict.txt', WORDS)
+    index_path = str(tmp_path / 'dict.md5idx')
+    assert index_status(str(dictionary), index_path) == 'missing'
+    build_index(str(dictionary), index_path)
+    assert index_status(str(dictionary), index_path) == 'valid'
+    with open(dictionary, 'a', encoding='utf-8') as f:
+        f.write('appended\n')
+    assert index_status(str(dictionary), index_path) == 'stale'
+    build_index(str(dictionary), index_path)
+    assert index_status(str(dictionary), index_path) == 'valid'
+    st = os.stat(dictionary)
+    os.utime(dictionary, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert index_status(str(dictionary), index_path) == 'stale'
+
+
+def test_corrupt_index_is_stale(tmp_path):
+    dictionary = write_dictionary(tmp_path / 'dict.txt', WORDS)
+    index_path = tmp_path / 'dict.md5idx'
+    index_path.write_bytes(b'MD5')
+    assert index_status(str(dictionary), str(index_path)) == 'stale'
+
+
+def test_cancelled_build_leaves_nothing(tmp_path):
+    dictionary = write_dictionary(tmp_path / 'dict.txt', WORDS)
+    index_dir = tmp_path / 'index'
+    with pytest.raises(IndexBuildCancelled):
+        build_index(str(dictionary), str(index_dir / 'dict.md5idx'), should_stop=lambda: True)
+    assert os.listdir(index_dir) == []
@@ -0,0 +1,145 @@
+import socket
+import threading
+
+import pytest
+
+import distributed
+from crack_core import digest_targets, drop_solved_salts
+from distributed import (Coordinator, ProtocolError, Worker, dictionary_fingerprint, parse_address,
+                         resolve_dictionary)
+from hash_kernels import get_kernel
+from tests.helpers import md5_hex, write_dictionary
+
+LOCAL = '127.0.0.1:0'
+
+
+def test_parse_address():
+    assert parse_address('example.org:9000') == ('example.org', 9000)
+    assert parse_address('example.org') == ('example.org', 7788)
+    assert parse_address(':9000') == ('0.0.0.0', 9000)
+    assert parse_address('[::1]:9000') == ('::1', 9000)
+
+
+def test_resolve_dictionary(tmp_path):
+    original = tmp_path / 'a' / 'words.txt'
+    copy = tmp_path / 'b' / 'words.txt'
+    changed = tmp_path / 'c' / 'words.txt'
+    for path, content in ((original, b'alpha\nbeta\n'), (copy, b'alpha\nbeta\n'), (changed, b'alpha\nbetb\n')):
+        path.parent.mkdir()
+        path.write_bytes(content)
+    spec = dictionary_fingerprint(str(original))
+    assert resolve_dictionary(spec, directories=[str(changed.parent), str(copy.parent)]) == str(copy)
+    assert resolve_dictionary(dict(spec, path=''), directories=[str(changed.parent)]) is None
+
+
+def _run_cluster(coordinator, workers):
+    """在后台线程中运行工作端，协调端在当前线程运行，返回 (协调端结果, 命中, 各工作端结果)"""
+    found = {}
+    results = [None] * len(workers)
+
+    def work(i):
+        results[i] = workers[i].run()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(len(workers))]
+    for thread in threads:
+        thread.start()
+    watchdog = threading.Timer(60, coordinator.stop)
+    watchdog.start()
+    try:
+        completed = coordinator.run(on_result=lambda target, word: found.setdefault(target, word))
+    finally:
+        watchdog.cancel()
+        for thread in threads:
+            thread.join(10)
+    return completed, found, results
+
+
+def _address(coordinator):
+    return '{}:{}'.format(*coordinator.address)
+
+
+def test_dictionary_units_across_workers(tmp_path):
+    words = [f'w{i:05d}' for i in range(20_000)]
+    dictionary = write_dictionary(tmp_path / 'dict.txt', words)
+    plains = [words[0], words[9_999], 'W19999!']
+    targets = [md5_hex(plain) for plain in plains] + [md5_hex('missing')]
+    coordinator = Coordinator(targets, str(dictionary), {'coordinator': LOCAL, 'unit_size': 8192,
+                                                         'rules': [':', 'u $!']})
+    workers = [Worker(_address(coordinator), {'dict_cache_mb': 0}, dictionaries=[str(dictionary)],
+                      name=f'w{i}') for i in range(2)]
+    completed, found, results = _run_cluster(coordinator, workers)
+    assert completed and results == [True, True]
+    assert found == dict(zip(targets, plains))
+    assert coordinator.processed_bytes == coordinator.total_bytes
+    assert coordinator.processed_words == len(words)
+    assert sum(worker.units_done for worker in workers) == len(coordinator.units)
+
+
+def test_mask_units_stop_when_all_found():
+    targets = [md5_hex('a00'), md5_hex('m55')]
+    coordinator = Coordinator(targets, settings={'coordinator': LOCAL, 'mask': '?l?d?d', 'unit_size': 100})
+    workers = [Worker(_address(coordinator), {}, name=f'w{i}') for i in range(2)]
+    completed, found, results = _run_cluster(coordinator, workers)
+    assert completed and results == [True, True]
+    assert found == {md5_hex('a00'): 'a00', md5_hex('m55'): 'm55'}
+
+
+def test_workers_learn_each_solved_target():
+    # 第一个目标命中时还有目标未破解，协调端通知工作端；最后一个命中直接停止
+    first, last = md5_hex('a00' + 'x') + ':x', md5_hex('z99' + 'y') + ':y'
+    coordinator = Coordinator([first, last], settings={'coordinator': LOCAL, 'mask': '?l?d?d',
+                                                       'hash_type': 'md5_pass_salt', 'unit_size': 100})
+    worker = Worker(_address(coordinator), {})
+    completed, found, results = _run_cluster(coordinator, [worker])
+    assert completed and results == [True]
+    assert found == {first: 'a00', last: 'z99'}
+    assert worker.solved == {first}
+
+
+def test_drop_solved_salts():
+    kernel = get_kernel('md5_salt_pass')
+    a, b, c = md5_hex('sa1') + ':s', md5_hex('sb2') + ':s', md5_hex('tc') + ':t'
+    targets = digest_targets([a, b, c], kernel)
+    assert set(drop_solved_salts(targets, {a, c}, kernel)) == {b's'}
+    assert drop_solved_salts(targets, {a, b, c}, kernel) == {}
+    plain = digest_targets([md5_hex('x')])
+    assert drop_solved_salts(plain, {md5_hex('x')}, get_kernel()) is plain
+
+
+def test_known_results_skip_scanning():
+    target = md5_hex('a00')
+    coordinator = Coordinator([target], settings={'coordinator': LOCAL, 'mask': '?l?d?d',
+                                                  'cracked': {target: 'a00'}})
+    found = {}
+    assert coordinator.run(on_result=lambda t, w: found.setdefault(t, w))
+    assert found == {target: 'a00'}
+
+
+def test_wrong_token_is_rejected():
+    coordinator = Coordinator([md5_hex('zzz')], settings={'coordinator': LOCAL, 'mask': '?l?l?l',
+                                                       'token': 'secret', 'unit_size': 1000})
+    thread = threading.Thread(target=coordinator.run)
+    thread.start()
+    try:
+        with pytest.raises(ProtocolError):
+            Worker(_address(coordinator), {}, token='wrong').run()
+    finally:
+        coordinator.stop()
+        thread.join(10)
+    assert not thread.is_alive()
+
+
+def test_oversized_message_closes_connection(monkeypatch):
+    monkeypatch.setattr(distributed, 'MAX_MESSAGE_BYTES', 64)
+    coordinator = Coordinator([md5_hex('zzz')], settings={'coordinator': LOCAL, 'mask': '?l?l?l'})
+    thread = threading.Thread(target=coordinator.run)
+    thread.start()
+    try:
+        with socket.create_connection(coordinator.address, timeout=10) as sock:
+            # 超长的第一行在令牌校验之前就被拒绝，不必等到换行
+            sock.sendall(b'{"type": "hello", "name": "' + b'x' * 200)
+            assert sock.recv(1024) == b''
+    finally:
+        coordinator.stop()
+        thread.join(10)
+    assert not thread.is_alive()
@@ -0,0 +1,72 @@
+import types
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+import error_log
+from error_log import RATE_LIMIT_BURST, RateLimitFilter, setup_logging, shutdown_logging
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / 'error.log'
+    yield path
+    shutdown_logging()
+
+
+def _messages(path):
+    return [line.split(' - ', 2)[2] for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def _record(message, lineno=1):
+    return logging.makeLogRecord({'msg': message, 'levelno': logging.ERROR, 'levelname': 'ERROR',
+                                  'pathname': 'test.py', 'lineno': lineno})
+
+
+def test_hot_loop_writes_burst_and_summary(log_path):
+    setup_logging(str(log_path))
+    for i in range(100):
+        logging.error(f"bad line {i}")
+    shutdown_logging()
+    assert _messages(log_path) == [f"bad line {i}" for i in range(RATE_LIMIT_BURST)] + \
+        [f"bad line 99 (最近 {100 - RATE_LIMIT_BURST} 条同类日志被省略)"]
+
+
+def test_next_window_reports_suppressed(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(error_log, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    limiter = RateLimitFilter(window=60.0, burst=1)
+    assert limiter.filter(_record('m0'))
+    assert not limiter.filter(_record('m1')) and not limiter.filter(_record('m2'))
+    # 其他调用位置不受影响
+    assert limiter.filter(_record('other', lineno=2))
+    now[0] = 61.0
+    record = _record('m3')
+    assert limiter.filter(record)
+    assert record.getMessage() == 'm3 (此前另有 2 条同类日志被省略)'
+    assert limiter.pending() == []
+
+
+def test_rotation_keeps_backups(log_path):
+    setup_logging(str(log_path), max_bytes=200, backup_count=2)
+    root = logging.getLogger()
+    for i in range(30):
+        # 每条使用不同的行号，不受限流影响
+        root.handle(_record(f"entry {i:02d} " + 'x' * 40, lineno=i))
+    shutdown_logging()
+    backups = [log_path.with_name(f'error.log.{n}') for n in (1, 2, 3)]
+    assert backups[0].exists() and backups[1].exists() and not backups[2].exists()
+    assert _messages(log_path)[-1].startswith('entry 29')
+    assert _messages(backups[0])[-1] < _messages(log_path)[0]
+
+
+def test_shutdown_drains_queue(log_path):
+    setup_logging(str(log_path))
+    # 重复调用不会重复安装
+    setup_logging(str(log_path))
+    for i in range(5):
+        logging.error(f"queued {i}")
+    shutdown_logging()
+    assert _messages(log_path) == [f"queued {i}" for i in range(5)]
+    assert not any(isinstance(handler, QueueHandler) for handler in logging.getLogger().handlers)
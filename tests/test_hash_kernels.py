@@ -0,0 +1,64 @@
+import hashlib
+
+import pytest
+
+from hash_kernels import (DEFAULT_KERNEL, HashKernelError, NtlmKernel, _md4_python, get_kernel,
+                          split_salted)
+from tests.helpers import md5_hex
+
+# RFC 1320 附录A.5 的测试向量
+MD4_VECTORS = [
+    (b'', '31d6cfe0d16ae931b73c59d7e0c089c0'),
+    (b'a', 'bde52cb31de33e46245e05fbdbd6fb24'),
+    (b'abc', 'a448017aaf21d8525fc10ae87aa6729d'),
+    (b'message digest', 'd9130a8164549fe818874806e1c7014b'),
+    (b'1234567890' * 8, 'e33b4ddc9c38f2199c3e7b164fcc0536'),
+]
+
+
+@pytest.mark.parametrize('data, expected', MD4_VECTORS)
+def test_md4_python_fallback(data, expected):
+    assert _md4_python(data).hex() == expected
+
+
+def test_ntlm_known_answer():
+    assert get_kernel('ntlm').hexdigests([b'password'])[0] == '8846f7eaee8fb117ad06bdd830b7586c'
+
+
+def test_ntlm_fallback_matches_kernel(monkeypatch):
+    kernel = NtlmKernel()
+    monkeypatch.setattr(kernel, 'md4', _md4_python)
+    assert kernel.hexdigests([b'password', b'']) == ['8846f7eaee8fb117ad06bdd830b7586c',
+                                                     '31d6cfe0d16ae931b73c59d7e0c089c0']
+
+
+def test_double_md5():
+    assert get_kernel('md5md5').hexdigests([b'hello'])[0] == md5_hex(md5_hex('hello'))
+
+
+def test_salt_positions():
+    assert get_kernel('md5_salt_pass').hexdigests([b'pass'], b'salt') == [md5_hex('saltpass')]
+    assert get_kernel('md5_pass_salt').hexdigests([b'pass'], b'salt') == [md5_hex('passsalt')]
+    assert split_salted('0' * 32 + ':s:1') == ('0' * 32, b's:1')
+
+
+@pytest.mark.parametrize('name', ['md5', 'md5md5', 'md5_salt_pass', 'md5_pass_salt', 'ntlm'])
+def test_batch_matches_single_digests(name):
+    kernel = get_kernel(name)
+    words = [f'w{i}'.encode() for i in range(300)] + ['密码'.encode('utf-8'), b'\xff\xfe']
+    batch = kernel.hexdigests(words, b'NaCl')
+    assert batch == [kernel.digest(word, b'NaCl').hex() for word in words]
+    targets = {kernel.digest(words[7], b'NaCl'): 'target'}
+    assert kernel.match(words, targets, b'NaCl') == [('target', words[7])]
+
+
+def test_md5_batch():
+    words = [b'', b'a', b'password']
+    assert get_kernel('md5').hexdigests(words) == [hashlib.md5(word).hexdigest() for word in words]
+
+
+def test_get_kernel():
+    assert get_kernel(None).name == DEFAULT_KERNEL == 'md5'
+    assert get_kernel('').name == 'md5'
+    with pytest.raises(HashKernelError):
+        get_kernel('sha1')
@@ -0,0 +1,51 @@
+import pstats
+import threading
+
+from engine import CrackJob
+from instrumentation import RunProfiler, RunStats
+from tests.helpers import md5_hex, write_dictionary
+
+
+def _worker_marker(done):
+    sum(range(1000))
+    done.set()
+
+
+def _profiled_functions(path):
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_profiler_covers_worker_threads(tmp_path):
+    path = tmp_path / 'run.prof'
+    done = threading.Event()
+    with RunProfiler(str(path)):
+        worker = threading.Thread(target=_worker_marker, args=(done,))
+        worker.start()
+        worker.join()
+    assert done.is_set()
+    assert '_worker_marker' in _profiled_functions(path)
+
+
+def test_profiler_around_crack_job(tmp_path):
+    words = [f'word{i}' for i in range(5000)]
+    dictionary = write_dictionary(tmp_path / 'dict.txt', words)
+    target = md5_hex('word4321')
+    found = {}
+    path = tmp_path / 'crack.prof'
+    with RunProfiler(str(path)):
+        job = CrackJob(str(dictionary), [target], {'workers': 2, 'checkpoint': False, 'dict_cache_mb': 0})
+        job.run(on_result=lambda digest, word: found.setdefault(digest, word))
+    assert found == {target: 'word4321'}
+    assert '_process_batch' in _profiled_functions(path)
+
+
+def test_run_stats_snapshot():
+    stats = RunStats()
+    stats.add_time('hash', 0.5)
+    stats.add_time('hash', 0.25, calls=2)
+    stats.batch('w1', 100, 0.003)
+    stats.finish()
+    snapshot = stats.snapshot()
+    assert snapshot['stages']['hash'] == {'seconds': 0.75, 'calls': 3}
+    assert snapshot['workers']['w1']['words'] == 100
+    assert sum(snapshot['batch_latency_ms']['counts']) == 1
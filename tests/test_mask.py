@@ -0,0 +1,94 @@
+import itertools
+
+import pytest
+
+import vector_md5
+from crack_core import digest_targets
+from hash_kernels import Md5Kernel, get_kernel
+from mask import Mask, MaskError, parse_mask, split_keyspace
+from tests.helpers import md5_hex
+
+DIGITS = b'0123456789'
+LOWER = b'abcdefghijklmnopqrstuvwxyz'
+
+
+def _all_candidates(charsets):
+    return [bytes(candidate) for candidate in itertools.product(*charsets)]
+
+
+def test_parse_builtin_charsets():
+    assert parse_mask('?d?l') == [DIGITS, LOWER]
+    assert parse_mask('a??b') == [b'a', b'?', b'b']
+    assert len(parse_mask('?a')[0]) == 95
+    assert parse_mask('?b')[0] == bytes(range(256))
+    assert parse_mask('é?d') == [b'\xc3', b'\xa9', DIGITS]
+
+
+def test_parse_custom_charsets():
+    assert parse_mask('?1?1', {'1': 'ab?d'}) == [b'ab' + DIGITS] * 2
+    assert parse_mask('?l?d,?1?2?1', {'2': 'x'})[0] == LOWER + DIGITS
+    assert parse_mask('?l?d,?1?2?1', {'2': 'x'})[1] == b'x'
+    # "\\," 为字面量逗号：自定义字符集1为 a,b
+    assert parse_mask('a\\,b,?1') == [b'a,b']
+    # 字符集内重复的字符只保留一次
+    assert parse_mask('?1', {'1': 'aab?h'}) == [b'ab0123456789cdef']
+
+
+@pytest.mark.parametrize('text, custom', [
+    ('?', None), ('?x', None), ('?1', None), ('', None), ('?1', {'1': ''}), ('a,b,c,d,e,?1', None),
+])
+def test_parse_errors(text, custom):
+    with pytest.raises(MaskError):
+        parse_mask(text, custom)
+
+
+def test_candidates_in_keyspace_order():
+    mask = Mask('?d?l?d')
+    expected = _all_candidates(mask.charsets)
+    assert mask.keyspace == len(expected) == 2600
+    assert [mask.candidate(i) for i in range(mask.keyspace)] == expected
+    with pytest.raises(IndexError):
+        mask.candidate(mask.keyspace)
+
+
+def test_split_keyspace():
+    assert list(split_keyspace(10, 4)) == [(0, 4), (4, 8), (8, 10)]
+    assert list(split_keyspace(10, 4, start=7)) == [(7, 10)]
+    assert list(split_keyspace(0, 4)) == []
+
+
+def _kernels():
+    return [
+        pytest.param(Md5Kernel(vectorize=False), id='md5'),
+        pytest.param(Md5Kernel(vectorize=True), id='md5_vector',
+                     marks=pytest.mark.skipif(not vector_md5.available(), reason="NumPy未安装")),
+        pytest.param(get_kernel('md5md5'), id='md5md5'),
+        pytest.param(get_kernel('ntlm'), id='ntlm'),
+    ]
+
+
+@pytest.mark.parametrize('kernel', _kernels())
+@pytest.mark.parametrize('chunk', [3000, 2048, 997, 26])
+def test_partitioned_enumeration_finds_every_target(kernel, chunk):
+    mask = Mask('?l?d?l')
+    candidates = _all_candidates(mask.charsets)
+    # 区间边界两侧与首尾的候选
+    plains = [candidates[i] for i in (0, 25, 26, 259, 260, 996, 997, 2047, 2048, len(candidates) - 1)]
+    hexes = kernel.hexdigests(plains)
+    targets = digest_targets(hexes, kernel)
+    hits, count = [], 0
+    for start, end in split_keyspace(mask.keyspace, chunk):
+        range_hits, range_count, last = mask.crack_range(start, end, targets, kernel=kernel)
+        assert last == candidates[end - 1]
+        hits.extend(range_hits)
+        count += range_count
+    assert count == mask.keyspace
+    assert sorted(hits) == sorted(zip(hexes, plains))
+
+
+def test_crack_range_stops_early():
+    mask = Mask('?d?d?d?d?d?d')
+    target = md5_hex('999999')
+    kernel = Md5Kernel(vectorize=False)
+    hits, count, _ = mask.crack_range(0, mask.keyspace, digest_targets([target], kernel), lambda: True, kernel)
+    assert hits == [] and count < mask.keyspace
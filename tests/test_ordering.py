@@ -0,0 +1,41 @@
+import ordering
+from ordering import HitStats, split_frequency, write_ordered
+
+
+def _lines(path):
+    with open(path, 'rb') as f:
+        return f.read().split(b'\n')[:-1]
+
+
+def test_split_frequency():
+    assert split_frequency(b'   12 hello\n', 'uniq') == (b'hello', 12)
+    assert split_frequency(b'hello\t7\r\n', 'tab') == (b'hello', 7)
+    assert split_frequency(b'no count\n', 'uniq') == (b'no count', 0)
+
+
+def test_write_ordered_by_hits_then_frequency(tmp_path):
+    source = tmp_path / 'dict.txt'
+    source.write_bytes(b'   1 alpha\n   9 beta\n   5 gamma\n     \n   1 delta\n   3 alpha\n')
+    stats = HitStats(str(tmp_path / 'stats.json'))
+    stats.record('delta')
+    out = tmp_path / 'ordered.txt'
+    assert write_ordered(str(source), str(out), stats, 'uniq') == 5
+    assert _lines(out) == [b'delta', b'beta', b'gamma', b'alpha', b'alpha']
+
+
+def test_write_ordered_keeps_long_lines(tmp_path, monkeypatch):
+    # 超过65535字节的单词同样要能排序，且经过外部归并时完整读回
+    monkeypatch.setattr(ordering, 'RUN_RECORDS', 2)
+    long_word = b'x' * 70_000
+    source = tmp_path / 'dict.txt'
+    source.write_bytes(b'   2 short\n   5 ' + long_word + b'\n   1 tail\n   9 first\n   0 zero\n')
+    out = tmp_path / 'ordered.txt'
+    assert write_ordered(str(source), str(out), frequency_format='uniq') == 5
+    assert _lines(out) == [b'first', long_word, b'short', b'tail', b'zero']
+
+
+def test_write_ordered_in_place(tmp_path):
+    source = tmp_path / 'dict.txt'
+    source.write_bytes(b'a\t1\nb\t3\nc\n')
+    write_ordered(str(source), str(source), frequency_format='tab')
+    assert _lines(source) == [b'b', b'a', b'c']
@@ -0,0 +1,73 @@
+import os
+
+import potfile
+from potfile import HEADER, Potfile, format_line, parse_line
+from tests.helpers import md5_hex
+
+
+def test_line_format_round_trip():
+    for plain in ['simple', 'with:colon', 'line\nbreak', '$HEX[41]', '密码', '\udcff raw byte', '']:
+        line = format_line(md5_hex(plain), plain)
+        assert parse_line(line + '\n') == (md5_hex(plain), plain)
+    assert parse_line('A' * 32 + ':x') == ('a' * 32, 'x')
+    assert parse_line('nothash:x') is None
+    assert parse_line('a' * 32 + ':$HEX[zz]') is None
+
+
+def test_persist_and_reload(tmp_path):
+    path = str(tmp_path / 'test.pot')
+    with Potfile(path) as pot:
+        assert pot.add(md5_hex('one'), 'one')
+        assert pot.add(md5_hex('二'), '二')
+        assert not pot.add(md5_hex('one'), 'one')
+    with Potfile(path) as pot:
+        assert len(pot) == 2
+        assert pot.get(md5_hex('二')) == '二'
+        assert pot.lookup_many([md5_hex('one'), md5_hex('missing')]) == {md5_hex('one'): 'one'}
+        assert md5_hex('one') in pot
+
+
+def test_truncated_record_is_dropped(tmp_path):
+    path = str(tmp_path / 'test.pot')
+    with Potfile(path) as pot:
+        pot.add(md5_hex('keep'), 'keep')
+        pot.add(md5_hex('torn'), 'torn')
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 2)
+    with Potfile(path) as pot:
+        assert pot.get(md5_hex('keep')) == 'keep'
+        assert pot.get(md5_hex('torn')) is None
+    assert os.path.getsize(path) < size - 2
+
+
+def test_lru_eviction_follows_use(tmp_path):
+    path = str(tmp_path / 'test.pot')
+    with Potfile(path, max_entries=2) as pot:
+        pot.add(md5_hex('a'), 'a')
+        pot.add(md5_hex('b'), 'b')
+        pot.get(md5_hex('a'))
+        pot.add(md5_hex('c'), 'c')
+        assert pot.get(md5_hex('b')) is None
+        assert pot.get(md5_hex('a')) == 'a'
+    with Potfile(path, max_entries=2) as pot:
+        assert sorted(line.split(':')[1] for line in pot.export_lines()) == ['a', 'c']
+
+
+def test_compaction_keeps_live_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(potfile, 'COMPACT_MIN_BYTES', 0)
+    path = str(tmp_path / 'test.pot')
+    with Potfile(path) as pot:
+        for i in range(50):
+            pot.add(md5_hex('x'), f'value{i}')
+        assert os.path.getsize(path) < 2 * (HEADER.size + 50)
+    with Potfile(path) as pot:
+        assert len(pot) == 1 and pot.get(md5_hex('x')) == 'value49'
+
+
+def test_import_and_export(tmp_path):
+    path = str(tmp_path / 'test.pot')
+    lines = [format_line(md5_hex('a'), 'a'), 'garbage', '', format_line(md5_hex('b\n'), 'b\n')]
+    with Potfile(path) as pot:
+        assert pot.import_lines(lines) == (2, 1)
+        assert list(pot.export_lines()) == [lines[0], lines[3]]
@@ -0,0 +1,99 @@
+import re
+import random
+
+import pytest
+
+import vector_md5
+from hash_kernels import Md5Kernel, get_kernel
+from regex_compiler import NEVER, PatternSet, lower_pattern
+from tests.helpers import md5_hex
+
+PREFIX = ['^25d5', '^0', r'\A00', '^abcdef0123', '0f']
+SUFFIX = ['.*beef$', '.*0$', r'.*a\Z', '^1.*f$']
+FIXED = ['^.{8}00', '.{30}ab', '^.{4}a.{2}b', '^a{2}', '^.{31}e$', '^.{32}$', '^.{3,}ff$', '^..1']
+FALLBACK = ['^[0-3]', '.*[0-9]$', '^(ab|cd)', '(?i)^AB', '^a+', '^.*ab', '^a?b', '.*ab.*']
+NEVER_MATCH = ['^xyz', '^.{33}', '^ab$', '^Z', '^.{20}.*.{13}$']
+ALL_PATTERNS = PREFIX + SUFFIX + FIXED + FALLBACK + NEVER_MATCH
+
+
+def _words():
+    rng = random.Random(3)
+    words = [f'w{i}'.encode() for i in range(20000)]
+    words += [bytes(rng.randrange(256) for _ in range(rng.randrange(1, 70))) for _ in range(3000)]
+    words += ['密码{}'.format(i).encode('utf-8') for i in range(3000)]
+    return words
+
+
+WORDS = _words()
+
+
+def _expected(words, patterns, kernel, salt=b''):
+    # 正则工具按 re.match 语义在十六进制摘要上匹配
+    compiled = [re.compile(pattern) for pattern in patterns]
+    return sorted((word, index) for word, hexdigest in zip(words, kernel.hexdigests(words, salt))
+                  for index, regex in enumerate(compiled) if regex.match(hexdigest))
+
+
+@pytest.mark.parametrize('pattern', PREFIX + SUFFIX + FIXED)
+def test_lowered_patterns(pattern):
+    assert lower_pattern(pattern) not in (None, NEVER)
+
+
+@pytest.mark.parametrize('pattern', FALLBACK)
+def test_fallback_patterns(pattern):
+    assert lower_pattern(pattern) is None
+
+
+@pytest.mark.parametrize('pattern', NEVER_MATCH)
+def test_impossible_patterns(pattern):
+    assert lower_pattern(pattern) is NEVER
+
+
+def test_prefix_mask():
+    assert lower_pattern('^25d5') == (0xFFFF << 112, 0x25D5 << 112)
+    assert lower_pattern('.*beef$') == (0xFFFF, 0xBEEF)
+    assert lower_pattern('^.{8}00') == (0xFF << 88, 0)
+
+
+@pytest.mark.parametrize('pattern', ALL_PATTERNS)
+def test_single_pattern_matches_re(pattern):
+    kernel = Md5Kernel(vectorize=False)
+    assert sorted(PatternSet([pattern]).match(WORDS, kernel)) == _expected(WORDS, [pattern], kernel)
+
+
+def test_anchored_patterns_match_re_search():
+    # 以 ^ 或 .* 开头的正则 match 与 search 结果相同
+    kernel = Md5Kernel(vectorize=False)
+    for pattern in PREFIX[:4] + SUFFIX + FIXED[:1]:
+        regex = re.compile(pattern)
+        expected = sorted(word for word, hexdigest in zip(WORDS, kernel.hexdigests(WORDS))
+                          if regex.search(hexdigest))
+        assert sorted(word for word, _ in PatternSet([pattern]).match(WORDS, kernel)) == expected
+
+
+@pytest.mark.parametrize('kernel', [
+    pytest.param(Md5Kernel(vectorize=True), id='md5_vector',
+                 marks=pytest.mark.skipif(not vector_md5.available(), reason="NumPy未安装")),
+    pytest.param(Md5Kernel(vectorize=False), id='md5'),
+    pytest.param(get_kernel('md5md5'), id='md5md5'),
+    pytest.param(get_kernel('md5_salt_pass'), id='md5_salt_pass'),
+])
+def test_pattern_set_matches_re(kernel):
+    salt = b'salt' if kernel.salted else b''
+    lowered = PREFIX + SUFFIX + FIXED
+    assert sorted(PatternSet(lowered).match(WORDS, kernel, salt)) == _expected(WORDS, lowered, kernel, salt)
+    assert sorted(PatternSet(ALL_PATTERNS).match(WORDS, kernel, salt)) == \
+        _expected(WORDS, ALL_PATTERNS, kernel, salt)
+
+
+def test_lower_false_uses_re_only():
+    patterns = PatternSet(PREFIX, lower=False)
+    assert patterns.lowered == []
+    kernel = Md5Kernel(vectorize=False)
+    assert sorted(patterns.match(WORDS, kernel)) == _expected(WORDS, PREFIX, kernel)
+
+
+def test_md5_prefix_known_word():
+    word = b'hello'
+    prefix = '^' + md5_hex(word)[:6]
+    assert (word, 0) in PatternSet([prefix]).match([word, b'other'], Md5Kernel(vectorize=False))
@@ -0,0 +1,72 @@
+import pytest
+
+from rules import RuleError, apply_rule, compile_rule, compile_rules, expand, rule_lines
+
+# hashcat 规则文档中以 p@ssW0rd 为例的结果
+HASHCAT_EXAMPLES = [
+    (':', b'p@ssW0rd'),
+    ('l', b'p@ssw0rd'),
+    ('u', b'P@SSW0RD'),
+    ('c', b'P@ssw0rd'),
+    ('C', b'p@SSW0RD'),
+    ('t', b'P@SSw0RD'),
+    ('T3', b'p@sSW0rd'),
+    ('r', b'dr0Wss@p'),
+    ('d', b'p@ssW0rdp@ssW0rd'),
+    ('p2', b'p@ssW0rdp@ssW0rdp@ssW0rd'),
+    ('f', b'p@ssW0rddr0Wss@p'),
+    ('{', b'@ssW0rdp'),
+    ('}', b'dp@ssW0r'),
+    ('$1', b'p@ssW0rd1'),
+    ('^1', b'1p@ssW0rd'),
+    ('[', b'@ssW0rd'),
+    (']', b'p@ssW0r'),
+    ('D3', b'p@sW0rd'),
+    ('x04', b'p@ss'),
+    ('O12', b'psW0rd'),
+    ('i4!', b'p@ss!W0rd'),
+    ('o3$', b'p@s$W0rd'),
+    ("'6", b'p@ssW0'),
+    ('ss$', b'p@$$W0rd'),
+    ('@s', b'p@W0rd'),
+    ('z2', b'ppp@ssW0rd'),
+    ('Z2', b'p@ssW0rddd'),
+    ('q', b'pp@@ssssWW00rrdd'),
+    ('k', b'@pssW0rd'),
+    ('K', b'p@ssW0dr'),
+]
+
+
+@pytest.mark.parametrize('rule, expected', HASHCAT_EXAMPLES)
+def test_hashcat_examples(rule, expected):
+    assert apply_rule(compile_rule(rule), b'p@ssW0rd') == expected
+
+
+def test_combined_rules():
+    assert apply_rule(compile_rule('c $1'), b'password') == b'Password1'
+    assert apply_rule(compile_rule('sa@ so0'), b'password') == b'p@ssw0rd'
+
+
+def test_positions_beyond_word_are_ignored():
+    for rule in ('T9', 'D9', 'x38', 'O38', 'i9X', 'o9X'):
+        assert apply_rule(compile_rule(rule), b'abc') == b'abc'
+    assert apply_rule(compile_rule('TA'), b'a' * 11) == b'a' * 10 + b'A'
+
+
+def test_rule_lines_keep_trailing_space():
+    assert rule_lines('# comment\n:\n\n$ \nc\n') == [':', '$ ', 'c']
+    assert apply_rule(compile_rule('$ '), b'ab') == b'ab '
+
+
+def test_compile_errors_name_the_line():
+    with pytest.raises(RuleError, match='第2条规则'):
+        compile_rules([':', 'c $'])
+    with pytest.raises(RuleError):
+        compile_rule('Y')
+    with pytest.raises(RuleError):
+        compile_rule('T!')
+
+
+def test_expand_order_and_empty_candidates():
+    rules = compile_rules([':', 'u', ']'])
+    assert list(expand([b'ab', b'x'], rules)) == [b'ab', b'AB', b'a', b'x', b'X']
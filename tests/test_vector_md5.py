@@ -0,0 +1,71 @@
+import random
+import hashlib
+
+import pytest
+
+import vector_md5
+from hash_kernels import Md5Kernel, match_masks
+
+if not vector_md5.available():
+    pytest.skip("NumPy未安装", allow_module_level=True)
+
+
+def _hashlib_digests(words):
+    return [hashlib.md5(word).digest() for word in words]
+
+
+def _random_words(rng, length, count):
+    return [bytes(rng.randrange(256) for _ in range(length)) for _ in range(count)]
+
+
+@pytest.mark.parametrize('length', range(vector_md5.MAX_LENGTH + 1))
+def test_digests_every_length(length):
+    words = _random_words(random.Random(length), length, 37)
+    assert vector_md5.digests(vector_md5.as_array(words, length)) == _hashlib_digests(words)
+
+
+def test_digests_non_ascii():
+    texts = ['密码一二三', 'пароль12', 'contraseña', '😀😀😀😀', 'ÄÖÜäöüß!']
+    for text in texts:
+        word = text.encode('utf-8')
+        words = [word, word[::-1], bytes(b ^ 0x80 for b in word)]
+        assert vector_md5.digests(vector_md5.as_array(words, len(word))) == _hashlib_digests(words)
+
+
+def test_too_long_rejected():
+    words = [b'x' * (vector_md5.MAX_LENGTH + 1)]
+    with pytest.raises(ValueError):
+        vector_md5.compress(vector_md5.as_array(words, len(words[0])))
+
+
+def _mixed_batch():
+    # 足够多的同长度候选走向量化路径，过长或过少的长度回退到hashlib
+    rng = random.Random(7)
+    words = []
+    for length in (4, 8, 13, 55):
+        words.extend(_random_words(rng, length, vector_md5.MIN_BATCH))
+    words.extend(_random_words(rng, 56, 50))
+    words.extend(_random_words(rng, 20, 10))
+    words.extend('口令{}'.format(i).encode('utf-8') for i in range(vector_md5.MIN_BATCH))
+    rng.shuffle(words)
+    return words
+
+
+def test_kernel_match_mixed_lengths():
+    words = _mixed_batch()
+    chosen = [words[i] for i in (0, 17, 999, 4000, len(words) - 1)]
+    chosen += [word for word in words if len(word) in (56, 20)][:2]
+    targets = {hashlib.md5(word).digest(): hashlib.md5(word).hexdigest() for word in chosen}
+    hits = Md5Kernel(vectorize=True).match(words, targets)
+    assert sorted(hits) == sorted((hashlib.md5(word).hexdigest(), word) for word in chosen)
+    assert Md5Kernel(vectorize=False).match(words, targets) == \
+        [(targets[hashlib.md5(word).digest()], word) for word in words if hashlib.md5(word).digest() in targets]
+
+
+def test_kernel_masked_match_mixed_lengths():
+    words = _mixed_batch()
+    masks = [(0xFF << 120, 0x25 << 120), (0xF, 0x3), (0xF << 64 | 0xF0, 0xA << 64 | 0x10), (0, 0)]
+    expected = match_masks(words, _hashlib_digests(words), masks)
+    results = Md5Kernel(vectorize=True).masked_match(words, masks)
+    assert [sorted(hits) for hits in results] == [sorted(hits) for hits in expected]
+    assert len(results[3]) == len(words)
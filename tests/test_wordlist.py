@@ -0,0 +1,79 @@
+import os
+
+from tests.helpers import write_dictionary
+from wordlist import DictionaryCache, WordlistStream, dictionary_cache
+
+
+def _read(path, cache, **kwargs):
+    stream = WordlistStream(str(path), cache=cache, chunk_bytes=64, **kwargs)
+    return [(words, offset) for words, offset in stream]
+
+
+def _words(prefix, count=100):
+    return [f'{prefix}{i:03d}' for i in range(count)]
+
+
+def test_cache_replays_first_read(tmp_path):
+    path = write_dictionary(tmp_path / 'a.txt', ['  padded  ', ''] + _words('a'))
+    cache = DictionaryCache()
+    first = _read(path, cache)
+    assert len(cache) == 1 and cache.get(str(path)) is not None
+    stream = WordlistStream(str(path), cache=cache)
+    assert stream.cached is not None
+    assert list(stream) == first
+    # 从块边界开始的部分读取直接切缓存
+    assert _read(path, cache, start_offset=first[2][1]) == first[3:]
+
+
+def test_changed_file_is_a_miss(tmp_path):
+    path = write_dictionary(tmp_path / 'a.txt', _words('a'))
+    cache = DictionaryCache()
+    _read(path, cache)
+    # 只更新修改时间
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.get(str(path)) is None and len(cache) == 0 and cache.nbytes == 0
+
+    _read(path, cache)
+    write_dictionary(path, _words('b'))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+    assert cache.get(str(path)) is None
+    assert [word for words, _ in _read(path, cache) for word in words] == [w.encode() for w in _words('b')]
+
+
+def test_lru_eviction_over_budget(tmp_path):
+    paths = [write_dictionary(tmp_path / f'{name}.txt', _words(name)) for name in 'abc']
+    probe = DictionaryCache()
+    _read(paths[0], probe)
+    entry_bytes = probe.nbytes
+
+    cache = DictionaryCache(max_bytes=entry_bytes * 3 // 2)
+    _read(paths[0], cache)
+    _read(paths[1], cache)
+    assert cache.get(str(paths[0])) is None
+    assert cache.get(str(paths[1])) is not None
+    assert cache.nbytes <= cache.max_bytes
+
+    cache.resize(entry_bytes * 5 // 2)
+    _read(paths[0], cache)
+    # 访问b使a成为最久未使用的字典
+    assert cache.get(str(paths[1])) is not None
+    _read(paths[2], cache)
+    assert cache.get(str(paths[0])) is None
+    assert cache.get(str(paths[1])) is not None and cache.get(str(paths[2])) is not None
+
+
+def test_only_full_reads_within_budget_are_cached(tmp_path):
+    path = write_dictionary(tmp_path / 'a.txt', _words('a'))
+    small = DictionaryCache(max_bytes=100)
+    _read(path, small)
+    assert len(small) == 0
+    cache = DictionaryCache()
+    # 每行5字节，偏移50位于行首
+    _read(path, cache, end_offset=50)
+    assert len(cache) == 0
+
+
+def test_zero_budget_disables_cache():
+    assert dictionary_cache({'dict_cache_mb': 0}) is None
+    assert dictionary_cache({}) is not None
@@ -0,0 +1,176 @@
+"""NumPy向量化MD5：对一批等长的候选同时运行MD5压缩函数
+
+hashlib.md5 每次调用都要创建Python对象，纯Python热路径每核只能做到每秒一两百万次。
+这里把一批长度相同、不超过55字节(补位后只有一个64字节块)的候选排成
+(16, n) 的uint32消息字数组，64步运算每步都是对n个通道的整数组运算；
+补位产生的常量消息字直接并入轮常数，短口令只有少数几个消息字需要数组运算。
+比较时先用摘要的第一个32位字筛选，只有通过筛选的通道才转换为bytes精确比较。
+
+NumPy是可选依赖，未安装时 available() 为False，调用方继续使用hashlib。NumPy在第一次
+调用 available() 时才导入，不影响命令行的启动速度。大数组运算会释放GIL，线程引擎的
+多个工作线程可以真正并行。
+"""
+import math
+import struct
+
+np = None
+_import_attempted = False
+
+# 单个64字节块能容纳的最长消息(需留出0x80与8字节长度)
+MAX_LENGTH = 55
+# 同长度候选少于该数量时逐个调用hashlib更快(实测约1000个通道时两者持平)
+MIN_BATCH = 2048
+# 每次向量运算的最大通道数，限制临时数组的内存
+MAX_LANES = 65536
+
+_MASK = 0xFFFFFFFF
+_INIT = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476)
+_SHIFTS = [7, 12, 17, 22] * 4 + [5, 9, 14, 20] * 4 + [4, 11, 16, 23] * 4 + [6, 10, 15, 21] * 4
+_CONSTANTS = [int(abs(math.sin(i + 1)) * 2 ** 32) & _MASK for i in range(64)]
+_INDEXES = ([i for i in range(16)] + [(5 * i + 1) % 16 for i in range(16)] +
+            [(3 * i + 5) % 16 for i in range(16)] + [(7 * i) % 16 for i in range(16)])
+
+
+def available():
+    """NumPy是否可用，首次调用时尝试导入"""
+    global np, _import_attempted
+    if not _import_attempted:
+        _import_attempted = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+    return np is not None
+
+
+def _message_words(data, length):
+    """(n, length) uint8 -> 16个消息字，每个是 (n,) uint32 数组或常量int"""
+    n = data.shape[0]
+    # 候选占据的消息字(含0x80所在的字)需要数组，其余为补位常量
+    used = length // 4 + 1
+    block = np.zeros((n, used * 4), np.uint8)
+    block[:, :length] = data
+    block[:, length] = 0x80
+    lanes = np.ascontiguousarray(block.view('<u4').T)
+    words = [lanes[i] for i in range(used)] + [0] * (16 - used)
+    bits = length * 8
+    words[14] = bits & _MASK
+    words[15] = bits >> 32
+    return words
+
+
+def _rotl(x, s, tmp):
+    np.right_shift(x, 32 - s, out=tmp)
+    np.left_shift(x, s, out=x)
+    np.bitwise_or(x, tmp, out=x)
+    return x
+
+
+def compress(data):
+    """对 (n, length) uint8 的等长候选计算MD5，返回 (4, n) uint32 状态(即小端序摘要)"""
+    n, length = data.shape
+    if length > MAX_LENGTH:
+        raise ValueError(f"候选长度超过单块上限: {length}")
+    words = _message_words(data, length)
+    a, b, c, d = (np.full(n, v, np.uint32) for v in _INIT)
+    f = np.empty(n, np.uint32)
+    tmp = np.empty(n, np.uint32)
+    for i in range(64):
+        if i < 16:
+            # F = (b & c) | (~b & d) 写作 d ^ (b & (c ^ d))，少一次取反
+            np.bitwise_xor(c, d, out=f)
+            f &= b
+            f ^= d
+        elif i < 32:
+            # G = (d & b) | (~d & c) = c ^ (d & (b ^ c))
+            np.bitwise_xor(b, c, out=f)
+            f &= d
+            f ^= c
+        elif i < 48:
+            np.bitwise_xor(b, c, out=f)
+            f ^= d
+        else:
+            # I = c ^ (b | ~d)
+            np.invert(d, out=f)
+            f |= b
+            f ^= c
+        word = words[_INDEXES[i]]
+        if isinstance(word, int):
+            f += np.uint32((_CONSTANTS[i] + word) & _MASK)
+        else:
+            f += word
+            f += np.uint32(_CONSTANTS[i])
+        f += a
+        _rotl(f, _SHIFTS[i], tmp)
+        f += b
+        # 寄存器轮换：新b = b + rotl(...)，其余依次后移；旧a的数组复用为下一轮的f
+        a, b, c, d, f = d, f, b, c, a
+    for register, initial in zip((a, b, c, d), _INIT):
+        register += np.uint32(initial)
+    return np.stack((a, b, c, d))
+
+
+def digests(data):
+    """(n, length) uint8 -> 16字节摘要列表，与 hashlib.md5(...).digest() 相同"""
+    raw = compress(data).T.astype('<u4').tobytes()
+    return [raw[i:i + 16] for i in range(0, len(raw), 16)]
+
+
+class TargetFilter:
+    """目标摘要的向量化筛选：{16字节摘要: 目标} -> 按第一个32位字排序的数组"""
+
+    def __init__(self, targets):
+        self.targets = targets
+        self.first_words = np.unique(np.array(
+            [struct.unpack_from('<I', digest)[0] for digest in targets], dtype=np.uint32))
+
+    def match(self, data):
+        """对 (n, length) uint8 候选计算MD5，返回命中的 [(目标, 明文bytes)]"""
+        state = compress(data)
+        candidates = np.nonzero(np.isin(state[0], self.first_words, assume_unique=False))[0]
+        hits = []
+        for lane in candidates.tolist():
+            digest = struct.pack('<4I', *state[:, lane].tolist())
+            target = self.targets.get(digest)
+            if target is not None:
+                hits.append((target, data[lane].tobytes()))
+        return hits
+
+
+def state_mask(mask, value):
+    """摘要上的 (掩码, 值) 128位整数 -> compress 状态字上的 [(字序号, 掩码, 值)]，省去掩码为0的字
+
+    摘要即按小端序排列的4个状态字，因此摘要的每4个字节按小端序解读即为对应的状态字。
+    """
+    masks = struct.unpack('<4I', mask.to_bytes(16, 'big'))
+    values = struct.unpack('<4I', value.to_bytes(16, 'big'))
+    return [(k, m, v) for k, (m, v) in enumerate(zip(masks, values)) if m]
+
+
+def masked_lanes(state, word_masks):
+    """compress 的结果中满足全部 (字序号, 掩码, 值) 的通道序号列表"""
+    selected = None
+    for k, m, v in word_masks:
+        lanes = (state[k] & np.uint32(m)) == np.uint32(v)
+        selected = lanes if selected is None else selected & lanes
+    if selected is None:
+        return range(state.shape[1])
+    return np.nonzero(selected)[0].tolist()
+
+
+def group_by_length(words):
+    """按长度分组，返回 ({长度: 单词列表}, 无法向量化的单词列表)"""
+    groups = {}
+    for word in words:
+        groups.setdefault(len(word), []).append(word)
+    rest = []
+    for length in list(groups):
+        if length > MAX_LENGTH or len(groups[length]) < MIN_BATCH:
+            rest.extend(groups.pop(length))
+    return groups, rest
+
+
+def as_array(words, length):
+    """等长bytes单词列表 -> (n, length) uint8数组"""
+    return np.frombuffer(b''.join(words), np.uint8).reshape(len(words), length)
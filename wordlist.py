@@ -0,0 +1,336 @@
+"""字典流式读取：后台线程按块读取字典文件，通过有界队列供给哈希线程
+
+进程内的 DictionaryCache 按LRU常驻最近用过的字典：每个字典是一段连续的bytes
+(规范化后的单词以换行分隔)加上按块记录的 array 偏移表，每个单词只多占一个字节。
+完整读取一遍字典时顺带建立缓存，之后对同一字典的破解、正则任务直接从内存切块，
+不再读盘和逐行规范化。文件大小或修改时间变化后缓存条目失效。
+"""
+import os
+import time
+import queue
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from crack_core import normalize_line
+
+# 每次从磁盘读取的字节数
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+# 队列中最多缓存的块数，决定了读取线程最多领先多少数据
+DEFAULT_MAX_CHUNKS = 8
+# 估计字典行数时读取的样本大小
+LINE_SAMPLE_BYTES = 1024 * 1024
+# 常驻字典缓存的默认内存预算(MB)
+DEFAULT_CACHE_MB = 256
+
+_END = object()
+
+
+def _signature(file_path):
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+class CachedWordlist:
+    """一个字典的常驻副本：buffer 为全部单词各自加换行拼接而成
+
+    file_ends[i] 与 buffer_ends[i] 为第i块结束处在文件和 buffer 中的偏移，块边界与
+    首次读取时 WordlistStream 产出的块一致，都位于行首。
+    """
+
+    def __init__(self, file_path, signature, buffer, file_ends, buffer_ends):
+        self.file_path = file_path
+        self.signature = signature
+        self.buffer = buffer
+        self.file_ends = file_ends
+        self.buffer_ends = buffer_ends
+
+    @property
+    def nbytes(self):
+        return (len(self.buffer) + self.file_ends.itemsize * len(self.file_ends) +
+                self.buffer_ends.itemsize * len(self.buffer_ends))
+
+    def chunks(self, start_offset=0, end_offset=None, should_stop=None):
+        """产出 [start_offset, end_offset) 内的 (words, offset)，与 WordlistStream 的迭代结果相同
+
+        两端不在块边界上时，所在的那一块(不超过一个读取块)改为从文件中读取。
+        """
+        file_ends, buffer_ends, buffer = self.file_ends, self.buffer_ends, self.buffer
+        end_offset = self.signature[0] if end_offset is None else min(end_offset, self.signature[0])
+        i = bisect_right(file_ends, start_offset)
+        position = start_offset
+        while i < len(file_ends) and position < end_offset:
+            if should_stop and should_stop():
+                return
+            chunk_start = file_ends[i - 1] if i else 0
+            chunk_end = file_ends[i]
+            if chunk_start == position and chunk_end <= end_offset:
+                words = buffer[buffer_ends[i - 1] if i else 0:buffer_ends[i] - 1].split(b'\n')
+            else:
+                chunk_end = min(chunk_end, end_offset)
+                words = self._read_words(position, chunk_end)
+            if words:
+                yield words, chunk_end
+            position = chunk_end
+            i += 1
+
+    def _read_words(self, start, end):
+        with open(self.file_path, 'rb') as f:
+            f.seek(start)
+            return _split_words(f.read(end - start))
+
+
+class CacheBuilder:
+    """在首次完整读取字典时逐块收集单词，读完后生成 CachedWordlist"""
+
+    def __init__(self, file_path, signature):
+        self.file_path = file_path
+        self.signature = signature
+        self._pieces = []
+        self._buffer_size = 0
+        self._file_ends = array('Q')
+        self._buffer_ends = array('Q')
+
+    def add(self, words, offset):
+        piece = b'\n'.join(words) + b'\n'
+        self._pieces.append(piece)
+        self._buffer_size += len(piece)
+        self._file_ends.append(offset)
+        self._buffer_ends.append(self._buffer_size)
+
+    def finish(self):
+        buffer = b''.join(self._pieces)
+        self._pieces = []
+        return CachedWordlist(self.file_path, self.signature, buffer, self._file_ends, self._buffer_ends)
+
+
+class DictionaryCache:
+    """进程内的常驻字典缓存，总内存不超过 max_bytes，超出时淘汰最久未使用的字典；线程安全"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, file_path):
+        """取字典的缓存副本并记为最近使用，不存在或文件已变化时返回None"""
+        key = os.path.abspath(file_path)
+        try:
+            signature = _signature(file_path)
+        except OSError:
+            signature = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.signature != signature:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def builder(self, file_path):
+        """为即将完整读取的字典创建 CacheBuilder，文件大于预算时返回None"""
+        signature = _signature(file_path)
+        if signature[0] > self.max_bytes:
+            return None
+        return CacheBuilder(os.path.abspath(file_path), signature)
+
+    def put(self, entry):
+        """加入缓存并淘汰最久未使用的字典；读取期间文件发生变化的条目直接丢弃"""
+        try:
+            if _signature(entry.file_path) != entry.signature:
+                return
+        except OSError:
+            return
+        with self._lock:
+            self._remove(entry.file_path)
+            if entry.nbytes > self.max_bytes:
+                return
+            self._entries[entry.file_path] = entry
+            self.nbytes += entry.nbytes
+            self._evict()
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def _evict(self):
+        while self._entries and self.nbytes > self.max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self.nbytes -= entry.nbytes
+
+
+_CACHE = DictionaryCache()
+
+
+def dictionary_cache(settings=None):
+    """按 settings.dict_cache_mb 调整进程内字典缓存的预算并返回缓存，预算为0时返回None"""
+    budget_mb = (settings or {}).get('dict_cache_mb', DEFAULT_CACHE_MB)
+    if not budget_mb:
+        _CACHE.clear()
+        return None
+    if _CACHE.max_bytes != int(budget_mb * 1024 * 1024):
+        _CACHE.resize(int(budget_mb * 1024 * 1024))
+    return _CACHE
+
+
+class WordlistStream:
+    """按块流式读取字典，内存占用与文件大小无关
+
+    迭代得到 (words, offset)，words为该块内去除空白后的非空单词(bytes)，
+    offset为该块结束位置在文件中的字节偏移，可直接用于进度计算。
+    start_offset 必须位于行首(如检查点中保存的块结束偏移)，从该处开始读取；
+    end_offset 同样须位于行首，只读到该处为止，total_bytes 随之变为 end_offset。
+    cache 为 DictionaryCache 时优先从缓存切块；未命中且完整读取整个字典时顺带建立缓存。
+    stats 为 instrumentation.RunStats 时记录 read、normalize、cache 阶段的耗时。
+    """
+
+    def __init__(self, file_path, chunk_bytes=DEFAULT_CHUNK_BYTES, max_chunks=DEFAULT_MAX_CHUNKS,
+                 start_offset=0, end_offset=None, cache=None, stats=None):
+        self.file_path = file_path
+        self.stats = stats
+        self.chunk_bytes = chunk_bytes
+        self.start_offset = start_offset
+        size = os.path.getsize(file_path)
+        self.total_bytes = size if end_offset is None else min(end_offset, size)
+        self.cache = cache
+        self.cached = cache.get(file_path) if cache is not None else None
+        self._builder = None
+        if cache is not None and self.cached is None and start_offset == 0 and self.total_bytes == size:
+            self._builder = cache.builder(file_path)
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._stop_event = threading.Event()
+        self._reader = None
+
+    @property
+    def queue_depth(self):
+        """读取线程已读好、尚未被取走的块数"""
+        return self._queue.qsize()
+
+    def start(self):
+        if self._reader is None and self.cached is None:
+            self._reader = threading.Thread(target=self._read_loop, name="WordlistReader", daemon=True)
+            self._reader.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        # 清空队列，让可能阻塞在put上的读取线程尽快退出
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def __iter__(self):
+        if self.cached is not None:
+            # 缓存命中时切块只是内存操作，直接在调用方线程中进行
+            chunks = self.cached.chunks(self.start_offset, self.total_bytes, self._stop_event.is_set)
+            if self.stats is None:
+                yield from chunks
+                return
+            while True:
+                began = time.perf_counter()
+                item = next(chunks, None)
+                self.stats.add_time('cache', time.perf_counter() - began)
+                if item is None:
+                    return
+                yield item
+        self.start()
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _put(self, item):
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _emit(self, words, offset):
+        if self._builder is not None:
+            self._builder.add(words, offset)
+        return self._put((words, offset))
+
+    def _read_loop(self):
+        stats = self.stats
+        try:
+            with open(self.file_path, 'rb') as f:
+                f.seek(self.start_offset)
+                offset = self.start_offset
+                remainder = b''
+                while not self._stop_event.is_set():
+                    began = time.perf_counter()
+                    block = f.read(min(self.chunk_bytes, self.total_bytes - offset))
+                    if stats is not None:
+                        stats.add_time('read', time.perf_counter() - began)
+                    if not block:
+                        break
+                    offset += len(block)
+                    data = remainder + block
+                    cut = data.rfind(b'\n')
+                    if cut == -1:
+                        remainder = data
+                        continue
+                    remainder = data[cut + 1:]
+                    began = time.perf_counter()
+                    words = _split_words(data[:cut])
+                    if stats is not None:
+                        stats.add_time('normalize', time.perf_counter() - began)
+                    if words and not self._emit(words, offset - len(remainder)):
+                        return
+                if remainder and not self._stop_event.is_set():
+                    words = _split_words(remainder)
+                    if words and not self._emit(words, offset):
+                        return
+            # 完整读完才加入缓存，被停止时丢弃已收集的部分
+            if self._builder is not None and not self._stop_event.is_set():
+                self.cache.put(self._builder.finish())
+            self._builder = None
+            self._put(_END)
+        except Exception as e:
+            self._put(e)
+
+
+def estimate_line_count(file_path, sample_bytes=LINE_SAMPLE_BYTES):
+    """按文件开头样本的平均行长估计字典行数，文件不大于样本时为精确值"""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    lines = sample.count(b'\n') + (1 if sample and not sample.endswith(b'\n') else 0)
+    if len(sample) >= size or not lines:
+        return lines
+    return int(lines * size / len(sample))
+
+
+def _split_words(data):
+    return [word for word in map(normalize_line, data.split(b'\n')) if word]